@@ -0,0 +1,10 @@
+"""Offline benchmark of the Kotlin formatters, run from `LLDBPlugin` with `python -m benchmark`.
+
+The formatters are driven against a synthetic heap image through a stand-in `lldb` module, so the number of debugger
+round trips they make can be tracked without Xcode or a device."""
+import sys
+
+from . import fake_lldb
+
+# Has to happen before anything imports `touchlab_kotlin_lldb`.
+sys.modules['lldb'] = fake_lldb
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from . import fake_lldb
+from .heap import HeapImage, as_root
+from .render import render
+from .scenarios import SCENARIOS, Roots, Scenario
+from .startup import measure_startup
+
+from touchlab_kotlin_lldb.cache import LLDBCache, pending_invalidations, target_key
+from touchlab_kotlin_lldb.cache.persistent import KONAN_LLDB_CACHE_DIR
+from touchlab_kotlin_lldb.types.module_cache import flush_module_caches, persist_module_caches
+from touchlab_kotlin_lldb.types.paging import CHILDREN_PAGE_SIZE_ENV
+from touchlab_kotlin_lldb.util.perf import STARTUP_BUDGET_SECONDS
+from touchlab_kotlin_lldb.util.symbol_index import get_symbol_index, reset_symbol_indices
+
+BASELINES_PATH = pathlib.Path(__file__).parent / 'baselines.json'
+# Distance between the addresses the module is loaded at in consecutive launches.
+LAUNCH_SLIDE = 0x10000000
+# Canonical frame address of the frame the roots are the variables of.
+FRAME_CFA = 0x16fdff000
+
+
+def run_scenario(scenario: Scenario, repeat: int) -> Dict:
+    best_time = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            os.environ[KONAN_LLDB_CACHE_DIR] = cache_dir
+            if scenario.children_page_size is not None:
+                os.environ[CHILDREN_PAGE_SIZE_ENV] = str(scenario.children_page_size)
+            try:
+                elapsed, lines = _run_launches(scenario)
+            finally:
+                os.environ.pop(CHILDREN_PAGE_SIZE_ENV, None)
+                # Before the cache directory goes away.
+                flush_module_caches()
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    return {
+        'rows': len(lines),
+        'wall_time': round(best_time, 4),
+        'counters': dict(sorted(fake_lldb.counters.items())),
+    }
+
+
+def _run_launches(scenario: Scenario) -> Tuple[float, List[str]]:
+    builds = [scenario.build, *scenario.other_targets]
+    launches: List[List[Tuple[HeapImage, Roots]]] = []
+    for launch in range(scenario.launches):
+        images = []
+        for index, build in enumerate(builds):
+            # Same builds every launch, loaded somewhere else each time.
+            image = HeapImage(launches[0][index][0].uuid if launches else None, slide=launch * LAUNCH_SLIDE)
+            images.append((image, build(image)))
+        launches.append(images)
+    fake_lldb.counters.clear()
+
+    elapsed = 0.0
+    lines: List[str] = []
+    targets: List[fake_lldb.SBTarget] = []
+    for launch, images in enumerate(launches):
+        if launch == 0 or scenario.new_sessions:
+            # A new session reads what the previous one wrote.
+            flush_module_caches()
+            LLDBCache.reset()
+            reset_symbol_indices()
+            targets = [fake_lldb.SBTarget(image) for image, _ in images]
+            fake_lldb.debugger = fake_lldb.SBDebugger(*targets)
+        else:
+            for target, (image, _) in zip(targets, images):
+                target.launch(image)
+        for target in targets:
+            # The plugin indexes the module when it loads, well before the first stop.
+            get_symbol_index(target.module)
+
+        started = time.perf_counter()
+        for stop in range(scenario.stops):
+            if stop > 0:
+                for target in targets:
+                    target.process.Continue()
+            # What the stop hook does before the variables are shown.
+            persist_module_caches()
+            lines = []
+            for target, (image, roots) in zip(targets, images):
+                # All the roots are the variables of the selected frame.
+                frame = fake_lldb.SBFrame(FRAME_CFA)
+                frame.variables = [as_root(target.process, image, name, address, frame) for name, address in roots]
+                for variable in frame.variables:
+                    render(variable, scenario.ptr_depth, lines)
+        for target in targets:
+            # What the cache event listener does once the process exits.
+            pending_invalidations.append((target_key(target), LLDBCache.drop_launch_entries))
+        elapsed += time.perf_counter() - started
+    return elapsed, lines
+
+
+def compare(name: str, result: Dict, baseline: Dict) -> List[str]:
+    """Only the counters are compared, they are the same on every run. Wall time is reported but varies too much
+    between runs, even on the same machine, to fail on."""
+    regressions = []
+    for counter in sorted(set(result['counters']) | set(baseline.get('counters', {}))):
+        current = result['counters'].get(counter, 0)
+        recorded = baseline.get('counters', {}).get(counter, 0)
+        if current > recorded:
+            regressions.append('{}: {} went from {} to {}'.format(name, counter, recorded, current))
+    return regressions
+
+
+def run_startup(repeat: int) -> Dict:
+    results = [measure_startup() for _ in range(repeat)]
+    return {
+        'modules': results[0]['modules'],
+        'wall_time': min(result['wall_time'] for result in results),
+    }
+
+
+def compare_startup(result: Dict, baseline: Dict) -> List[str]:
+    regressions = [
+        'startup: imports {}'.format(module) for module in result['modules'] if module not in baseline['modules']
+    ]
+    # The budget of the plugin itself, far enough above the usual startup time that noise doesn't reach it.
+    if result['wall_time'] > STARTUP_BUDGET_SECONDS:
+        regressions.append('startup: {:.3f}s exceeds the {:.3f}s budget'.format(
+            result['wall_time'], STARTUP_BUDGET_SECONDS,
+        ))
+    return regressions
+
+
+def _recorded_time(baselines: Dict, name: str) -> str:
+    baseline = baselines.get(name)
+    return '' if baseline is None else '  (recorded {:.3f}s)'.format(baseline['wall_time'])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description=__doc__)
+    parser.add_argument('--scenario', action='append', choices=[scenario.name for scenario in SCENARIOS],
+                        help='Only run the given scenario, can be repeated.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario, the fastest one is reported.')
+    parser.add_argument('--baselines', type=pathlib.Path, default=BASELINES_PATH)
+    parser.add_argument('--update-baselines', action='store_true',
+                        help='Record the results as the new baselines instead of comparing against them.')
+    args = parser.parse_args()
+
+    baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+    regressions: List[str] = []
+
+    if not args.scenario:
+        result = run_startup(args.repeat)
+        print('{:<12} {:>6} modules {:>5.3f}s{}'.format(
+            'startup', len(result['modules']), result['wall_time'], _recorded_time(baselines, 'startup'),
+        ))
+        if args.update_baselines:
+            baselines['startup'] = result
+        elif 'startup' in baselines:
+            regressions.extend(compare_startup(result, baselines['startup']))
+        else:
+            print('{:<12} no baseline recorded'.format('startup'))
+
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        result = run_scenario(scenario, args.repeat)
+        print('{:<12} {:>6} rows {:>8.3f}s  {}{}'.format(
+            scenario.name,
+            result['rows'],
+            result['wall_time'],
+            ', '.join('{}={}'.format(counter, count) for counter, count in result['counters'].items()),
+            _recorded_time(baselines, scenario.name),
+        ))
+
+        if args.update_baselines:
+            baselines[scenario.name] = result
+        elif scenario.name in baselines:
+            regressions.extend(compare(scenario.name, result, baselines[scenario.name]))
+        else:
+            print('{:<12} no baseline recorded'.format(scenario.name))
+
+    if args.update_baselines:
+        args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+        print('Baselines written to {}'.format(args.baselines))
+        return 0
+
+    for regression in regressions:
+        print('REGRESSION {}'.format(regression), file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
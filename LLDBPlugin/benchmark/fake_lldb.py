@@ -0,0 +1,768 @@
+"""Stand-in for the parts of the `lldb` module the formatters use, backed by a `HeapImage` instead of a live process.
+
+Every call that would cost a round trip in a real debugger (memory reads, expression evaluations, SBValue creation) is
+counted in `counters`, so the benchmark can catch formatters that start doing more work than they used to."""
+import itertools
+import re
+import struct
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+counters: Counter = Counter()
+
+eBasicTypeInvalid = 0
+eBasicTypeVoid = 1
+eBasicTypeChar = 2
+eBasicTypeSignedChar = 3
+eBasicTypeUnsignedChar = 4
+eBasicTypeShort = 9
+eBasicTypeUnsignedShort = 10
+eBasicTypeInt = 11
+eBasicTypeUnsignedInt = 12
+eBasicTypeLong = 13
+eBasicTypeUnsignedLong = 14
+eBasicTypeLongLong = 15
+eBasicTypeUnsignedLongLong = 16
+eBasicTypeBool = 20
+eBasicTypeFloat = 22
+eBasicTypeDouble = 23
+
+eMatchTypeNormal = 0
+eMatchTypeRegex = 1
+eTypeOptionHideValue = 1 << 8
+eLanguageTypeC_plus_plus_20 = 0x002B
+eByteOrderLittle = 4
+eNoDynamicValues = 0
+
+LLDB_INVALID_ADDRESS = 0xFFFFFFFFFFFFFFFF
+
+_BASIC_TYPES = {
+    eBasicTypeVoid: ('void', 0, None),
+    eBasicTypeChar: ('char', 1, 'b'),
+    eBasicTypeSignedChar: ('signed char', 1, 'b'),
+    eBasicTypeUnsignedChar: ('unsigned char', 1, 'B'),
+    eBasicTypeShort: ('short', 2, 'h'),
+    eBasicTypeUnsignedShort: ('unsigned short', 2, 'H'),
+    eBasicTypeInt: ('int', 4, 'i'),
+    eBasicTypeUnsignedInt: ('unsigned int', 4, 'I'),
+    eBasicTypeLong: ('long', 8, 'q'),
+    eBasicTypeUnsignedLong: ('unsigned long', 8, 'Q'),
+    eBasicTypeLongLong: ('long long', 8, 'q'),
+    eBasicTypeUnsignedLongLong: ('unsigned long long', 8, 'Q'),
+    eBasicTypeBool: ('bool', 1, '?'),
+    eBasicTypeFloat: ('float', 4, 'f'),
+    eBasicTypeDouble: ('double', 8, 'd'),
+}
+
+# Set by the harness, the formatters resolve the selected target through it.
+debugger: Optional['SBDebugger'] = None
+
+
+class SBError:
+    def __init__(self, description: Optional[str] = None):
+        self.description = description
+
+    def Success(self) -> bool:
+        return self.description is None
+
+    def Fail(self) -> bool:
+        return not self.Success()
+
+    def SetErrorString(self, description: str):
+        self.description = description
+
+    @property
+    def success(self) -> bool:
+        return self.Success()
+
+
+class SBType:
+    def __init__(
+            self,
+            name: str,
+            byte_size: int,
+            basic_type: int = eBasicTypeInvalid,
+            pointee: Optional['SBType'] = None,
+            element: Optional['SBType'] = None,
+            fields: Sequence[Tuple[str, 'SBType']] = (),
+    ):
+        self.name = name
+        self._byte_size = byte_size
+        self._basic_type = basic_type
+        self._pointee = pointee
+        self._element = element
+        self._pointer: Optional[SBType] = None
+        self._members: List[SBTypeMember] = []
+
+        offset = 0
+        alignment = 1
+        for field_name, field_type in fields:
+            field_alignment = field_type.alignment()
+            offset = (offset + field_alignment - 1) & ~(field_alignment - 1)
+            self._members.append(SBTypeMember(field_name, field_type, offset))
+            offset += field_type.GetByteSize()
+            alignment = max(alignment, field_alignment)
+        if fields:
+            self._byte_size = (offset + alignment - 1) & ~(alignment - 1)
+
+    def IsValid(self) -> bool:
+        return self._byte_size >= 0
+
+    def GetName(self) -> str:
+        return self.name
+
+    def GetByteSize(self) -> int:
+        return self._byte_size
+
+    def GetBasicType(self) -> int:
+        return self._basic_type
+
+    def GetCanonicalType(self) -> 'SBType':
+        return self
+
+    def IsPointerType(self) -> bool:
+        return self._pointee is not None
+
+    def IsReferenceType(self) -> bool:
+        return False
+
+    def IsArrayType(self) -> bool:
+        return self._element is not None
+
+    def GetPointeeType(self) -> 'SBType':
+        return self._pointee if self._pointee is not None else _INVALID_TYPE
+
+    def GetArrayElementType(self) -> 'SBType':
+        return self._element if self._element is not None else _INVALID_TYPE
+
+    def GetPointerType(self) -> 'SBType':
+        if self._pointer is None:
+            self._pointer = SBType('{} *'.format(self.name), 8, pointee=self)
+        return self._pointer
+
+    def GetNumberOfFields(self) -> int:
+        return len(self._members)
+
+    def GetFieldAtIndex(self, index: int) -> 'SBTypeMember':
+        return self._members[index]
+
+    def member(self, name: str) -> Optional['SBTypeMember']:
+        for member in self._members:
+            if member.name == name:
+                return member
+        return None
+
+    def alignment(self) -> int:
+        if self._members:
+            return max(member.type.alignment() for member in self._members)
+        if self._element is not None:
+            return self._element.alignment()
+        return max(1, self._byte_size)
+
+    def scalar_format(self) -> Optional[str]:
+        if self.IsPointerType():
+            return 'Q'
+        basic = _BASIC_TYPES.get(self._basic_type)
+        return None if basic is None else basic[2]
+
+    @property
+    def type(self):
+        return self
+
+
+_INVALID_TYPE = SBType('<invalid>', -1)
+
+
+def basic_type(basic: int) -> SBType:
+    name, size, _ = _BASIC_TYPES[basic]
+    return SBType(name, size, basic_type=basic)
+
+
+def array_type(element: SBType, count: int) -> SBType:
+    return SBType('{}[{}]'.format(element.name, count), element.GetByteSize() * count, element=element)
+
+
+class SBTypeMember:
+    def __init__(self, name: str, member_type: SBType, offset: int):
+        self.name = name
+        self.type = member_type
+        self.byte_offset = offset
+
+    def GetName(self) -> str:
+        return self.name
+
+    def GetType(self) -> SBType:
+        return self.type
+
+    def GetOffsetInBytes(self) -> int:
+        return self.byte_offset
+
+
+class SBData:
+    def __init__(self):
+        self.data = b''
+
+    def SetData(self, error: SBError, buf: bytes, endian: int, addr_size: int):
+        self.data = bytes(buf)
+
+
+class SBAddress:
+    """A load address, the file address is the load address minus the slide the image was loaded with."""
+
+    def __init__(self, address: int = 0, target: Optional['SBTarget'] = None, slide: int = 0):
+        self._address = address
+        self._target = target
+        self._slide = slide
+
+    def GetLoadAddress(self, target: 'SBTarget') -> int:
+        return self._address
+
+    def GetFileAddress(self) -> int:
+        return self._address - self._slide
+
+    def GetModule(self) -> 'SBModule':
+        if self._target is not None and self._target.image.read(self._address, 1) is not None:
+            return self._target.module
+        return SBModule(None)
+
+
+class SBModule:
+    """The heap image doubles as the single module of the target, its symbols are the ones the image defines."""
+
+    def __init__(self, image):
+        self._image = image
+
+    def IsValid(self) -> bool:
+        return self._image is not None
+
+    def GetUUIDString(self) -> str:
+        return self._image.uuid
+
+    def GetFileSpec(self) -> str:
+        return 'benchmark'
+
+    def GetObjectFileHeaderAddress(self) -> SBAddress:
+        return SBAddress(self._image.base_address, slide=self._image.slide)
+
+    @property
+    def symbols(self) -> List['SBSymbol']:
+        counters['SBModule.symbols'] += 1
+        return [SBSymbol(name, address, self._image.slide) for name, address in self._image.symbols.items()]
+
+
+class SBValue:
+    """A value either located in the heap image (`address`) or holding its own bytes (`data`)."""
+
+    def __init__(
+            self,
+            process: 'SBProcess',
+            name: Optional[str],
+            value_type: SBType,
+            address: Optional[int] = None,
+            data: Optional[bytes] = None,
+            error: Optional[str] = None,
+            frame: Optional['SBFrame'] = None,
+    ):
+        counters['SBValue'] += 1
+        self._process = process
+        # Only variables have a frame, the values derived from them are located in memory.
+        self._frame = frame
+        self.name = name
+        self.type = value_type
+        self._address = address
+        self._data = data
+        self._error = error
+
+    # Raw access
+
+    def _bytes(self) -> Optional[bytes]:
+        if self._error is not None:
+            return None
+        if self._data is not None:
+            return self._data
+        if self._address is None:
+            return None
+        counters['SBValue memory read'] += 1
+        return self._process.image.read(self._address, self.type.GetByteSize())
+
+    def _scalar(self, signed: bool) -> Optional[object]:
+        data = self._bytes()
+        value_format = self.type.scalar_format()
+        if data is None or value_format is None or len(data) < struct.calcsize(value_format):
+            return None
+        if value_format in 'bhiqBHIQ':
+            value_format = value_format.lower() if signed else value_format.upper()
+        return struct.unpack_from('<' + value_format, data)[0]
+
+    # SBValue API
+
+    def IsValid(self) -> bool:
+        return self._error is None and self.type.IsValid()
+
+    def __bool__(self) -> bool:
+        return self.IsValid()
+
+    __nonzero__ = __bool__
+
+    def GetName(self) -> Optional[str]:
+        return self.name
+
+    def GetType(self) -> SBType:
+        return self.type
+
+    def GetProcess(self) -> 'SBProcess':
+        return self._process
+
+    def GetTarget(self) -> 'SBTarget':
+        return self._process.target
+
+    def GetFrame(self) -> 'SBFrame':
+        return self._frame or SBFrame()
+
+    @property
+    def process(self) -> 'SBProcess':
+        return self._process
+
+    @property
+    def target(self) -> 'SBTarget':
+        return self._process.target
+
+    def GetNonSyntheticValue(self) -> 'SBValue':
+        return self
+
+    def GetLoadAddress(self) -> int:
+        return LLDB_INVALID_ADDRESS if self._address is None else self._address
+
+    def GetValueAsUnsigned(self, fail_value: int = 0) -> int:
+        value = self._scalar(signed=False)
+        return fail_value if value is None else int(value)
+
+    def GetValueAsSigned(self, fail_value: int = 0) -> int:
+        value = self._scalar(signed=True)
+        return fail_value if value is None else int(value)
+
+    @property
+    def unsigned(self) -> int:
+        return self.GetValueAsUnsigned()
+
+    @property
+    def signed(self) -> int:
+        return self.GetValueAsSigned()
+
+    def GetValue(self) -> Optional[str]:
+        if self.type.IsPointerType():
+            return None if self._bytes() is None else '0x{:016x}'.format(self.unsigned)
+        value = self._scalar(signed=True)
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        return None if value is None else str(value)
+
+    @property
+    def value(self) -> Optional[str]:
+        return self.GetValue()
+
+    def GetSummary(self) -> Optional[str]:
+        if self.type.IsPointerType() and self.type.GetPointeeType().GetBasicType() == eBasicTypeChar:
+            error = SBError()
+            text = self._process.ReadCStringFromMemory(self.unsigned, 0x1000, error)
+            return None if error.Fail() else '"{}"'.format(text)
+        return None
+
+    @property
+    def summary(self) -> Optional[str]:
+        return self.GetSummary()
+
+    def GetError(self) -> SBError:
+        return SBError(self._error)
+
+    def Cast(self, value_type: SBType) -> 'SBValue':
+        return SBValue(self._process, self.name, value_type, self._address, self._data, self._error, self._frame)
+
+    def Dereference(self) -> 'SBValue':
+        if not self.type.IsPointerType():
+            return SBValue(self._process, self.name, _INVALID_TYPE, error='not a pointer')
+        address = self.unsigned
+        if address == 0:
+            return SBValue(self._process, self.name, self.type.GetPointeeType(), error='null pointer')
+        return SBValue(self._process, '*{}'.format(self.name), self.type.GetPointeeType(), address=address)
+
+    def AddressOf(self) -> 'SBValue':
+        if self._address is None:
+            return SBValue(self._process, self.name, self.type.GetPointerType(), error='no address')
+        return SBValue(self._process, '&{}'.format(self.name), self.type.GetPointerType(),
+                       data=struct.pack('<Q', self._address))
+
+    def CreateValueFromAddress(self, name: str, address: int, value_type: SBType) -> 'SBValue':
+        return SBValue(self._process, name, value_type, address=address)
+
+    def CreateValueFromData(self, name: str, data: SBData, value_type: SBType) -> 'SBValue':
+        return SBValue(self._process, name, value_type, data=data.data)
+
+    def CreateValueFromExpression(self, name: str, expression: str, options=None) -> 'SBValue':
+        result = self._process.target.EvaluateExpression(expression, options)
+        result.name = name
+        return result
+
+    def synthetic_child_from_address(self, name: str, address: int, value_type: SBType) -> 'SBValue':
+        return self.CreateValueFromAddress(name, address, value_type)
+
+    def GetChildMemberWithName(self, name: str) -> 'SBValue':
+        holder = self.Dereference() if self.type.IsPointerType() else self
+        member = holder.type.member(name)
+        if member is None or not holder.IsValid():
+            return SBValue(self._process, name, _INVALID_TYPE, error='no member {}'.format(name))
+        return holder._child(name, member.type, member.byte_offset)
+
+    def GetNumChildren(self) -> int:
+        if self.type.IsArrayType():
+            element = self.type.GetArrayElementType()
+            return self.type.GetByteSize() // element.GetByteSize()
+        if self.type.IsPointerType():
+            return 1
+        return self.type.GetNumberOfFields()
+
+    def GetChildAtIndex(self, index: int, use_dynamic: int = eNoDynamicValues, can_create_synthetic: bool = False):
+        if self.type.IsArrayType():
+            element = self.type.GetArrayElementType()
+            return self._child('[{}]'.format(index), element, index * element.GetByteSize())
+        if self.type.IsPointerType():
+            pointee = self.type.GetPointeeType()
+            if index == 0 or can_create_synthetic:
+                return SBValue(self._process, '[{}]'.format(index), pointee,
+                               address=self.unsigned + index * pointee.GetByteSize())
+        if 0 <= index < self.type.GetNumberOfFields():
+            member = self.type.GetFieldAtIndex(index)
+            return self._child(member.name, member.type, member.byte_offset)
+        return SBValue(self._process, None, _INVALID_TYPE, error='no child {}'.format(index))
+
+    def _child(self, name: str, child_type: SBType, offset: int) -> 'SBValue':
+        if self._address is not None:
+            return SBValue(self._process, name, child_type, address=self._address + offset)
+        data = self._bytes() or b''
+        return SBValue(self._process, name, child_type, data=data[offset:offset + child_type.GetByteSize()])
+
+
+class value:
+    """Same behaviour as `lldb.value`: attribute and index access map to SBValue children."""
+
+    def __init__(self, sbvalue: SBValue):
+        self.sbvalue = sbvalue
+
+    def __bool__(self) -> bool:
+        return bool(self.sbvalue)
+
+    __nonzero__ = __bool__
+
+    def __getattr__(self, name: str) -> 'value':
+        child = self.sbvalue.GetChildMemberWithName(name)
+        if child and child.IsValid():
+            return value(child)
+        raise AttributeError("Attribute '{}' is not defined".format(name))
+
+    def __getitem__(self, key: int) -> 'value':
+        return value(self.sbvalue.GetChildAtIndex(key, eNoDynamicValues, True))
+
+    def __int__(self) -> int:
+        if self.sbvalue.type.IsPointerType():
+            return self.sbvalue.GetValueAsUnsigned()
+        return self.sbvalue.GetValueAsSigned()
+
+    def __index__(self) -> int:
+        return self.__int__()
+
+    def __eq__(self, other) -> bool:
+        return int(self) == int(other)
+
+    def __ne__(self, other) -> bool:
+        return not self.__eq__(other)
+
+    def __str__(self) -> str:
+        return str(self.sbvalue.GetValue())
+
+
+class SBSymbol:
+    def __init__(self, name: str, address: int, slide: int = 0):
+        self.name = name
+        self._address = address
+        self._slide = slide
+
+    def GetName(self) -> str:
+        return self.name
+
+    def GetStartAddress(self) -> SBAddress:
+        return SBAddress(self._address, slide=self._slide)
+
+    @property
+    def addr(self) -> SBAddress:
+        return self.GetStartAddress()
+
+
+class SBSymbolContext:
+    def __init__(self, symbol: SBSymbol):
+        self.symbol = symbol
+
+    def GetSymbol(self) -> SBSymbol:
+        return self.symbol
+
+
+class SBSymbolContextList(list):
+    def GetSize(self) -> int:
+        return len(self)
+
+    def GetContextAtIndex(self, index: int) -> SBSymbolContext:
+        return self[index]
+
+
+class SBExpressionOptions:
+    # LLDB's default, 0 means no timeout at all.
+    DEFAULT_TIMEOUT_MICROSECONDS = 500_000
+
+    def __init__(self):
+        self._timeout = SBExpressionOptions.DEFAULT_TIMEOUT_MICROSECONDS
+
+    def GetTimeoutInMicroSeconds(self) -> int:
+        return self._timeout
+
+    def SetTimeoutInMicroSeconds(self, timeout: int):
+        self._timeout = timeout
+
+    def __getattr__(self, name: str):
+        return lambda *args: None
+
+
+_process_ids = itertools.count(1)
+
+
+class SBFrame:
+    """The frame the root values of a scenario are the variables of, invalid without a CFA."""
+
+    def __init__(self, cfa: int = LLDB_INVALID_ADDRESS):
+        self._cfa = cfa
+        self.variables: List[SBValue] = []
+
+    def IsValid(self) -> bool:
+        return self._cfa != LLDB_INVALID_ADDRESS
+
+    def GetCFA(self) -> int:
+        return self._cfa
+
+    def GetVariables(self, arguments: bool, locals: bool, statics: bool, in_scope_only: bool) -> List[SBValue]:
+        counters['SBFrame.variables'] += 1
+        return list(self.variables)
+
+
+class SBProcess:
+    eBroadcastBitStateChanged = 1
+
+    @staticmethod
+    def GetBroadcasterClassName() -> str:
+        return 'lldb.process'
+
+    def __init__(self, target: 'SBTarget', image):
+        self.target = target
+        self.image = image
+        self._stop_id = 1
+        self._unique_id = next(_process_ids)
+
+    def IsValid(self) -> bool:
+        return True
+
+    def GetTarget(self) -> 'SBTarget':
+        return self.target
+
+    def GetUniqueID(self) -> int:
+        return self._unique_id
+
+    def GetProcessID(self) -> int:
+        return 4242
+
+    def GetStopID(self, include_expression_stops: bool = False) -> int:
+        return self._stop_id
+
+    def Continue(self) -> SBError:
+        """Simulates a resume followed by the next stop."""
+        self._stop_id += 1
+        return SBError()
+
+    def GetAddressByteSize(self) -> int:
+        return 8
+
+    def GetByteOrder(self) -> int:
+        return eByteOrderLittle
+
+    def ReadMemory(self, address: int, size: int, error: SBError) -> Optional[bytes]:
+        counters['ReadMemory'] += 1
+        counters['ReadMemory bytes'] += size
+        data = self.image.read(address, size)
+        if data is None:
+            error.SetErrorString('memory read failed for {:#x}'.format(address))
+        return data
+
+    def ReadCStringFromMemory(self, address: int, max_size: int, error: SBError) -> Optional[str]:
+        counters['ReadCStringFromMemory'] += 1
+        data = self.image.read(address, 1)
+        if data is None:
+            error.SetErrorString('memory read failed for {:#x}'.format(address))
+            return None
+        data = self.image.read_available(address, max_size)
+        return data.split(b'\0', 1)[0][:max_size - 1].decode('utf-8', errors='replace')
+
+    def ReadPointerFromMemory(self, address: int, error: SBError) -> int:
+        counters['ReadPointerFromMemory'] += 1
+        data = self.image.read(address, 8)
+        if data is None:
+            error.SetErrorString('memory read failed for {:#x}'.format(address))
+            return 0
+        return struct.unpack('<Q', data)[0]
+
+    def ReadUnsignedFromMemory(self, address: int, size: int, error: SBError) -> int:
+        counters['ReadUnsignedFromMemory'] += 1
+        data = self.image.read(address, size)
+        if data is None:
+            error.SetErrorString('memory read failed for {:#x}'.format(address))
+            return 0
+        return int.from_bytes(data, 'little')
+
+
+class SBTarget:
+    eBroadcastBitModulesLoaded = 2
+    eBroadcastBitModulesUnloaded = 4
+
+    @staticmethod
+    def GetBroadcasterClassName() -> str:
+        return 'lldb.target'
+
+    def __init__(self, image):
+        self.debugger: Optional[SBDebugger] = None
+        self.launch(image)
+
+    def launch(self, image):
+        """Starts a new process, with the module loaded the way the given image lays it out."""
+        self.image = image
+        self.process = SBProcess(self, image)
+        self.module = SBModule(image)
+
+    def IsValid(self) -> bool:
+        return True
+
+    def GetProcess(self) -> SBProcess:
+        return self.process
+
+    def GetDebugger(self) -> 'SBDebugger':
+        return self.debugger
+
+    def GetAddressByteSize(self) -> int:
+        return 8
+
+    def GetByteOrder(self) -> int:
+        return eByteOrderLittle
+
+    def GetBasicType(self, basic: int) -> SBType:
+        return self.image.types.basic(basic)
+
+    def ResolveLoadAddress(self, address: int) -> SBAddress:
+        return SBAddress(address, self, self.image.slide)
+
+    def FindSymbols(self, name: str) -> SBSymbolContextList:
+        counters['FindSymbols'] += 1
+        address = self.image.symbols.get(name)
+        if address is None:
+            return SBSymbolContextList()
+        return SBSymbolContextList([SBSymbolContext(SBSymbol(name, address, self.image.slide))])
+
+    def CreateValueFromAddress(self, name: str, address: SBAddress, value_type: SBType) -> SBValue:
+        return SBValue(self.process, name, value_type, address=address.GetLoadAddress(self))
+
+    def CreateValueFromData(self, name: str, data: SBData, value_type: SBType) -> SBValue:
+        return SBValue(self.process, name, value_type, data=data.data)
+
+    def EvaluateExpression(self, expression: str, options=None) -> SBValue:
+        counters['EvaluateExpression'] += 1
+        return self.image.evaluate(self.process, expression.strip())
+
+
+class SBDebugger:
+    def __init__(self, *targets: SBTarget):
+        self._targets = targets
+        for target in targets:
+            target.debugger = self
+
+    def GetID(self) -> int:
+        return 1
+
+    def GetIndexOfTarget(self, target: SBTarget) -> int:
+        return self._targets.index(target)
+
+    def GetNumTargets(self) -> int:
+        return len(self._targets)
+
+    def GetTargetAtIndex(self, index: int) -> SBTarget:
+        return self._targets[index]
+
+    def GetSelectedTarget(self) -> SBTarget:
+        return self._targets[0]
+
+    def GetDummyTarget(self) -> SBTarget:
+        return self._targets[0]
+
+    def HandleCommand(self, command: str):
+        pass
+
+    def CreateCategory(self, name: str) -> '_Placeholder':
+        return _Placeholder()
+
+    def GetCategory(self, name: str) -> '_Placeholder':
+        return _Placeholder()
+
+    def GetInstanceName(self) -> str:
+        return 'benchmark'
+
+
+class SBEvent:
+    pass
+
+
+class SBListener:
+    """Never receives anything, the benchmark drives the cache the way the event listener would."""
+
+    def __init__(self, name: str = ''):
+        self.name = name
+
+    def StartListeningForEventClass(self, debugger: SBDebugger, broadcaster_class: str, mask: int) -> int:
+        return mask
+
+    def WaitForEvent(self, seconds: int, event: SBEvent) -> bool:
+        time.sleep(seconds)
+        return False
+
+
+class _Placeholder:
+    """Anything the formatters only reference at import time (type annotations, formatter registration)."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: _Placeholder()
+
+    @classmethod
+    def CreateWithFunctionName(cls, *args):
+        return cls()
+
+    @classmethod
+    def CreateWithClassName(cls, *args):
+        return cls()
+
+
+SBTypeNameSpecifier = _Placeholder
+SBTypeSummary = _Placeholder
+SBTypeSynthetic = _Placeholder
+
+
+def __getattr__(name: str):
+    if name.startswith('SB'):
+        return _Placeholder
+    if re.match('^e[A-Z]', name):
+        return 0
+    raise AttributeError(name)
@@ -0,0 +1,426 @@
+"""Synthetic Kotlin/Native heap image: TypeInfos, objects, strings, arrays and collections laid out the way the runtime
+lays them out on a 64-bit little-endian target, plus the handful of runtime functions the formatters call."""
+import itertools
+import re
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import fake_lldb
+from .fake_lldb import SBType, SBValue, basic_type
+
+BASE_ADDRESS = 0x100000000
+DEBUG_BUFFER_SIZE = 0x4000
+
+_image_ids = itertools.count(1)
+
+RT_OBJECT = 1
+RT_INT8 = 2
+RT_INT16 = 3
+RT_INT32 = 4
+RT_INT64 = 5
+RT_FLOAT32 = 6
+RT_FLOAT64 = 7
+RT_BOOLEAN = 9
+
+TF_INTERFACE = 1 << 2
+
+_RUNTIME_TYPE_SIZE = (-1, 8, 1, 2, 4, 8, 4, 8, 8, 1, 16)
+_RUNTIME_TYPE_ALIGNMENT = (-1, 8, 1, 2, 4, 8, 4, 8, 8, 1, 16)
+_RUNTIME_TYPE_FORMAT = {
+    RT_OBJECT: 'Q', RT_INT8: 'b', RT_INT16: 'h', RT_INT32: 'i', RT_INT64: 'q',
+    RT_FLOAT32: 'f', RT_FLOAT64: 'd', RT_BOOLEAN: '?',
+}
+
+
+class CTypes:
+    """The C declarations of `konan_debug.h`, with the natural alignment clang would give them."""
+
+    def __init__(self):
+        self._basic: Dict[int, SBType] = {}
+        void_pointer = self.basic(fake_lldb.eBasicTypeVoid).GetPointerType()
+        int32 = self.basic(fake_lldb.eBasicTypeInt)
+        uint32 = self.basic(fake_lldb.eBasicTypeUnsignedInt)
+
+        self.type_info = SBType('TypeInfo', 0, fields=[
+            ('typeInfo_', void_pointer),
+            ('extendedInfo_', void_pointer),
+            ('unused_', uint32),
+            ('instanceSize_', int32),
+            ('superType_', void_pointer),
+            ('objOffsets_', void_pointer),
+            ('objOffsetsCount_', int32),
+            ('implementedInterfaces_', void_pointer),
+            ('implementedInterfacesCount_', int32),
+            ('interfaceTableSize_', int32),
+            ('interfaceTable_', void_pointer),
+            ('packageName_', void_pointer),
+            ('relativeName_', void_pointer),
+            ('flags_', int32),
+            ('classId_', int32),
+            ('writableInfo_', void_pointer),
+            ('associatedObjects', void_pointer),
+            ('processObjectInMark', void_pointer),
+            ('instanceAlignment_', uint32),
+        ])
+        self.extended_type_info = SBType('ExtendedTypeInfo', 0, fields=[
+            ('fieldsCount_', int32),
+            ('fieldOffsets_', void_pointer),
+            ('fieldTypes_', void_pointer),
+            ('fieldNames_', void_pointer),
+            ('debugOperationsCount_', int32),
+            ('debugOperations_', void_pointer),
+        ])
+        self.obj_header = SBType('ObjHeader', 0, fields=[('typeInfoOrMeta_', self.type_info.GetPointerType())])
+        self.array_header = SBType('ArrayHeader', 0, fields=[
+            ('typeInfoOrMeta_', self.type_info.GetPointerType()),
+            ('count_', uint32),
+        ])
+        self.map_entry = SBType('MapEntry', 0, fields=[
+            ('key', self.obj_header.GetPointerType()),
+            ('value', self.obj_header.GetPointerType()),
+        ])
+        self.structs = {
+            'TypeInfo': self.type_info,
+            'ExtendedTypeInfo': self.extended_type_info,
+            'ObjHeader': self.obj_header,
+            'ArrayHeader': self.array_header,
+            'MapEntry': self.map_entry,
+        }
+
+    def basic(self, basic: int) -> SBType:
+        result = self._basic.get(basic)
+        if result is None:
+            result = basic_type(basic)
+            self._basic[basic] = result
+        return result
+
+
+class KotlinClass:
+    def __init__(
+            self,
+            type_info: int,
+            name: str,
+            instance_size: int,
+            fields: Dict[str, Tuple[int, int]],
+    ):
+        self.type_info = type_info
+        self.name = name
+        self.instance_size = instance_size
+        # name -> (offset, runtime type)
+        self.fields = fields
+
+
+class HeapImage:
+    def __init__(self, uuid: Optional[str] = None, slide: int = 0):
+        # Images are different builds of the module unless they are given the same UUID.
+        self.uuid = uuid or 'benchmark-{}'.format(next(_image_ids))
+        # Where the image is loaded relative to BASE_ADDRESS, i.e. the ASLR slide of this launch.
+        self.slide = slide
+        self.types = CTypes()
+        self.symbols: Dict[str, int] = {}
+        self.descriptions: Dict[int, str] = {}
+        self.classes: Dict[str, KotlinClass] = {}
+        self._object_classes: Dict[int, KotlinClass] = {}
+        self._type_name_strings: Dict[int, int] = {}
+        self._unnamed: List[Tuple[int, str, str]] = []
+        self._memory = bytearray(0x1000)
+
+        self.debug_buffer = self.alloc(DEBUG_BUFFER_SIZE)
+        self.runtime_type_size = self._int_array(_RUNTIME_TYPE_SIZE)
+        self.runtime_type_alignment = self._int_array(_RUNTIME_TYPE_ALIGNMENT)
+
+        self.any = self.define_class('kotlin', 'Any', super_type=None)
+        self.string = self.define_class('kotlin', 'String', instance_size=-2, element_type=RT_INT16)
+        self.array = self.define_class('kotlin', 'Array', instance_size=-8, element_type=RT_OBJECT)
+        self.byte_array = self.define_class('kotlin', 'ByteArray', instance_size=-1, element_type=RT_INT8)
+        self.char_array = self.define_class('kotlin', 'CharArray', instance_size=-2, element_type=RT_INT16)
+        self.int_array = self.define_class('kotlin', 'IntArray', instance_size=-4, element_type=RT_INT32)
+        self.double_array = self.define_class('kotlin', 'DoubleArray', instance_size=-8, element_type=RT_FLOAT64)
+        self.collection = self.define_class('kotlin.collections', 'Collection', flags=TF_INTERFACE)
+        self.list = self.define_class('kotlin.collections', 'List', flags=TF_INTERFACE)
+        self.map = self.define_class('kotlin.collections', 'Map', flags=TF_INTERFACE)
+        self.array_list = self.define_class(
+            'kotlin.collections', 'ArrayList',
+            fields=[('backing', RT_OBJECT), ('offset', RT_INT32), ('length', RT_INT32), ('isReadOnly', RT_BOOLEAN)],
+            interfaces=[self.list, self.collection],
+        )
+        self.hash_map = self.define_class(
+            'kotlin.collections', 'HashMap',
+            fields=[
+                ('keysArray', RT_OBJECT), ('valuesArray', RT_OBJECT), ('presenceArray', RT_OBJECT),
+                ('hashArray', RT_OBJECT), ('maxProbeDistance', RT_INT32), ('length', RT_INT32),
+            ],
+            interfaces=[self.map],
+        )
+
+    # Memory
+
+    def alloc(self, size: int, alignment: int = 8) -> int:
+        offset = (len(self._memory) + alignment - 1) & ~(alignment - 1)
+        self._memory.extend(bytes(offset + max(size, 1) - len(self._memory)))
+        return self.base_address + offset
+
+    def write(self, address: int, data: bytes):
+        offset = address - self.base_address
+        self._memory[offset:offset + len(data)] = data
+
+    def write_format(self, address: int, value_format: str, value):
+        self.write(address, struct.pack('<' + value_format, value))
+
+    def read(self, address: int, size: int) -> Optional[bytes]:
+        offset = address - self.base_address
+        if offset < 0x1000 or size < 0 or offset + size > len(self._memory):
+            return None
+        return bytes(self._memory[offset:offset + size])
+
+    def read_available(self, address: int, size: int) -> bytes:
+        offset = address - self.base_address
+        return bytes(self._memory[offset:offset + size])
+
+    @property
+    def base_address(self) -> int:
+        return BASE_ADDRESS + self.slide
+
+    def size(self) -> int:
+        return len(self._memory)
+
+    def _write_struct(self, struct_type: SBType, address: int, **values):
+        for name, value in values.items():
+            member = struct_type.member(name)
+            self.write_format(address + member.byte_offset, member.type.scalar_format(), value)
+
+    def _int_array(self, values: Sequence[int]) -> int:
+        address = self.alloc(4 * len(values))
+        self.write(address, struct.pack('<{}i'.format(len(values)), *values))
+        return address
+
+    def _cstring(self, text: str) -> int:
+        data = text.encode('utf-8') + b'\0'
+        address = self.alloc(len(data), 1)
+        self.write(address, data)
+        return address
+
+    # Classes
+
+    def define_class(
+            self,
+            package: str,
+            name: str,
+            fields: Sequence[Tuple[str, int]] = (),
+            super_type: Optional[KotlinClass] = ...,
+            interfaces: Sequence[KotlinClass] = (),
+            flags: int = 0,
+            instance_size: Optional[int] = None,
+            element_type: Optional[int] = None,
+    ) -> KotlinClass:
+        if super_type is ...:
+            super_type = self.any
+        qualified_name = '{}.{}'.format(package, name)
+        type_info = self.alloc(self.types.type_info.GetByteSize())
+        inherited = dict(super_type.fields) if super_type is not None and super_type.instance_size > 0 else {}
+        offset = max([8] + [field_offset + _RUNTIME_TYPE_SIZE[rt] for field_offset, rt in inherited.values()])
+        all_fields = dict(inherited)
+        for field_name, rt in fields:
+            alignment = _RUNTIME_TYPE_ALIGNMENT[rt]
+            offset = (offset + alignment - 1) & ~(alignment - 1)
+            all_fields[field_name] = (offset, rt)
+            offset += _RUNTIME_TYPE_SIZE[rt]
+        if instance_size is None:
+            instance_size = (offset + 7) & ~7
+
+        # Like the compiler, only arrays and classes with fields get an ExtendedTypeInfo.
+        extended_info = 0
+        if element_type is not None:
+            extended_info = self.alloc(self.types.extended_type_info.GetByteSize())
+            self._write_struct(self.types.extended_type_info, extended_info, fieldsCount_=-element_type)
+        elif all_fields:
+            names = list(all_fields)
+            offsets = self._int_array([all_fields[field][0] for field in names])
+            field_types = self.alloc(len(names), 1)
+            self.write(field_types, bytes(all_fields[field][1] for field in names))
+            name_pointers = self.alloc(8 * len(names))
+            self.write(name_pointers, struct.pack('<{}Q'.format(len(names)), *map(self._cstring, names)))
+            extended_info = self.alloc(self.types.extended_type_info.GetByteSize())
+            self._write_struct(
+                self.types.extended_type_info, extended_info,
+                fieldsCount_=len(names), fieldOffsets_=offsets, fieldTypes_=field_types, fieldNames_=name_pointers,
+            )
+
+        interface_pointers = 0
+        if interfaces:
+            interface_pointers = self.alloc(8 * len(interfaces))
+            self.write(interface_pointers, struct.pack(
+                '<{}Q'.format(len(interfaces)), *(interface.type_info for interface in interfaces)
+            ))
+
+        result = KotlinClass(type_info, qualified_name, instance_size, all_fields)
+        self.classes[qualified_name] = result
+        self.symbols['kclass:' + qualified_name] = type_info
+        self._type_name_strings[type_info] = self._cstring(qualified_name)
+
+        self._write_struct(
+            self.types.type_info, type_info,
+            typeInfo_=type_info,
+            extendedInfo_=extended_info,
+            instanceSize_=instance_size,
+            superType_=0 if super_type is None else super_type.type_info,
+            implementedInterfaces_=interface_pointers,
+            implementedInterfacesCount_=len(interfaces),
+            flags_=flags,
+        )
+        self._unnamed.append((type_info, package, name))
+        # Names are String objects themselves, so they can only be written once String is defined.
+        if hasattr(self, 'string'):
+            for unnamed_type_info, unnamed_package, unnamed_name in self._unnamed:
+                self._write_struct(
+                    self.types.type_info, unnamed_type_info,
+                    packageName_=self.new_string(unnamed_package), relativeName_=self.new_string(unnamed_name),
+                )
+            self._unnamed.clear()
+        return result
+
+    # Objects
+
+    def new_object(self, cls: KotlinClass, description: Optional[str] = None, **fields) -> int:
+        address = self.alloc(cls.instance_size)
+        self.write_format(address, 'Q', cls.type_info)
+        for name, value in fields.items():
+            offset, rt = cls.fields[name]
+            self.write_format(address + offset, _RUNTIME_TYPE_FORMAT[rt], value)
+        self._object_classes[address] = cls
+        self.descriptions[address] = description or '{}@{:x}'.format(cls.name.rsplit('.', 1)[-1], address & 0xFFFFFF)
+        return address
+
+    def new_array(self, cls: KotlinClass, elements: Sequence, element_type: int, description: Optional[str] = None):
+        size = _RUNTIME_TYPE_SIZE[element_type]
+        data_offset = (self.types.array_header.GetByteSize() + size - 1) & ~(size - 1)
+        address = self.alloc(data_offset + size * len(elements))
+        self.write_format(address, 'Q', cls.type_info)
+        self.write_format(address + 8, 'I', len(elements))
+        if elements:
+            self.write(address + data_offset, struct.pack(
+                '<{}{}'.format(len(elements), _RUNTIME_TYPE_FORMAT[element_type]), *elements
+            ))
+        self._object_classes[address] = cls
+        self.descriptions[address] = description or '[{}]'.format(', '.join(
+            self.descriptions.get(element, 'null') if element_type == RT_OBJECT else str(element)
+            for element in elements[:16]
+        ))
+        return address
+
+    def new_string(self, text: str) -> int:
+        encoded = text.encode('utf-16-le')
+        return self.new_array(self.string, struct.unpack('<{}h'.format(len(encoded) // 2), encoded), RT_INT16, text)
+
+    def new_list(self, elements: Sequence[int], capacity: Optional[int] = None) -> int:
+        capacity = len(elements) if capacity is None else capacity
+        backing = self.new_array(self.array, list(elements) + [0] * (capacity - len(elements)), RT_OBJECT)
+        return self.new_object(
+            self.array_list,
+            '[{}]'.format(', '.join(self.descriptions.get(element, 'null') for element in elements[:16])),
+            backing=backing, length=len(elements),
+        )
+
+    def new_map(self, entries: Sequence[Tuple[int, int]]) -> int:
+        keys = self.new_array(self.array, [key for key, _ in entries], RT_OBJECT)
+        values = self.new_array(self.array, [value for _, value in entries], RT_OBJECT)
+        return self.new_object(
+            self.hash_map,
+            '{{{}}}'.format(', '.join(
+                '{}={}'.format(self.descriptions.get(key), self.descriptions.get(value)) for key, value in entries[:16]
+            )),
+            keysArray=keys, valuesArray=values, length=len(entries),
+        )
+
+    # Runtime functions, reachable through expressions
+
+    def evaluate(self, process, expression: str) -> SBValue:
+        int_type = self.types.basic(fake_lldb.eBasicTypeInt)
+
+        def int_value(result: int) -> SBValue:
+            return SBValue(process, None, int_type, data=struct.pack('<i', result))
+
+        def pointer_value(pointer_type: SBType, result: int) -> SBValue:
+            return SBValue(process, None, pointer_type, data=struct.pack('<Q', result))
+
+        if expression.startswith('#include'):
+            return SBValue(process, None, self.types.basic(fake_lldb.eBasicTypeVoid), data=b'')
+
+        match = re.fullmatch(r'\((\w+)\s*\*\)0x0', expression)
+        if match and match.group(1) in self.types.structs:
+            return pointer_value(self.types.structs[match.group(1)].GetPointerType(), 0)
+
+        if expression in ('runtimeTypeSize', 'runtimeTypeAlignment'):
+            address = self.runtime_type_size if expression == 'runtimeTypeSize' else self.runtime_type_alignment
+            return SBValue(process, expression, fake_lldb.array_type(int_type, 11), address=address)
+
+        if expression.endswith('Konan_DebugBuffer()'):
+            return pointer_value(self.types.basic(fake_lldb.eBasicTypeVoid).GetPointerType(), self.debug_buffer)
+
+        if expression.endswith('Konan_DebugBufferSize()'):
+            return int_value(DEBUG_BUFFER_SIZE)
+
+        match = re.search(r'Konan_DebugGetTypeName\((0x[0-9a-f]+)\)', expression)
+        if match:
+            char_pointer = self.types.basic(fake_lldb.eBasicTypeChar).GetPointerType()
+            return pointer_value(char_pointer, self._type_name(int(match.group(1), 16)))
+
+        match = re.search(
+            r'Konan_DebugObjectToUtf8Array\(\(__konan_safe_void_t\*\)(0x[0-9a-f]+), '
+            r'\(__konan_safe_void_t \*\)(0x[0-9a-f]+), (\d+)\)',
+            expression,
+        )
+        if match:
+            data = self._object_to_utf8(int(match.group(1), 16), int(match.group(3)))
+            self.write(int(match.group(2), 16), data)
+            return int_value(len(data))
+
+        if '__objects[] = {' in expression:
+            long_long_type = self.types.basic(fake_lldb.eBasicTypeLongLong)
+            return SBValue(process, None, long_long_type, data=struct.pack('<q', self._describe_objects(expression)))
+
+        return SBValue(process, None, int_type, error='unsupported expression: {}'.format(expression[:80]))
+
+    def _type_name(self, obj_address: int) -> int:
+        cls = self._object_classes.get(obj_address)
+        return 0 if cls is None else self._type_name_strings[cls.type_info]
+
+    def _object_to_utf8(self, obj_address: int, size: int) -> bytes:
+        if size <= 0:
+            return b''
+        description = self.descriptions.get(obj_address, '').encode('utf-8')[:size - 1]
+        return description + b'\0'
+
+    def _describe_objects(self, expression: str) -> int:
+        """Mirrors the loop of `_DESCRIBE_OBJECTS_EXPRESSION`, bytes used and objects written packed the same way."""
+        objects = [int(address, 16) for address in re.findall(
+            r'0x[0-9a-f]+', re.search(r'__objects\[\] = \{(.*?)\};', expression).group(1)
+        )]
+        size = int(re.search(r'__results\[(\d+)\]', expression).group(1))
+        min_description = int(re.search(r'__name_length \+ (\d+) >', expression).group(1))
+        max_description = int(re.search(r'if \(__available > (\d+)\)', expression).group(1))
+        buffer = int(re.search(r'\(\(__konan_safe_char_t \*\)(0x[0-9a-f]+)\)', expression).group(1), 16)
+
+        results = bytearray()
+        written = 0
+        for obj in objects:
+            name_address = self._type_name(obj)
+            name = b'' if name_address == 0 else self.read_available(name_address, 0x1000).split(b'\0', 1)[0]
+            name = name[:max(0, size - len(results) - 8)]
+            if len(results) + 8 + len(name) + min_description > size:
+                break
+            results += struct.pack('<i', len(name)) + name
+            available = min(size - len(results) - 4, max_description)
+            description = self._object_to_utf8(obj, available)
+            results += struct.pack('<i', len(description)) + description
+            written += 1
+        self.write(buffer, bytes(results))
+        return len(results) << 32 | written
+
+
+def as_root(process, image: HeapImage, name: str, address: int, frame: Optional[fake_lldb.SBFrame] = None) -> SBValue:
+    """A local variable of type `ObjHeader *` pointing at the given object."""
+    return SBValue(
+        process, name, image.types.obj_header.GetPointerType(), data=struct.pack('<Q', address), frame=frame,
+    )
+
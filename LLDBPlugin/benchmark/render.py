@@ -0,0 +1,66 @@
+"""Drives the formatters the way Xcode's variables view and `frame variable --ptr-depth N` do."""
+import inspect
+from typing import List
+
+from touchlab_kotlin_lldb.types.proxy import KonanProxyTypeProvider
+from touchlab_kotlin_lldb.types.summary import kotlin_object_type_summary
+
+from . import fake_lldb
+
+# Xcode asks for the summary of a row more than once while laying out the view.
+SUMMARY_CALLS_PER_VALUE = 2
+# Default of `target.max-children-count`.
+MAX_CHILDREN = 256
+
+
+def _is_kotlin_object(value: fake_lldb.SBValue) -> bool:
+    value_type = value.GetType()
+    return value_type.IsPointerType() and value_type.GetPointeeType().GetName() in ('ObjHeader', 'ArrayHeader')
+
+
+def _provider_call(provider: KonanProxyTypeProvider, name: str, *args):
+    # The proxy swallows the first attribute lookup of an uninitialized object, the same way it does under LLDB.
+    method = getattr(provider, name) or getattr(provider, name)
+    return method(*args)
+
+
+def _num_children(provider: KonanProxyTypeProvider) -> int:
+    method = getattr(provider, 'num_children') or getattr(provider, 'num_children')
+    # Same as LLDB, which passes the maximum to any `num_children` whose signature takes a positional argument.
+    takes_max = any(
+        parameter.kind in (
+            inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.VAR_POSITIONAL,
+        )
+        for parameter in inspect.signature(method).parameters.values()
+    )
+    return method(MAX_CHILDREN) if takes_max else method()
+
+
+def render(value: fake_lldb.SBValue, max_depth: int, lines: List[str], depth: int = 0):
+    """Renders `value` and its children down to `max_depth` pointer levels, appending one line per row."""
+    indent = '  ' * depth
+    if _is_kotlin_object(value):
+        summary = None
+        for _ in range(SUMMARY_CALLS_PER_VALUE):
+            summary = kotlin_object_type_summary(value, {})
+
+        provider = KonanProxyTypeProvider(value, {})
+        _provider_call(provider, 'update')
+        # Shown in the type column, same as `frame variable -T`.
+        getter = getattr(provider, 'get_type_name', None) or getattr(provider, 'get_type_name', None)
+        type_name = getter() if callable(getter) else None
+        lines.append('{}({}) {} = {}'.format(indent, type_name or value.GetType().GetName(), value.GetName(), summary))
+        if depth >= max_depth:
+            return
+
+        count = _num_children(provider)
+        for index in range(min(count, MAX_CHILDREN)):
+            child = _provider_call(provider, 'get_child_at_index', index)
+            if child is not None:
+                render(child, max_depth, lines, depth + 1)
+    elif value.GetType().GetNumberOfFields() > 0:
+        lines.append('{}{}'.format(indent, value.GetName()))
+        for index in range(value.GetNumChildren()):
+            render(value.GetChildAtIndex(index), max_depth, lines, depth + 1)
+    else:
+        lines.append('{}{} = {}'.format(indent, value.GetName(), value.GetValue()))
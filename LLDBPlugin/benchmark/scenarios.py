@@ -0,0 +1,114 @@
+"""Heap shapes the benchmark renders, each one stressing a different provider."""
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .heap import HeapImage, RT_BOOLEAN, RT_FLOAT64, RT_INT8, RT_INT32, RT_OBJECT
+
+Roots = List[Tuple[str, int]]
+
+
+class Scenario(NamedTuple):
+    name: str
+    build: Callable[[HeapImage], Roots]
+    # Same meaning as `frame variable --ptr-depth`.
+    ptr_depth: int
+    # Number of stops the same variables are rendered at.
+    stops: int = 3
+    # Number of launches of the same build, each one with the module loaded at a different address.
+    launches: int = 1
+    # Whether every launch starts a new LLDB session, instead of reusing it between runs the way Xcode does.
+    new_sessions: bool = False
+    # Builds of the processes debugged alongside, e.g. an app extension, their variables are shown at every stop too.
+    other_targets: Tuple[Callable[[HeapImage], Roots], ...] = ()
+    # Overrides the number of elements shown before the range nodes of large collections.
+    children_page_size: Optional[int] = None
+
+
+def _strings(image: HeapImage) -> Roots:
+    roots = [('s{}'.format(i), image.new_string('value {} '.format(i) * (i % 50 + 1))) for i in range(100)]
+    roots.append(('huge', image.new_string('0123456789abcdef' * 0x4000)))
+    roots.append(('unicode', image.new_string('Kotlin ❤ \U0001F680 ' * 32)))
+    return roots
+
+
+def _objects(image: HeapImage) -> Roots:
+    foo = image.define_class('demo', 'Foo', fields=[
+        ('id', RT_INT32), ('name', RT_OBJECT), ('score', RT_FLOAT64), ('active', RT_BOOLEAN), ('tag', RT_INT8),
+    ])
+    holder = image.define_class('demo', 'Holder', fields=[('foo', RT_OBJECT), ('label', RT_OBJECT)])
+    roots = []
+    for i in range(200):
+        name = image.new_string('foo #{}'.format(i))
+        obj = image.new_object(foo, id=i, name=name, score=i / 3, active=i % 2 == 0, tag=i % 100)
+        roots.append(('holder{}'.format(i), image.new_object(holder, foo=obj, label=image.new_string('h{}'.format(i)))))
+    return roots
+
+
+def _arrays(image: HeapImage) -> Roots:
+    return [
+        ('ints', image.new_array(image.int_array, list(range(100_000)), RT_INT32)),
+        ('bytes', image.new_array(image.byte_array, [i % 128 for i in range(1_000_000)], RT_INT8)),
+        ('doubles', image.new_array(image.double_array, [i * 0.5 for i in range(1_000)], RT_FLOAT64)),
+        ('names', image.new_array(image.array, [image.new_string('n{}'.format(i)) for i in range(2_000)], RT_OBJECT)),
+    ]
+
+
+def _collections(image: HeapImage) -> Roots:
+    point = image.define_class('demo', 'Point', fields=[('x', RT_INT32), ('y', RT_INT32)])
+    strings = [image.new_string('item {}'.format(i)) for i in range(1_000)]
+    entries = [
+        (image.new_string('key {}'.format(i)), image.new_object(point, x=i, y=-i, description='Point({}, {})'.format(i, -i)))
+        for i in range(500)
+    ]
+    return [
+        ('list', image.new_list(strings, capacity=1_500)),
+        ('map', image.new_map(entries)),
+        ('empty', image.new_list([])),
+    ]
+
+
+def _deep_graph(image: HeapImage) -> Roots:
+    node = image.define_class('demo', 'Node', fields=[
+        ('left', RT_OBJECT), ('right', RT_OBJECT), ('value', RT_INT32), ('label', RT_OBJECT),
+    ])
+
+    def tree(depth: int, value: int) -> int:
+        if depth == 0:
+            return 0
+        return image.new_object(
+            node,
+            left=tree(depth - 1, value * 2),
+            right=tree(depth - 1, value * 2 + 1),
+            value=value,
+            label=image.new_string('node {}'.format(value)),
+        )
+
+    return [('root', tree(9, 1))]
+
+
+def _large_collections(image: HeapImage) -> Roots:
+    strings = [image.new_string('item {}'.format(i)) for i in range(20_000)]
+    entries = [(image.new_string('key {}'.format(i)), image.new_string('value {}'.format(i))) for i in range(5_000)]
+    return [
+        ('bytes', image.new_array(image.byte_array, [i % 128 for i in range(100_000)], RT_INT8)),
+        ('list', image.new_list(strings)),
+        ('map', image.new_map(entries)),
+    ]
+
+
+def _relaunch(image: HeapImage) -> Roots:
+    return _objects(image) + _collections(image)
+
+
+SCENARIOS = [
+    Scenario('strings', _strings, ptr_depth=1),
+    Scenario('objects', _objects, ptr_depth=2),
+    Scenario('arrays', _arrays, ptr_depth=1),
+    Scenario('collections', _collections, ptr_depth=2),
+    Scenario('deep_graph', _deep_graph, ptr_depth=16),
+    # Small pages, so the range nodes of each level get expanded too.
+    Scenario('paged', _large_collections, ptr_depth=2, stops=2, children_page_size=100),
+    Scenario('relaunch', _relaunch, ptr_depth=2, stops=2, launches=3),
+    Scenario('new_sessions', _relaunch, ptr_depth=2, stops=2, launches=3, new_sessions=True),
+    # Both processes load their module at the same address, so their TypeInfos and objects share addresses.
+    Scenario('two_targets', _objects, ptr_depth=2, launches=2, other_targets=(_collections,)),
+]
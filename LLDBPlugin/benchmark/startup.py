@@ -0,0 +1,42 @@
+"""Startup of the plugin in a fresh interpreter, `python -m benchmark.startup` prints it as JSON.
+
+The plugin has to be imported after `benchmark` put the stand-in `lldb` module in place, and in a process that never
+imported it before, or the measurement would leave out the imports."""
+import json
+import pathlib
+import subprocess
+import sys
+from typing import Dict
+
+# Modules of the plugin imported at startup, anything beyond them should only be imported once Kotlin shows up.
+PLUGIN_PACKAGE = 'touchlab_kotlin_lldb'
+
+
+def measure_startup() -> Dict:
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmark.startup'],
+        cwd=pathlib.Path(__file__).parent.parent,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    from . import fake_lldb
+
+    import touchlab_kotlin_lldb
+    from touchlab_kotlin_lldb.util import perf
+
+    touchlab_kotlin_lldb.__lldb_init_module(fake_lldb.SBDebugger(), {})
+    print(json.dumps({
+        'wall_time': round(perf.startup_seconds(), 4),
+        'modules': sorted(
+            name for name in sys.modules if name == PLUGIN_PACKAGE or name.startswith(PLUGIN_PACKAGE + '.')
+        ),
+    }))
+
+
+if __name__ == '__main__':
+    main()
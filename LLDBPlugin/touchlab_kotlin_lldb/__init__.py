@@ -1,135 +1,111 @@
-import os
-from typing import Optional
+import time
 
-import lldb
+_import_started = time.perf_counter()
 
-from .stepping.KonanHook import KonanHook
-from .types.base import KOTLIN_CATEGORY, KOTLIN_OBJ_HEADER_TYPE, KOTLIN_ARRAY_HEADER_TYPE
-from .util.log import log
-from .commands import FieldTypeCommand, SymbolByNameCommand, TypeByAddressCommand, GCCollectCommand
+import importlib
+import os
+from typing import Callable, Dict
 
-from .types.summary import kotlin_object_type_summary, kotlin_objc_class_summary
-from .types.proxy import KonanProxyTypeProvider, KonanObjcProxyTypeProvider
+import lldb
 
 from .cache import LLDBCache
+from .cache.events import start_cache_event_listener
+from .types import kotlin_modules
+from .util import perf
+from .util.log import WARNING, log
 
 os.environ['CLIENT_TYPE'] = 'Xcode'
 
-KONAN_INIT_PREFIX = '_Konan_init_'
-KONAN_INIT_MODULE_NAME = '[0-9a-zA-Z_]+'
-KONAN_INIT_SUFFIX = '_kexe'
+# Everything LLDB looks up by name in this package, imported the first time LLDB asks for it. Only Kotlin debug
+# sessions ever need the formatters.
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    'kotlin_object_type_summary': '.types.summary',
+    'kotlin_objc_class_summary': '.types.summary',
+    'KonanProxyTypeProvider': '.types.proxy',
+    'KonanObjcProxyTypeProvider': '.types.proxy',
+    'is_kotlin_objc_type': '.types.kotlin_modules',
+    'KonanHook': '.stepping.KonanHook',
+}
+
+# Commands by program name, with the class implementing them, imported the first time the command runs.
+_COMMANDS: Dict[str, str] = {
+    'field_type': 'FieldTypeCommand',
+    'symbol_by_name': 'SymbolByNameCommand',
+    'type_by_address': 'TypeByAddressCommand',
+    'konan_globals': 'KonanGlobalsCommand',
+    'force_gc': 'GCCollectCommand',
+    'kotlin_perf': 'KotlinPerfCommand',
+    'kotlin_log': 'KotlinLogCommand',
+    'kotlin_string': 'KotlinStringCommand',
+}
+_command_instances: Dict[str, object] = {}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 def __lldb_init_module(debugger: lldb.SBDebugger, _):
+    perf.record_startup('import', time.perf_counter() - _import_started)
     log(lambda: "init start")
+    started = time.perf_counter()
 
     reset_cache()
+    start_cache_event_listener(debugger)
+    # Registered up front, by name only, so core files and `target variable` before launch are formatted too. The
+    # formatters themselves are imported the first time LLDB calls them, see `__getattr__`.
     configure_types(debugger)
+    configure_objc_types(debugger)
     register_commands(debugger)
     register_hooks(debugger)
+    kotlin_modules.scan_loaded_modules(debugger)
 
-    configure_objc_types_init(debugger)
-
-    log(lambda: "init end")
+    perf.record_startup('init', time.perf_counter() - started)
+    log(lambda: "init end\n{}".format(perf.format_startup()))
+    if perf.startup_seconds() > perf.STARTUP_BUDGET_SECONDS:
+        log(lambda: "Startup over budget:\n{}".format(perf.format_startup()), WARNING)
 
 
 def reset_cache():
-    """Xcode reuses LLDB between program runs, so we need to clear any symbol references we made as they are no
-    longer valid."""
+    """Starts from an empty cache, it then follows the targets and processes through the cache event listener."""
     LLDBCache.reset()
 
 
-def configure_objc_types_init(debugger: lldb.SBDebugger):
-    target = debugger.GetDummyTarget()
-    breakpoint = target.BreakpointCreateByRegex(
-        "^{}({})({})?$".format(KONAN_INIT_PREFIX, KONAN_INIT_MODULE_NAME, KONAN_INIT_SUFFIX)
+def configure_objc_types(debugger: lldb.SBDebugger):
+    # Kotlin modules are discovered from the module load events, see `register_loaded_kotlin_modules`.
+    kotlin_modules.configure_objc_types(
+        debugger,
+        matcher_name='{}.is_kotlin_objc_type'.format(__name__),
+        summary_name='{}.kotlin_objc_class_summary'.format(__name__),
+        synthetic_name='{}.KonanObjcProxyTypeProvider'.format(__name__),
     )
-    breakpoint.SetOneShot(True)
-    breakpoint.SetAutoContinue(True)
-    breakpoint.SetScriptCallbackFunction('{}.{}'.format(__name__, configure_objc_types_breakpoint.__name__))
-
-
-def configure_objc_types_breakpoint(frame: lldb.SBFrame, bp_loc: lldb.SBBreakpointLocation, internal_dict):
-    process = frame.thread.process
-    target = process.target
-
-    symbols = target.FindSymbols('_OBJC_CLASS_RO_$_KotlinBase')
-
-    base_class_name: Optional[str] = None
-    for symbol_context in symbols:
-        error = lldb.SBError()
-        name_addr = process.ReadPointerFromMemory(symbol_context.symbol.addr.GetLoadAddress(target) + 6 * 4, error)
-        # TODO: Log error?
-        if not error.success:
-            continue
-        base_class_name = process.ReadCStringFromMemory(name_addr, 128, error)
-        # TODO: Log error?
-        if not error.success:
-            continue
-
-        break
-
-    module_name = frame.symbol.name.removeprefix(KONAN_INIT_PREFIX).removesuffix(KONAN_INIT_SUFFIX)
-    if module_name == "stdlib":
-        return False
-
-    specifiers_to_register = [
-        lldb.SBTypeNameSpecifier(
-            '^{}\\.'.format(module_name),
-            lldb.eMatchTypeRegex,
-        ),
-    ]
-
-    if base_class_name is not None:
-        objc_class_prefix = base_class_name.removesuffix("Base")
-        specifiers_to_register.append(
-            lldb.SBTypeNameSpecifier(
-                '^{}'.format(objc_class_prefix),
-                lldb.eMatchTypeRegex,
-            )
-        )
-
-    category = target.debugger.GetCategory(KOTLIN_CATEGORY)
-
-    for type_specifier in specifiers_to_register:
-        category.AddTypeSummary(
-            type_specifier,
-            lldb.SBTypeSummary.CreateWithFunctionName(
-                '{}.{}'.format(__name__, kotlin_objc_class_summary.__name__),
-                lldb.eTypeOptionHideValue,
-            )
-        )
-        category.AddTypeSynthetic(
-            type_specifier,
-            lldb.SBTypeSynthetic.CreateWithClassName(
-                '{}.{}'.format(__name__, KonanObjcProxyTypeProvider.__name__),
-            )
-        )
-
-    bp_loc.GetBreakpoint().SetEnabled(False)
-
-    return False
 
 
 def configure_types(debugger: lldb.SBDebugger):
-    category = debugger.CreateCategory(KOTLIN_CATEGORY)
+    category = debugger.CreateCategory(kotlin_modules.KOTLIN_CATEGORY)
 
     types_to_register = [
-        KOTLIN_OBJ_HEADER_TYPE,
-        KOTLIN_ARRAY_HEADER_TYPE,
+        kotlin_modules.KOTLIN_OBJ_HEADER_TYPE,
+        kotlin_modules.KOTLIN_ARRAY_HEADER_TYPE,
     ]
 
     for type_to_register in types_to_register:
         category.AddTypeSummary(
             type_to_register,
             lldb.SBTypeSummary.CreateWithFunctionName(
-                '{}.{}'.format(__name__, kotlin_object_type_summary.__name__),
+                '{}.kotlin_object_type_summary'.format(__name__),
                 lldb.eTypeOptionHideValue
             )
         )
         category.AddTypeSynthetic(
             type_to_register,
             lldb.SBTypeSynthetic.CreateWithClassName(
-                '{}.{}'.format(__name__, KonanProxyTypeProvider.__name__),
+                '{}.KonanProxyTypeProvider'.format(__name__),
             )
         )
 
@@ -137,17 +113,27 @@ def configure_types(debugger: lldb.SBDebugger):
 
 
 def register_commands(debugger: lldb.SBDebugger):
-    commands_to_register = [
-        FieldTypeCommand,
-        SymbolByNameCommand,
-        TypeByAddressCommand,
-        GCCollectCommand,
-    ]
+    for program in _COMMANDS:
+        function_name = _command_function_name(program)
+        globals()[function_name] = _lazy_command(program)
+        debugger.HandleCommand('command script add -f {}.{} {}'.format(__name__, function_name, program))
 
-    for command in commands_to_register:
-        debugger.HandleCommand(
-            'command script add -c {}.{} {}'.format(__name__, command.__name__, command.program)
-        )
+
+def _command_function_name(program: str) -> str:
+    return '_run_{}'.format(program)
+
+
+def _lazy_command(program: str) -> Callable:
+    def run(debugger: lldb.SBDebugger, command, exe_ctx: lldb.SBExecutionContext, result, internal_dict):
+        instance = _command_instances.get(program)
+        if instance is None:
+            command_class = getattr(importlib.import_module('.commands', __name__), _COMMANDS[program])
+            instance = perf.call_timed('command.{}.load'.format(program), command_class, debugger, internal_dict)
+            _command_instances[program] = instance
+        instance(debugger, command, exe_ctx, result)
+
+    run.__name__ = _command_function_name(program)
+    return run
 
 
 def register_hooks(debugger: lldb.SBDebugger):
@@ -155,8 +141,27 @@ def register_hooks(debugger: lldb.SBDebugger):
     debugger.HandleCommand('settings set target.process.thread.step-avoid-regexp ^::Kotlin_')
 
     hooks_to_register = [
-        KonanHook,
+        DeferredStopHook,
     ]
 
     for hook in hooks_to_register:
         debugger.HandleCommand('target stop-hook add -P {}.{}'.format(__name__, hook.__name__))
+
+
+class DeferredStopHook:
+    """Stands in for `KonanHook` until a Kotlin module is loaded, sessions without Kotlin never import the stepping."""
+
+    def __init__(self, target: lldb.SBTarget, extra_args, internal_dict):
+        self._target = target
+        self._extra_args = extra_args
+        self._internal_dict = internal_dict
+        self._hook = None
+
+    def handle_stop(self, execution_context: lldb.SBExecutionContext, stream: lldb.SBStream) -> bool:
+        if self._hook is None:
+            if not kotlin_modules.kotlin_modules_loaded():
+                return True
+            # Imported here, only Kotlin debug sessions step through Kotlin code.
+            from .stepping.KonanHook import KonanHook
+            self._hook = KonanHook(self._target, self._extra_args, self._internal_dict)
+        return self._hook.handle_stop(execution_context, stream)
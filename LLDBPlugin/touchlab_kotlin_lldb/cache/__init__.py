@@ -1,30 +1,176 @@
-from typing import Optional
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Set, Tuple
 
 import lldb
 
-__lldb_cache_instance: 'LLDBCache'
+TargetKey = Tuple[int, int]
+
+# One cache per target, so debugging several processes at once neither thrashes nor mixes up their addresses.
+_partitions: Dict[TargetKey, 'LLDBCache'] = {}
+# The partition of the target whose values are being formatted, see `target_cache`.
+_current: 'LLDBCache'
+# Types stored by module UUID and file address hold for every target that loads the same build.
+_module_types: Dict[str, 'ModuleTypes'] = {}
+
+# Invalidations requested from the event listener thread, applied by whichever thread uses the cache next so the
+# formatters never see it change halfway through.
+pending_invalidations: Deque[Tuple[TargetKey, Callable[['LLDBCache'], None]]] = deque()
+
+
+def target_key(target: lldb.SBTarget) -> TargetKey:
+    debugger = target.GetDebugger()
+    return debugger.GetID(), debugger.GetIndexOfTarget(target)
 
 
 class LLDBCache:
     @classmethod
     def reset(cls):
-        global __lldb_cache_instance
-        __lldb_cache_instance = LLDBCache()
+        global _current
+        pending_invalidations.clear()
+        _partitions.clear()
+        _module_types.clear()
+        _current = LLDBCache(None)
 
     @classmethod
-    def instance(cls):
-        global __lldb_cache_instance
-        return __lldb_cache_instance
+    def instance(cls) -> 'LLDBCache':
+        while pending_invalidations:
+            key, invalidation = pending_invalidations.popleft()
+            partition = _partitions.get(key)
+            if partition is not None:
+                invalidation(partition)
+        return _current
+
+    @classmethod
+    def partitions(cls) -> Iterable['LLDBCache']:
+        return list(_partitions.values())
+
+    def __init__(self, target: Optional[lldb.SBTarget]):
+        # Expressions are evaluated in this target, the selected one when the cache isn't bound to any.
+        self._target = target
+
+        # Target scope: types declared through expressions, valid for as long as the target lives.
+        self._helper_types_declared: bool = False
+        self._type_info_type: Optional[lldb.SBType] = None
+        self._obj_header_type: Optional[lldb.SBType] = None
+        self._array_header_type: Optional[lldb.SBType] = None
+        self._map_entry_type: Optional[lldb.SBType] = None
+        self._extended_type_info_type: Optional[lldb.SBType] = None
+        self._type_info_struct: Optional['StructLayout'] = None
+        self._extended_type_info_struct: Optional['StructLayout'] = None
+        self._array_header_struct: Optional['StructLayout'] = None
 
-    def __init__(self):
+        # Module scope: what is known about a build, by module UUID and file address, shared by all targets.
+        self._module_types = _module_types
+        self._runtime_type_size: Optional[Tuple[int, ...]] = None
+        self._runtime_type_alignment: Optional[Tuple[int, ...]] = None
+
+        self._reset_launch_entries()
+        self._reset_stop_entries()
+
+    def _reset_launch_entries(self):
+        # Launch scope: load addresses and values read from the process, valid until it exits.
+        self._process_id: Optional[int] = None
         self._debug_buffer_addr: Optional[int] = None
         self._debug_buffer_size: Optional[int] = None
         self._string_symbol_value: Optional[lldb.value] = None
         self._list_symbol_value: Optional[lldb.value] = None
         self._map_symbol_value: Optional[lldb.value] = None
-        self._helper_types_declared: bool = False
-        self._type_info_type: Optional[lldb.SBType] = None
-        self._obj_header_type: Optional[lldb.SBType] = None
-        self._array_header_type: Optional[lldb.SBType] = None
-        self._runtime_type_size: Optional[lldb.value] = None
-        self._runtime_type_alignment: Optional[lldb.value] = None
+        self._type_layouts: Dict[int, 'TypeLayout'] = {}
+        self._known_value_types: Dict[int, int] = {}
+        self._type_names: Dict[int, str] = {}
+        # Modules seen in this launch, by UUID.
+        self._module_states: Dict[str, 'ModuleState'] = {}
+        self._objc_ivar_offsets: Dict[str, Tuple[int, ...]] = {}
+        # The environment can only change with a new launch, see `KonanHook`.
+        self._skip_bridging_functions: Optional[bool] = None
+
+    def _reset_stop_entries(self):
+        # Stop scope: derived from memory that may change as soon as the process runs.
+        self._stop_id: Optional[int] = None
+        self._stop_objects: Dict[int, 'ObjectInfo'] = {}
+        self._stop_objc_refs: Dict[int, int] = {}
+        self._stop_descriptions: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        # CFAs of the frames whose variables got their descriptions prefetched.
+        self._stop_prefetched_frames: Set[int] = set()
+        # Destinations of `KonanRunToKotlin` by the PC of the bridge, asked for by the stop hook and then by the plan.
+        self._stop_run_to_kotlin_destinations: Dict[int, Optional[Tuple[int, ...]]] = {}
+        # Breakdown of what the formatters did for this target at this stop, see `perf.record`.
+        self._stop_perf: Optional['PerfStats'] = None
+        # Time the formatters spent on the values of this stop, see `value_budget`.
+        self._stop_formatting_seconds = 0.0
+
+    def drop_stop_entries(self):
+        """The process resumed."""
+        self._reset_stop_entries()
+
+    def drop_launch_entries(self):
+        """The process exited, or another one took its place. The types of its modules are kept by UUID, the next
+        launch of the same builds rebases them to where the modules get loaded then."""
+        # Imported here, the types package depends on this one.
+        from ..types.module_cache import persist_module_states
+        persist_module_states(self)
+        self._reset_launch_entries()
+        self._reset_stop_entries()
+
+    def drop_module_entries(self, key: str):
+        """The module with the given UUID was unloaded, its load addresses may now belong to something else."""
+        state = self._module_states.pop(key, None)
+        if state is None:
+            return
+        for address in state.type_infos:
+            self._type_layouts.pop(address, None)
+            self._known_value_types.pop(address, None)
+            self._type_names.pop(address, None)
+        # Classifications and names of other modules' types may have been derived from it.
+        self._known_value_types = {}
+        self._string_symbol_value = None
+        self._list_symbol_value = None
+        self._map_symbol_value = None
+        self._reset_stop_entries()
+
+
+def target_cache(target: lldb.SBTarget) -> LLDBCache:
+    """Makes the partition of the given target the one `LLDBCache.instance()` returns until another one is selected,
+    formatters call it with the target of the value they were handed."""
+    global _current
+    LLDBCache.instance()
+    key = target_key(target)
+    partition = _partitions.get(key)
+    # Target indices get reused once a target is deleted.
+    if partition is None or partition._target != target:
+        partition = LLDBCache(target)
+        _partitions[key] = partition
+    _current = partition
+    return partition
+
+
+def active_partition() -> Optional[LLDBCache]:
+    """The partition selected last, without applying the pending invalidations like `LLDBCache.instance()`. None
+    until the first `LLDBCache.reset()`."""
+    return globals().get('_current')
+
+
+def activate(cache: LLDBCache):
+    """Selects a partition obtained from `target_cache` earlier, without looking it up again."""
+    global _current
+    _current = cache
+
+
+def stop_scoped_cache(process: lldb.SBProcess) -> LLDBCache:
+    """Returns the cache after dropping its per-stop entries if the process has run since they were recorded, as the
+    memory they were derived from may have changed. Also catches relaunches the event listener didn't report."""
+    self = LLDBCache.instance()
+    process_id = process.GetUniqueID()
+    if process_id != self._process_id:
+        if self._process_id is not None:
+            self.drop_launch_entries()
+        self._process_id = process_id
+
+    stop_id = process.GetStopID()
+    if stop_id != self._stop_id:
+        # Imported here, the util package depends on this one.
+        from ..util import perf
+        self._reset_stop_entries()
+        self._stop_id = stop_id
+        self._stop_perf = perf.begin_stop(stop_id, target_key(process.GetTarget())[1])
+    return self
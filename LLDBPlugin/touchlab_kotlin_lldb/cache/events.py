@@ -0,0 +1,84 @@
+"""Keeps the caches and formatters in line with the debugged processes by listening to target and process events."""
+import threading
+from typing import Callable, Optional
+
+import lldb
+
+from . import LLDBCache, pending_invalidations, target_key
+from ..util.log import log
+from ..types.kotlin_modules import note_loaded_module
+from ..util.symbol_index import index_module_in_background
+
+LISTENER_NAME = 'touchlab_kotlin_lldb.cache'
+# How often the listener thread wakes up when nothing happens, it's a daemon so it never has to stop.
+EVENT_WAIT_SECONDS = 5
+
+_MODULE_EVENTS = lldb.SBTarget.eBroadcastBitModulesLoaded | lldb.SBTarget.eBroadcastBitModulesUnloaded
+_PROCESS_EVENTS = lldb.SBProcess.eBroadcastBitStateChanged
+_LAUNCH_ENDING_STATES = (lldb.eStateExited, lldb.eStateDetached)
+_RESUMING_STATES = (lldb.eStateRunning, lldb.eStateStepping)
+
+_listener_thread: Optional[threading.Thread] = None
+
+
+def start_cache_event_listener(debugger: lldb.SBDebugger):
+    """Subscribes to the events of all current and future targets and processes of the debugger."""
+    global _listener_thread
+    if _listener_thread is not None:
+        return
+
+    listener = lldb.SBListener(LISTENER_NAME)
+    listener.StartListeningForEventClass(debugger, lldb.SBTarget.GetBroadcasterClassName(), _MODULE_EVENTS)
+    listener.StartListeningForEventClass(debugger, lldb.SBProcess.GetBroadcasterClassName(), _PROCESS_EVENTS)
+
+    _listener_thread = threading.Thread(target=_listen, args=(listener,), name=LISTENER_NAME, daemon=True)
+    _listener_thread.start()
+
+
+def _listen(listener: lldb.SBListener):
+    event = lldb.SBEvent()
+    while True:
+        if listener.WaitForEvent(EVENT_WAIT_SECONDS, event):
+            try:
+                _handle_event(event)
+            except Exception as e:
+                log(lambda: "cache event listener: {} while handling {}".format(e, event))
+
+
+def _handle_event(event: lldb.SBEvent):
+    if lldb.SBProcess.EventIsProcessEvent(event):
+        if lldb.SBProcess.GetRestartedFromEvent(event):
+            return
+        target = lldb.SBProcess.GetProcessFromEvent(event).GetTarget()
+        state = lldb.SBProcess.GetStateFromEvent(event)
+        if state in _RESUMING_STATES:
+            _invalidate(target, LLDBCache.drop_stop_entries)
+        elif state in _LAUNCH_ENDING_STATES:
+            log(lambda: "cache event listener: process {}".format(lldb.SBDebugger.StateAsCString(state)))
+            _invalidate(target, LLDBCache.drop_launch_entries)
+
+    elif lldb.SBTarget.EventIsTargetEvent(event):
+        target = lldb.SBTarget.GetTargetFromEvent(event)
+        unloaded = (event.GetType() & lldb.SBTarget.eBroadcastBitModulesUnloaded) != 0
+        for i in range(lldb.SBTarget.GetNumModulesFromEvent(event)):
+            module = lldb.SBTarget.GetModuleAtIndexFromEvent(i, event)
+            if not unloaded:
+                note_loaded_module(target, module)
+            key = module.GetUUIDString()
+            if not key:
+                continue
+            if unloaded:
+                log(lambda: "cache event listener: unloaded {}".format(module.GetFileSpec()))
+                _invalidate(target, lambda cache, unloaded_key=key: cache.drop_module_entries(unloaded_key))
+            else:
+                _invalidate(target, lambda cache, loaded_module=module: _index_known_module(cache, loaded_module))
+
+
+def _invalidate(target: lldb.SBTarget, invalidation: Callable[[LLDBCache], None]):
+    pending_invalidations.append((target_key(target), invalidation))
+
+
+def _index_known_module(cache: LLDBCache, module: lldb.SBModule):
+    if module.GetUUIDString() in cache._module_types:
+        # A build we've seen before, its symbols will be needed again.
+        index_module_in_background(module)
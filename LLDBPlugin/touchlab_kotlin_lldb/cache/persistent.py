@@ -0,0 +1,317 @@
+"""On-disk cache of what the formatters learn about a module, so later sessions on the same build start warm.
+
+Entries are keyed by the module UUID and hold file addresses, which don't depend on where the module gets loaded."""
+import os
+import pathlib
+import re
+import struct
+import sys
+import time
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..util.log import INFO, WARNING, log
+
+# Bump whenever the encoding, or the meaning of anything stored, changes. Files of other versions are ignored.
+FORMAT_VERSION = 1
+_MAGIC = b'KTLC'
+_HEADER = struct.Struct('<4sHB')
+
+KIND_TYPES = 1
+KIND_SYMBOLS = 2
+_EXTENSIONS = {KIND_TYPES: 'types', KIND_SYMBOLS: 'symbols'}
+
+KONAN_LLDB_CACHE_DIR = 'KONAN_LLDB_CACHE_DIR'
+KONAN_LLDB_DISABLE_PERSISTENT_CACHE = 'KONAN_LLDB_DISABLE_PERSISTENT_CACHE'
+# Every build of a module gets a new UUID, files nobody touched for this long belong to builds that are gone.
+MAX_FILE_AGE_SECONDS = 14 * 24 * 60 * 60
+
+
+class StoredTypeLayout(NamedTuple):
+    """`TypeLayout` with all of its addresses as file addresses."""
+    address: int
+    instance_size: int
+    super_type: int
+    flags: int
+    implemented_interfaces: Tuple[int, ...]
+    fields_count: int
+    field_offsets: Tuple[int, ...]
+    field_types: bytes
+    field_names: Tuple[str, ...]
+    package_name: int
+    relative_name: int
+
+
+class ModuleTypes:
+    """Everything known about the Kotlin types of one module, by the file address of their TypeInfo."""
+
+    def __init__(self):
+        self.layouts: Dict[int, StoredTypeLayout] = {}
+        self.value_types: Dict[int, int] = {}
+        self.type_names: Dict[int, str] = {}
+        self.runtime_type_size: Optional[Tuple[int, ...]] = None
+        self.runtime_type_alignment: Optional[Tuple[int, ...]] = None
+
+    def copy(self) -> 'ModuleTypes':
+        """A snapshot to write out while the formatters keep adding entries, the entries themselves are immutable."""
+        types = ModuleTypes()
+        types.layouts = dict(self.layouts)
+        types.value_types = dict(self.value_types)
+        types.type_names = dict(self.type_names)
+        types.runtime_type_size = self.runtime_type_size
+        types.runtime_type_alignment = self.runtime_type_alignment
+        return types
+
+    def entry_count(self) -> int:
+        return (
+                len(self.layouts) + len(self.value_types) + len(self.type_names)
+                + (self.runtime_type_size is not None) + (self.runtime_type_alignment is not None)
+        )
+
+
+def cache_dir() -> Optional[pathlib.Path]:
+    if os.getenv(KONAN_LLDB_DISABLE_PERSISTENT_CACHE):
+        return None
+    directory = os.getenv(KONAN_LLDB_CACHE_DIR)
+    if directory:
+        return pathlib.Path(directory)
+    if sys.platform == 'darwin':
+        return pathlib.Path.home() / 'Library' / 'Caches' / 'xcode-kotlin' / 'lldb'
+    return pathlib.Path(os.getenv('XDG_CACHE_HOME') or pathlib.Path.home() / '.cache') / 'xcode-kotlin' / 'lldb'
+
+
+def load_types(key: str) -> Optional[ModuleTypes]:
+    reader = _load(KIND_TYPES, key)
+    if reader is None:
+        return None
+    try:
+        types = ModuleTypes()
+        for _ in range(reader.u32()):
+            layout = StoredTypeLayout(
+                address=reader.u64(),
+                instance_size=reader.i32(),
+                super_type=reader.u64(),
+                flags=reader.i32(),
+                implemented_interfaces=reader.u64s(),
+                fields_count=reader.i32(),
+                field_offsets=reader.i32s(),
+                field_types=reader.blob(),
+                field_names=tuple(reader.string() for _ in range(reader.u32())),
+                package_name=reader.u64(),
+                relative_name=reader.u64(),
+            )
+            types.layouts[layout.address] = layout
+        for _ in range(reader.u32()):
+            address = reader.u64()
+            types.value_types[address] = reader.u8()
+        for _ in range(reader.u32()):
+            address = reader.u64()
+            types.type_names[address] = reader.string()
+        types.runtime_type_size = reader.optional_i32s()
+        types.runtime_type_alignment = reader.optional_i32s()
+        return types
+    except (struct.error, UnicodeDecodeError) as e:
+        log(lambda: "persistent cache: corrupt types of {} ({})".format(key, e), WARNING)
+        return None
+
+
+def save_types(key: str, types: ModuleTypes):
+    writer = _Writer()
+    writer.u32(len(types.layouts))
+    for layout in types.layouts.values():
+        writer.u64(layout.address)
+        writer.i32(layout.instance_size)
+        writer.u64(layout.super_type)
+        writer.i32(layout.flags)
+        writer.u64s(layout.implemented_interfaces)
+        writer.i32(layout.fields_count)
+        writer.i32s(layout.field_offsets)
+        writer.blob(layout.field_types)
+        writer.u32(len(layout.field_names))
+        for name in layout.field_names:
+            writer.string(name)
+        writer.u64(layout.package_name)
+        writer.u64(layout.relative_name)
+    writer.u32(len(types.value_types))
+    for address, value_type in types.value_types.items():
+        writer.u64(address)
+        writer.u8(value_type)
+    writer.u32(len(types.type_names))
+    for address, name in types.type_names.items():
+        writer.u64(address)
+        writer.string(name)
+    writer.optional_i32s(types.runtime_type_size)
+    writer.optional_i32s(types.runtime_type_alignment)
+    _save(KIND_TYPES, key, writer)
+
+
+def load_symbols(key: str) -> Optional[List[Tuple[str, int]]]:
+    reader = _load(KIND_SYMBOLS, key)
+    if reader is None:
+        return None
+    try:
+        return [(reader.string(), reader.u64()) for _ in range(reader.u32())]
+    except (struct.error, UnicodeDecodeError) as e:
+        log(lambda: "persistent cache: corrupt symbols of {} ({})".format(key, e), WARNING)
+        return None
+
+
+def save_symbols(key: str, symbols: Sequence[Tuple[str, int]]):
+    writer = _Writer()
+    writer.u32(len(symbols))
+    for name, address in symbols:
+        writer.string(name)
+        writer.u64(address)
+    _save(KIND_SYMBOLS, key, writer)
+
+
+def _path(directory: pathlib.Path, kind: int, key: str) -> pathlib.Path:
+    return directory / '{}.{}'.format(re.sub('[^0-9A-Za-z_-]', '_', key), _EXTENSIONS[kind])
+
+
+def _load(kind: int, key: str) -> Optional['_Reader']:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    path = _path(directory, kind, key)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, stored_kind = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != FORMAT_VERSION or stored_kind != kind:
+        log(lambda: "persistent cache: ignoring {} (version {})".format(path, version), INFO)
+        return None
+    try:
+        reader = _Reader(zlib.decompress(data[_HEADER.size:]))
+        if reader.string() != key:
+            return None
+    except (zlib.error, struct.error, UnicodeDecodeError) as e:
+        log(lambda: "persistent cache: corrupt {} ({})".format(path, e), WARNING)
+        return None
+    log(lambda: "persistent cache: loaded {}".format(path), INFO)
+    return reader
+
+
+_pruned = False
+
+
+def _save(kind: int, key: str, writer: '_Writer'):
+    global _pruned
+    directory = cache_dir()
+    if directory is None:
+        return
+    payload = _Writer()
+    payload.string(key)
+    data = _HEADER.pack(_MAGIC, FORMAT_VERSION, kind) + zlib.compress(payload.data() + writer.data())
+
+    path = _path(directory, kind, key)
+    temporary = path.with_name('{}.{}.tmp'.format(path.name, os.getpid()))
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        if not _pruned:
+            _pruned = True
+            _prune(directory)
+        temporary.write_bytes(data)
+        # Atomic, so concurrent sessions never see half-written files.
+        os.replace(temporary, path)
+    except OSError as e:
+        log(lambda: "persistent cache: could not write {} ({})".format(path, e), WARNING)
+        return
+    log(lambda: "persistent cache: wrote {} bytes to {}".format(len(data), path))
+
+
+def _prune(directory: pathlib.Path):
+    oldest = time.time() - MAX_FILE_AGE_SECONDS
+    for path in directory.iterdir():
+        try:
+            if path.stat().st_mtime < oldest:
+                path.unlink()
+        except OSError:
+            pass
+
+
+class _Writer:
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def data(self) -> bytes:
+        return b''.join(self._chunks)
+
+    def u8(self, value: int):
+        self._chunks.append(struct.pack('<B', value))
+
+    def u32(self, value: int):
+        self._chunks.append(struct.pack('<I', value))
+
+    def i32(self, value: int):
+        self._chunks.append(struct.pack('<i', value))
+
+    def u64(self, value: int):
+        self._chunks.append(struct.pack('<Q', value))
+
+    def u64s(self, values: Sequence[int]):
+        self.u32(len(values))
+        self._chunks.append(struct.pack('<{}Q'.format(len(values)), *values))
+
+    def i32s(self, values: Sequence[int]):
+        self.u32(len(values))
+        self._chunks.append(struct.pack('<{}i'.format(len(values)), *values))
+
+    def optional_i32s(self, values: Optional[Sequence[int]]):
+        self.u8(values is not None)
+        if values is not None:
+            self.i32s(values)
+
+    def blob(self, value: bytes):
+        self.u32(len(value))
+        self._chunks.append(bytes(value))
+
+    def string(self, value: str):
+        self.blob(value.encode('utf-8'))
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self._data = data
+        self._offset = 0
+
+    def _unpack(self, value_format: str):
+        values = struct.unpack_from(value_format, self._data, self._offset)
+        self._offset += struct.calcsize(value_format)
+        return values
+
+    def u8(self) -> int:
+        return self._unpack('<B')[0]
+
+    def u32(self) -> int:
+        return self._unpack('<I')[0]
+
+    def i32(self) -> int:
+        return self._unpack('<i')[0]
+
+    def u64(self) -> int:
+        return self._unpack('<Q')[0]
+
+    def u64s(self) -> Tuple[int, ...]:
+        return self._unpack('<{}Q'.format(self.u32()))
+
+    def i32s(self) -> Tuple[int, ...]:
+        return self._unpack('<{}i'.format(self.u32()))
+
+    def optional_i32s(self) -> Optional[Tuple[int, ...]]:
+        return self.i32s() if self.u8() else None
+
+    def blob(self) -> bytes:
+        size = self.u32()
+        if self._offset + size > len(self._data):
+            raise struct.error('{} bytes past the end of the data'.format(size))
+        value = self._data[self._offset:self._offset + size]
+        self._offset += size
+        return value
+
+    def string(self) -> str:
+        return self.blob().decode('utf-8')
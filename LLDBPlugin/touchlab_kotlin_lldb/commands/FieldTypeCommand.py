@@ -1,7 +1,9 @@
-from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject
+from typing import Optional
+
+from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject, SBFrame, SBValue
 
 from ..types.proxy import KonanProxyTypeProvider
-from ..types.base import get_runtime_type
+from ..types.type_name import get_runtime_type
 
 
 class FieldTypeCommand:
@@ -21,17 +23,7 @@ class FieldTypeCommand:
         Returns runtime type of foo.bar.baz field in the form "(foo.bar.baz <TYPE_NAME>)".
         If requested field could not be traced, then "<NO_FIELD_FOUND>" plug is used for type name.
         """
-        fields = command.split('.')
-
-        variable = exe_ctx.GetFrame().FindVariable(fields[0])
-
-        for field_name in fields[1:]:
-            if variable is not None:
-                provider = KonanProxyTypeProvider(variable, {})
-                field_index = provider.get_child_index(field_name)
-                variable = provider.get_child_at_index(field_index)
-            else:
-                break
+        variable = find_field(exe_ctx.GetFrame(), command)
 
         desc = "<NO_FIELD_FOUND>"
 
@@ -41,3 +33,20 @@ class FieldTypeCommand:
                 desc = rt
 
         result.write("{}".format(desc))
+
+
+def find_field(frame: SBFrame, path: str) -> Optional[SBValue]:
+    """The value of a `foo.bar.baz` path of Kotlin fields, starting from a variable of the frame."""
+    fields = path.split('.')
+
+    variable = frame.FindVariable(fields[0])
+
+    for field_name in fields[1:]:
+        if variable is not None:
+            provider = KonanProxyTypeProvider(variable, {})
+            field_index = provider.get_child_index(field_name)
+            variable = provider.get_child_at_index(field_index)
+        else:
+            break
+
+    return variable
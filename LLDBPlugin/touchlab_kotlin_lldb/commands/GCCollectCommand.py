@@ -1,6 +1,7 @@
 from typing import Optional
 
 from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject, SBTarget, SBSymbol, SBInstructionList
+from touchlab_kotlin_lldb.cache import target_cache
 from touchlab_kotlin_lldb.util import evaluate, DebuggerException
 
 import re
@@ -15,6 +16,7 @@ class GCCollectCommand:
     def __call__(self, debugger: SBDebugger, command, exe_ctx: SBExecutionContext, result: SBCommandReturnObject):
         try:
             target = debugger.GetSelectedTarget()
+            target_cache(target)
             schedule_gc_function = self._find_single_function_symbol('kotlin::gcScheduler::GCScheduler::scheduleAndWaitFinalized()', target, result)
             deinit_memory_function = self._find_single_function_symbol('DeinitMemory', target, result)
             global_data_symbol = self._find_single_symbol("(anonymous namespace)::globalDataInstance", target, result)
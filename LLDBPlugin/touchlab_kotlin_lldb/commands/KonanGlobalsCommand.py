@@ -1,27 +1,57 @@
 import re
+import shlex
+import struct
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject
+from lldb import (
+    LLDB_INVALID_ADDRESS, SBDebugger, SBExecutionContext, SBCommandReturnObject, SBModule, SBProcess, SBTarget,
+)
 
+from ..cache import target_cache
+from ..types.base import obj_header_type
+from ..types.classify import is_plain_object
 from ..types.summary import kotlin_object_type_summary
+from ..util import DebuggerException, NULL
 from ..util.expression import evaluate
+from ..util.kotlin_object_to_cstring import prefetch_object_descriptions
+from ..util.memory import create_data, pack_pointer, pointer_format, read_memory
+from ..util.symbol_index import SymbolIndex, get_symbol_index, load_address_slide
 
-
-__KONAN_VARIABLE = re.compile('kvar:(.*)#internal')
-__KONAN_VARIABLE_TYPE = re.compile('^kfun:<get-(.*)>\\(\\)(.*)$')
-__TYPES_KONAN_TO_C = {
-   'kotlin.Byte': ('int8_t', lambda v: v.signed),
-   'kotlin.Short': ('short', lambda v: v.signed),
-   'kotlin.Int': ('int', lambda v: v.signed),
-   'kotlin.Long': ('long', lambda v: v.signed),
-   'kotlin.UByte': ('int8_t', lambda v: v.unsigned),
-   'kotlin.UShort': ('short', lambda v: v.unsigned),
-   'kotlin.UInt': ('int', lambda v: v.unsigned),
-   'kotlin.ULong': ('long', lambda v: v.unsigned),
-   'kotlin.Char': ('short', lambda v: v.signed),
-   'kotlin.Boolean': ('bool', lambda v: v.signed),
-   'kotlin.Float': ('float', lambda v: v.value),
-   'kotlin.Double': ('double', lambda v: v.value)
+# Matched against the symbol names without their `kvar:` and `kfun:` prefixes.
+_KONAN_VARIABLE = re.compile('^(.*)#internal$')
+_KONAN_VARIABLE_GETTER = re.compile('^<get-(.*)>\\(\\)(.*)$')
+# Kotlin type -> (C type returned by the getter, `struct` format of the backing field)
+_TYPES_KONAN_TO_C = {
+    'kotlin.Byte': ('int8_t', 'b'),
+    'kotlin.Short': ('short', 'h'),
+    'kotlin.Int': ('int', 'i'),
+    'kotlin.Long': ('long', 'q'),
+    'kotlin.UByte': ('int8_t', 'B'),
+    'kotlin.UShort': ('short', 'H'),
+    'kotlin.UInt': ('int', 'I'),
+    'kotlin.ULong': ('long', 'Q'),
+    'kotlin.Char': ('short', 'h'),
+    'kotlin.Boolean': ('bool', '?'),
+    'kotlin.Float': ('float', 'f'),
+    'kotlin.Double': ('double', 'd'),
 }
+_OBJECT_C_TYPE = 'ObjHeader *'
+
+DEFAULT_PAGE_SIZE = 50
+# Backing fields further apart than this are read separately instead of in one block.
+MAX_STORAGE_BLOCK_SIZE = 0x10000
+
+
+class KonanGlobal(NamedTuple):
+    name: str
+    type: Optional[str]
+    # Load address of the backing field.
+    storage: Optional[int]
+    getter: Optional[str]
+
+    def storage_format(self, process: SBProcess) -> str:
+        c_type = _TYPES_KONAN_TO_C.get(self.type)
+        return pointer_format(process) if c_type is None else c_type[1]
 
 
 class KonanGlobalsCommand:
@@ -37,34 +67,186 @@ class KonanGlobalsCommand:
             exe_ctx: SBExecutionContext,
             result: SBCommandReturnObject,
     ):
-        global __KONAN_VARIABLE, __KONAN_VARIABLE_TYPE, __TYPES_KONAN_TO_C
-        target = debugger.GetSelectedTarget()
-        process = target.GetProcess()
-        thread = process.GetSelectedThread()
-        frame = thread.GetSelectedFrame()
-
-        konan_variable_symbols = list(filter(lambda v: __KONAN_VARIABLE.match(v.name), frame.GetModule().symbols))
-        visited = list()
-        for symbol in konan_variable_symbols:
-            name = __KONAN_VARIABLE.search(symbol.name).group(1)
-
-            if name in visited:
-                continue
-            visited.append(name)
-
-            getters = list(
-                filter(lambda v: re.match('^kfun:<get-{}>\\(\\).*$'.format(name), v.name), frame.module.symbols))
-            if not getters:
-                result.AppendMessage("storage not found for name:{}".format(name))
-                continue
-
-            getter_functions = frame.module.FindFunctions(getters[0].name)
-            if not getter_functions:
-                continue
-
-            address = getter_functions[0].function.GetStartAddress().GetLoadAddress(target)
-            type = __KONAN_VARIABLE_TYPE.search(getters[0].name).group(2)
-            (c_type, extractor) = __TYPES_KONAN_TO_C[type] if type in __TYPES_KONAN_TO_C.keys() else ('ObjHeader *', lambda v: kotlin_object_type_summary(v))
-            value = evaluate('(({0} (*)()){1:#x})()', c_type, address)
-            str_value = extractor(value)
-            result.AppendMessage('{} {}: {}'.format(type, name, str_value))
+        """
+        Prints the top-level properties of the current module.
+        Usage: konan_globals [--package <name>] [--offset <n>] [--limit <n>] [--call-getters]
+        Values are read from the backing fields, `--call-getters` calls the getters instead, which also initializes
+        properties that haven't been accessed yet.
+        """
+        try:
+            package, offset, limit, call_getters = _parse_options(command)
+
+            target = debugger.GetSelectedTarget()
+            target_cache(target)
+            process = target.GetProcess()
+            module = process.GetSelectedThread().GetSelectedFrame().GetModule()
+            all_globals = _find_globals(get_symbol_index(module), load_address_slide(target, module))
+            if package is not None:
+                all_globals = [
+                    variable for variable in all_globals
+                    if variable.name == package or variable.name.startswith(package + '.')
+                ]
+
+            page = all_globals[offset:offset + limit]
+            values = _read_values(target, process, page) if not call_getters else {}
+            for variable in page:
+                if variable.type is None:
+                    result.AppendMessage("storage not found for name:{}".format(variable.name))
+                    continue
+                value = values.get(variable.name)
+                if value is None:
+                    value = _call_getter(target, module, variable)
+                result.AppendMessage('{} {}: {}'.format(variable.type, variable.name, value))
+
+            if offset + limit < len(all_globals):
+                result.AppendMessage('Showing {}-{} of {} globals, use --offset {} for the next page.'.format(
+                    offset, offset + len(page), len(all_globals), offset + limit
+                ))
+
+        except DebuggerException as e:
+            result.SetError(e.msg)
+
+
+def _parse_options(command: str) -> Tuple[Optional[str], int, int, bool]:
+    package: Optional[str] = None
+    offset = 0
+    limit = DEFAULT_PAGE_SIZE
+    call_getters = False
+
+    tokens = shlex.split(command)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '--call-getters':
+            call_getters = True
+            i += 1
+            continue
+        if token not in ('-p', '--package', '-o', '--offset', '-l', '--limit') or i + 1 >= len(tokens):
+            raise DebuggerException(
+                'Usage: konan_globals [--package <name>] [--offset <n>] [--limit <n>] [--call-getters]'
+            )
+        argument = tokens[i + 1]
+        if token in ('-p', '--package'):
+            package = argument
+        else:
+            try:
+                number = int(argument)
+            except ValueError:
+                raise DebuggerException('Expected a number after {}, got "{}".'.format(token, argument))
+            if token in ('-o', '--offset'):
+                offset = max(0, number)
+            else:
+                limit = max(1, number)
+        i += 2
+
+    return package, offset, limit, call_getters
+
+
+def _find_globals(index: SymbolIndex, slide: int) -> List[KonanGlobal]:
+    """Pairs every `kvar:` symbol with its `kfun:<get-...>` getter in a single pass over both."""
+    getters: Dict[str, Tuple[str, str]] = {}
+    for name in index.kotlin_symbols['kfun:']:
+        match = _KONAN_VARIABLE_GETTER.match(name)
+        if match:
+            getters.setdefault(match.group(1), ('kfun:' + name, match.group(2)))
+
+    result = []
+    for name, address in index.kotlin_symbols['kvar:'].items():
+        match = _KONAN_VARIABLE.match(name)
+        if not match:
+            continue
+        variable = match.group(1)
+        getter, variable_type = getters.get(variable, (None, None))
+        storage = address + slide if address not in (0, LLDB_INVALID_ADDRESS) else None
+        result.append(KonanGlobal(variable, variable_type, storage, getter))
+
+    result.sort(key=lambda variable: variable.name)
+    return result
+
+
+def _read_values(target: SBTarget, process: SBProcess, variables: Sequence[KonanGlobal]) -> Dict[str, str]:
+    """Formats the values of the globals that can be read straight from their backing fields."""
+    readable = [variable for variable in variables if variable.type is not None and variable.storage is not None]
+    storage = _read_storage(process, [
+        (variable.storage, struct.calcsize('<' + variable.storage_format(process))) for variable in readable
+    ])
+
+    raw_values: Dict[str, object] = {}
+    for variable in readable:
+        data = storage.get(variable.storage)
+        if data is not None:
+            raw_values[variable.name] = struct.unpack('<' + variable.storage_format(process), data)[0]
+
+    objects = {
+        variable.name: raw_values[variable.name] for variable in readable
+        if variable.name in raw_values and variable.type not in _TYPES_KONAN_TO_C
+    }
+    try:
+        prefetch_object_descriptions(process, [
+            address for address in objects.values()
+            if address != 0 and is_plain_object(process, address)
+        ])
+    except DebuggerException:
+        # Each summary falls back to describing its object on its own.
+        pass
+
+    result = {}
+    for name, value in raw_values.items():
+        if name not in objects:
+            result[name] = _format_primitive(value)
+        elif value == 0:
+            result[name] = NULL
+        else:
+            result[name] = kotlin_object_type_summary(
+                target.CreateValueFromData(name, create_data(process, pack_pointer(process, value)), obj_header_type()),
+                {},
+            )
+    return result
+
+
+def _read_storage(process: SBProcess, fields: Sequence[Tuple[int, int]]) -> Dict[int, bytes]:
+    """Reads the given (address, size) fields, in as few blocks as their placement allows."""
+    result: Dict[int, bytes] = {}
+    fields = sorted(fields)
+    start = 0
+    while start < len(fields):
+        end = start + 1
+        while end < len(fields) and fields[end][0] + fields[end][1] - fields[start][0] <= MAX_STORAGE_BLOCK_SIZE:
+            end += 1
+
+        block_address = fields[start][0]
+        block_size = max(address + size for address, size in fields[start:end]) - block_address
+        try:
+            block = read_memory(process, block_address, block_size)
+            for address, size in fields[start:end]:
+                result[address] = block[address - block_address:address - block_address + size]
+        except DebuggerException:
+            # Left to the getters.
+            pass
+        start = end
+    return result
+
+
+def _format_primitive(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _call_getter(target: SBTarget, module: SBModule, variable: KonanGlobal) -> str:
+    getter_functions = module.FindFunctions(variable.getter)
+    if not getter_functions:
+        return NULL
+
+    address = getter_functions[0].function.GetStartAddress().GetLoadAddress(target)
+    c_type = _TYPES_KONAN_TO_C[variable.type][0] if variable.type in _TYPES_KONAN_TO_C else _OBJECT_C_TYPE
+    value = evaluate('(({0} (*)()){1:#x})()', c_type, address)
+    if c_type == _OBJECT_C_TYPE:
+        return kotlin_object_type_summary(value, {})
+
+    value_format = _TYPES_KONAN_TO_C[variable.type][1]
+    if value_format in 'fd':
+        return value.value
+    if value_format == '?':
+        return _format_primitive(bool(value.unsigned))
+    return str(value.unsigned if value_format.isupper() else value.signed)
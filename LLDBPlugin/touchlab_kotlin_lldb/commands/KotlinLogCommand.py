@@ -0,0 +1,53 @@
+from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject
+
+from ..util.log import LEVEL_NAMES, clear_records, format_record, get_level, level_from_name, recent_records, set_level
+
+
+class KotlinLogCommand:
+    program = 'kotlin_log'
+
+    def __init__(self, debugger, unused):
+        pass
+
+    def __call__(
+            self,
+            debugger: SBDebugger,
+            command,
+            exe_ctx: SBExecutionContext,
+            result: SBCommandReturnObject,
+    ):
+        """
+        Shows the recent records of the Kotlin plugin's log, kept in memory even when file logging is off.
+        `kotlin_log dump [count]` prints them, `kotlin_log level <DEBUG|INFO|WARNING|ERROR>` changes which records are
+        kept and `kotlin_log clear` drops them.
+        """
+        args = command.split()
+        action = args[0] if args else 'dump'
+
+        if action == 'dump':
+            try:
+                count = int(args[1]) if len(args) > 1 else None
+            except ValueError:
+                result.SetError('Expected a number of records, got "{}".'.format(args[1]))
+                return
+            records = recent_records(count)
+            if not records:
+                result.write('No log records.\n')
+            for record in records:
+                result.write(format_record(record))
+                result.write('\n')
+        elif action == 'level':
+            if len(args) < 2:
+                result.write('Log level: {}\n'.format(LEVEL_NAMES[get_level()]))
+                return
+            level = level_from_name(args[1])
+            if level is None:
+                result.SetError('Unknown log level "{}", expected one of: {}.'.format(
+                    args[1], ', '.join(LEVEL_NAMES.values())
+                ))
+                return
+            set_level(level)
+        elif action == 'clear':
+            clear_records()
+        else:
+            result.SetError('Unknown action "{}", expected one of: dump [count], level [name], clear.'.format(action))
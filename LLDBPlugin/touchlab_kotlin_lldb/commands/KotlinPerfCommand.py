@@ -0,0 +1,51 @@
+from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject
+
+from ..util import perf
+
+
+class KotlinPerfCommand:
+    program = 'kotlin_perf'
+
+    def __init__(self, debugger, unused):
+        pass
+
+    def __call__(
+            self,
+            debugger: SBDebugger,
+            command,
+            exe_ctx: SBExecutionContext,
+            result: SBCommandReturnObject,
+    ):
+        """
+        Shows where the Kotlin formatters spend their time.
+        `kotlin_perf dump` prints the totals since the last reset, `kotlin_perf stops [count]` the breakdown of the last
+        stops, `kotlin_perf startup` how long the plugin took to load and `kotlin_perf reset` clears everything recorded
+        so far.
+        """
+        args = command.split()
+        action = args[0] if args else 'dump'
+
+        if action == 'dump':
+            result.write(perf.format_stats(perf.totals()))
+            result.write('\n')
+        elif action == 'startup':
+            result.write(perf.format_startup())
+            result.write('\n')
+        elif action == 'reset':
+            perf.reset()
+            result.write('Kotlin formatter counters reset.\n')
+        elif action == 'stops':
+            try:
+                count = int(args[1]) if len(args) > 1 else perf.MAX_RECORDED_STOPS
+            except ValueError:
+                result.SetError('Expected a number of stops, got "{}".'.format(args[1]))
+                return
+            stops = list(perf.recorded_stops())[-count:] if count > 0 else []
+            if not stops:
+                result.write('No stops recorded.\n')
+            for stats in stops:
+                result.write('Stop {} of target {}:\n{}\n\n'.format(
+                    stats.stop_id, stats.target_index, perf.format_stats(stats),
+                ))
+        else:
+            result.SetError('Unknown action "{}", expected one of: dump, reset, startup, stops [count].'.format(action))
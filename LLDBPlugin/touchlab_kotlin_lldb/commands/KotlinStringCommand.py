@@ -0,0 +1,211 @@
+import codecs
+import shlex
+from typing import BinaryIO, Callable, NamedTuple, Optional, Tuple
+
+from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject, SBProcess
+
+from .FieldTypeCommand import find_field
+from ..cache import target_cache
+from ..types.base import KnownValueType, array_data_offset, array_header_struct, get_type_info_address
+from ..types.classify import classify_type_at
+from ..types.kotlin_string import STRING_CHAR_SIZE
+from ..types.layout import get_type_layout_at
+from ..types.type_name import get_type_name_at
+from ..util import DebuggerException, log
+from ..util.memory import read_memory
+
+USAGE = 'Usage: kotlin_string <variable path|address> [--offset <n>] [--length <n>] [--hex] [--output <file>]'
+# Bytes read, decoded and written at a time, a multiple of the hex dump line so lines never span two chunks.
+CHUNK_SIZE = 0x10000
+HEX_LINE_SIZE = 16
+
+
+class StreamedValue(NamedTuple):
+    type_name: str
+    data_address: int
+    # Elements are UTF-16 code units for strings and char arrays, bytes for byte arrays.
+    element_size: int
+    count: int
+    encoding: str
+
+
+class KotlinStringCommand:
+    program = 'kotlin_string'
+
+    def __init__(self, debugger, unused):
+        pass
+
+    def __call__(
+            self,
+            debugger: SBDebugger,
+            command,
+            exe_ctx: SBExecutionContext,
+            result: SBCommandReturnObject,
+    ):
+        """
+        Streams a kotlin.String, CharArray or ByteArray straight from memory, a chunk at a time, so even values of
+        many megabytes are neither truncated nor held in memory at once.
+        Usage: kotlin_string <variable path|address> [--offset <n>] [--length <n>] [--hex] [--output <file>]
+        Offset and length count characters, or bytes for a ByteArray. Text is written as UTF-8, `--hex` writes a hex
+        dump of the raw bytes instead. Without `--hex`, a ByteArray written to a file is copied as is.
+        """
+        try:
+            path, offset, length, hex_dump, output = _parse_options(command)
+
+            target_cache(exe_ctx.target)
+            process = exe_ctx.process
+            value = _streamed_value(process, _object_address(exe_ctx, path))
+            start = min(offset, value.count)
+            end = value.count if length is None else min(start + length, value.count)
+
+            if output is None:
+                # Written out as it comes instead of being collected in the result until the command returns.
+                result.SetImmediateOutputFile(debugger.GetOutputFile())
+                written = _stream(debugger, process, value, start, end, hex_dump, False, result.write)
+                if not hex_dump:
+                    result.write('\n')
+            else:
+                with open(output, 'wb') as file:
+                    written = _stream(debugger, process, value, start, end, hex_dump, True, _file_writer(file))
+                result.AppendMessage('Wrote {} of {} {} of {} to {}'.format(
+                    written, value.count, 'bytes' if value.element_size == 1 else 'chars', value.type_name, output
+                ))
+            if written < end - start:
+                result.AppendWarning('Interrupted after {} of {} elements.'.format(written, end - start))
+        except DebuggerException as e:
+            result.SetError(e.msg)
+        except OSError as e:
+            result.SetError('Could not write {}: {}'.format(e.filename, e.strerror))
+
+
+def _parse_options(command: str) -> Tuple[str, int, Optional[int], bool, Optional[str]]:
+    path: Optional[str] = None
+    offset = 0
+    length: Optional[int] = None
+    hex_dump = False
+    output: Optional[str] = None
+
+    tokens = shlex.split(command)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ('-x', '--hex'):
+            hex_dump = True
+            i += 1
+            continue
+        if not token.startswith('-'):
+            if path is not None:
+                raise DebuggerException(USAGE)
+            path = token
+            i += 1
+            continue
+        if token not in ('-o', '--offset', '-l', '--length', '-f', '--output') or i + 1 >= len(tokens):
+            raise DebuggerException(USAGE)
+        argument = tokens[i + 1]
+        if token in ('-f', '--output'):
+            output = argument
+        else:
+            try:
+                number = int(argument, 0)
+            except ValueError:
+                raise DebuggerException('Expected a number after {}, got "{}".'.format(token, argument))
+            if token in ('-o', '--offset'):
+                offset = max(0, number)
+            else:
+                length = max(0, number)
+        i += 2
+
+    if path is None:
+        raise DebuggerException(USAGE)
+    return path, offset, length, hex_dump, output
+
+
+def _object_address(exe_ctx: SBExecutionContext, path: str) -> int:
+    try:
+        return int(path, 0)
+    except ValueError:
+        pass
+    variable = find_field(exe_ctx.GetFrame(), path)
+    if variable is None or not variable.IsValid():
+        raise DebuggerException('No variable "{}" in the selected frame.'.format(path))
+    return variable.GetNonSyntheticValue().unsigned
+
+
+def _streamed_value(process: SBProcess, address: int) -> StreamedValue:
+    type_info = get_type_info_address(process, address)
+    if type_info == 0:
+        raise DebuggerException('No Kotlin object at {:#x}.'.format(address))
+
+    type_name = get_type_name_at(process, type_info)
+    if classify_type_at(process, type_info) == KnownValueType.STRING:
+        if get_type_layout_at(process, type_info).instance_size != -STRING_CHAR_SIZE:
+            raise DebuggerException('The characters of the string at {:#x} are not stored as UTF-16.'.format(address))
+        element_size, encoding = STRING_CHAR_SIZE, 'utf-16-le'
+    elif type_name == 'kotlin.CharArray':
+        element_size, encoding = STRING_CHAR_SIZE, 'utf-16-le'
+    elif type_name == 'kotlin.ByteArray':
+        element_size, encoding = 1, 'utf-8'
+    else:
+        raise DebuggerException('Expected a String, CharArray or ByteArray at {:#x}, got {}.'.format(address, type_name))
+
+    header_layout = array_header_struct()
+    count = header_layout.unpack(read_memory(process, address, header_layout.size))['count_']
+    # The elements are aligned to their own size.
+    return StreamedValue(type_name, address + array_data_offset(element_size), element_size, count, encoding)
+
+
+def _stream(
+        debugger: SBDebugger,
+        process: SBProcess,
+        value: StreamedValue,
+        start: int,
+        end: int,
+        hex_dump: bool,
+        binary: bool,
+        write: Callable,
+) -> int:
+    """Writes the elements `[start, end)` a chunk at a time, returns the number of elements written."""
+    decoder = codecs.getincrementaldecoder(value.encoding)(errors='replace')
+    # A ByteArray copied to a file keeps its exact bytes, anything else is written as text.
+    raw = binary and not hex_dump and value.element_size == 1
+    chunk_elements = CHUNK_SIZE // value.element_size
+    position = start
+    while position < end:
+        if _interrupt_requested(debugger):
+            break
+        count = min(chunk_elements, end - position)
+        data = read_memory(process, value.data_address + position * value.element_size, count * value.element_size)
+        if raw:
+            write(data)
+        elif hex_dump:
+            write(_hex_dump(data, position * value.element_size))
+        else:
+            write(decoder.decode(data, final=position + count == end))
+        position += count
+    log(lambda: "kotlin_string: wrote {} of {} elements".format(position - start, end - start))
+    return position - start
+
+
+def _file_writer(file: BinaryIO) -> Callable:
+    def write(data):
+        file.write(data if isinstance(data, bytes) else data.encode('utf-8', errors='surrogatepass'))
+
+    return write
+
+
+def _hex_dump(data: bytes, offset: int) -> str:
+    lines = []
+    for line_start in range(0, len(data), HEX_LINE_SIZE):
+        line = data[line_start:line_start + HEX_LINE_SIZE]
+        lines.append('{:08x}  {:<{width}}  |{}|\n'.format(
+            offset + line_start,
+            ' '.join('{:02x}'.format(byte) for byte in line),
+            ''.join(chr(byte) if 0x20 <= byte < 0x7f else '.' for byte in line),
+            width=HEX_LINE_SIZE * 3 - 1,
+        ))
+    return ''.join(lines)
+
+
+def _interrupt_requested(debugger: SBDebugger) -> bool:
+    # Available since LLDB 17, Ctrl-C stops the command there.
+    return hasattr(debugger, 'InterruptRequested') and debugger.InterruptRequested()
@@ -2,6 +2,8 @@ import re
 
 from lldb import SBDebugger, SBExecutionContext, SBCommandReturnObject
 
+from ..util.symbol_index import get_symbol_index, load_address_slide
+
 
 class SymbolByNameCommand:
     program = 'symbol_by_name'
@@ -21,12 +23,16 @@ class SymbolByNameCommand:
         thread = process.GetSelectedThread()
         frame = thread.GetSelectedFrame()
         tokens = command.split()
-        mask = re.compile(tokens[0])
-        symbols = list(filter(lambda v: mask.match(v.name), frame.GetModule().symbols))
-        visited = list()
-        for symbol in symbols:
-            name = symbol.name
-            if name in visited:
-                continue
-            visited.append(name)
-            result.AppendMessage("{}: {:#x}".format(name, symbol.GetStartAddress().GetLoadAddress(target)))
+        module = frame.GetModule()
+        index = get_symbol_index(module)
+        slide = load_address_slide(target, module)
+
+        if re.escape(tokens[0]) == tokens[0]:
+            # Plain names don't need the regex run over every symbol.
+            names = index.names_with_prefix(tokens[0])
+        else:
+            mask = re.compile(tokens[0])
+            names = [name for name in index.names() if mask.match(name)]
+
+        for name in names:
+            result.AppendMessage("{}: {:#x}".format(name, index.address(name) + slide))
@@ -1,6 +1,7 @@
 import lldb
 
 from ..util import log
+from ..util.symbol_index import get_symbol_index, load_address_slide
 
 
 class TypeByAddressCommand:
@@ -17,13 +18,15 @@ class TypeByAddressCommand:
             result: lldb.SBCommandReturnObject
     ):
         log(lambda: "type_by_address_command:{}".format(command))
-        result.AppendMessage("DEBUG: {}".format(command))
         tokens = command.split()
         target = debugger.GetSelectedTarget()
-        types = _type_info_by_address(tokens[0], debugger)
-        result.AppendMessage("DEBUG: {}".format(types))
-        for t in types:
-            result.AppendMessage("{}: {:#x}".format(t.name, t.GetStartAddress().GetLoadAddress(target)))
+        try:
+            address = int(tokens[0], 0)
+        except (IndexError, ValueError):
+            result.SetError('Expected an address, got "{}".'.format(command))
+            return
+        for name, load_address in _type_info_by_address(address, debugger):
+            result.AppendMessage("{}: {:#x}".format(name, load_address))
 
 
 def _type_info_by_address(address, debugger: lldb.SBDebugger):
@@ -31,5 +34,5 @@ def _type_info_by_address(address, debugger: lldb.SBDebugger):
     process = target.GetProcess()
     thread = process.GetSelectedThread()
     frame = thread.GetSelectedFrame()
-    candidates = list(filter(lambda x: x.GetStartAddress().GetLoadAddress(target) == address, frame.module.symbols))
-    return candidates
+    slide = load_address_slide(target, frame.module)
+    return [(name, address) for name in get_symbol_index(frame.module).names_at(address - slide)]
@@ -1,5 +1,22 @@
-from .FieldTypeCommand import FieldTypeCommand
-from .TypeByAddressCommand import TypeByAddressCommand
-from .SymbolByNameCommand import SymbolByNameCommand
-from .KonanGlobalsCommand import KonanGlobalsCommand
-from .GCCollectCommand import GCCollectCommand
\ No newline at end of file
+import importlib
+
+# The commands are imported one by one the first time they run, see `_COMMANDS` in the plugin's package.
+_COMMAND_CLASSES = (
+    'FieldTypeCommand',
+    'TypeByAddressCommand',
+    'SymbolByNameCommand',
+    'KonanGlobalsCommand',
+    'GCCollectCommand',
+    'KotlinPerfCommand',
+    'KotlinLogCommand',
+    'KotlinStringCommand',
+)
+
+
+def __getattr__(name: str):
+    if name not in _COMMAND_CLASSES:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    command_class = getattr(importlib.import_module('.{}'.format(name), __name__), name)
+    # Replaces the submodule the import bound to the same name.
+    globals()[name] = command_class
+    return command_class
@@ -3,11 +3,18 @@ import lldb
 from .KonanStepIn import KonanStepIn
 from .KonanStepOut import KonanStepOut
 from .KonanStepOver import KonanStepOver
+from .KonanRunToKotlin import KonanRunToKotlin, run_to_kotlin_destinations
+from .bridging import bridging_function_remainder
+from ..cache import target_cache
+from ..types.kotlin_modules import register_loaded_kotlin_modules
+from ..types.module_cache import persist_module_caches
+from ..util import perf
 
 KONAN_LLDB_DONT_SKIP_BRIDGING_FUNCTIONS = 'KONAN_LLDB_DONT_SKIP_BRIDGING_FUNCTIONS'
 MAX_SIZE_FOR_STOP_REASON = 20
+STEP_IN_STOP_REASON = 'step in'
 PLAN_FROM_STOP_REASON = {
-    'step in': KonanStepIn.__name__,
+    STEP_IN_STOP_REASON: KonanStepIn.__name__,
     'step out': KonanStepOut.__name__,
     'step over': KonanStepOver.__name__,
 }
@@ -17,25 +24,32 @@ class KonanHook:
     def __init__(self, target: lldb.SBTarget, extra_args, _):
         pass
 
+    @perf.timed('stop_hook')
     def handle_stop(self, execution_context: lldb.SBExecutionContext, stream: lldb.SBStream) -> bool:
-        is_bridging_functions_skip_enabled = not execution_context.target.GetEnvironment().Get(
-            KONAN_LLDB_DONT_SKIP_BRIDGING_FUNCTIONS
-        )
-
-        def is_kotlin_bridging_function() -> bool:
-            addr = execution_context.frame.addr
-            function_name = addr.function.name
-            if function_name is None:
-                return False
-            file_name = addr.line_entry.file.basename
-            if file_name is None:
-                return False
-            return function_name.startswith('objc2kotlin_') and file_name == '<compiler-generated>'
-
-        if is_bridging_functions_skip_enabled and is_kotlin_bridging_function():
-            stop_reason = execution_context.frame.thread.GetStopDescription(MAX_SIZE_FOR_STOP_REASON)
-            plan = PLAN_FROM_STOP_REASON.get(stop_reason)
-            if plan is not None:
-                execution_context.thread.StepUsingScriptedThreadPlan('{}.{}'.format(__name__, plan), False)
-                return False
+        # Whatever the formatters learned during the previous stop is kept for the next sessions, written out by a
+        # background thread.
+        persist_module_caches()
+        # Formatters of the ObjC classes of Kotlin modules loaded since the last stop, before any value is shown.
+        register_loaded_kotlin_modules(execution_context.target.GetDebugger())
+
+        if _skip_bridging_functions(execution_context.target):
+            frame = execution_context.frame
+            address = frame.GetPCAddress()
+            if bridging_function_remainder(address) is not None:
+                stop_reason = frame.thread.GetStopDescription(MAX_SIZE_FOR_STOP_REASON)
+                plan = PLAN_FROM_STOP_REASON.get(stop_reason)
+                if stop_reason == STEP_IN_STOP_REASON and run_to_kotlin_destinations(frame) is not None:
+                    # Straight to the Kotlin function, without stopping on every line of the bridge. Only when all
+                    # the functions it may call are known, `KonanStepIn` finds the callee otherwise.
+                    plan = KonanRunToKotlin.__name__
+                if plan is not None:
+                    execution_context.thread.StepUsingScriptedThreadPlan('{}.{}'.format(__name__, plan), False)
+                    return False
         return True
+
+
+def _skip_bridging_functions(target: lldb.SBTarget) -> bool:
+    cache = target_cache(target)
+    if cache._skip_bridging_functions is None:
+        cache._skip_bridging_functions = not target.GetEnvironment().Get(KONAN_LLDB_DONT_SKIP_BRIDGING_FUNCTIONS)
+    return cache._skip_bridging_functions
@@ -0,0 +1,156 @@
+from typing import List, Optional, Tuple
+
+import lldb
+
+from .KonanStepIn import KonanStepIn
+from .bridging import bridged_kotlin_functions
+from ..cache import stop_scoped_cache, target_cache
+from ..util import log
+
+COMPILER_GENERATED_FILE = '<compiler-generated>'
+# Stops that end the step when they happen on the way, as they would end any other step.
+_INTERRUPTING_STOP_REASONS = (lldb.eStopReasonBreakpoint, lldb.eStopReasonWatchpoint, lldb.eStopReasonException)
+
+
+def run_to_kotlin_destinations(frame: lldb.SBFrame) -> Optional[List[int]]:
+    """Load addresses of the first line of every Kotlin function the bridge of `frame` may call. None when that can't
+    be told for sure, the bridge is then stepped through line by line, which finds the callee whichever it is.
+    Computed once per stop, the stop hook picks the plan on it and the plan then needs the addresses."""
+    process = frame.GetThread().GetProcess()
+    target_cache(process.GetTarget())
+    self = stop_scoped_cache(process)
+    pc = frame.GetPC()
+    if pc not in self._stop_run_to_kotlin_destinations:
+        self._stop_run_to_kotlin_destinations[pc] = _find_destinations(frame)
+    destinations = self._stop_run_to_kotlin_destinations[pc]
+    return None if destinations is None else list(destinations)
+
+
+def _find_destinations(frame: lldb.SBFrame) -> Optional[Tuple[int, ...]]:
+    target = frame.GetThread().GetProcess().GetTarget()
+    bridge = frame.GetFunction()
+    if bridge.IsValid() and _has_inlined_code(bridge.GetBlock()):
+        # The callee may run right inside the bridge.
+        return None
+    functions = bridged_kotlin_functions(frame.GetPCAddress())
+    if functions is None:
+        return None
+
+    destinations = []
+    for file_address in functions:
+        address = _first_source_line(target, frame.GetModule(), file_address)
+        if address is None:
+            return None
+        destinations.append(address)
+    return tuple(destinations)
+
+
+def _has_inlined_code(block: lldb.SBBlock) -> bool:
+    child = block.GetFirstChild()
+    while child.IsValid():
+        if child.IsInlined() or _has_inlined_code(child):
+            return True
+        child = child.GetSibling()
+    return False
+
+
+def _first_source_line(target: lldb.SBTarget, module: lldb.SBModule, file_address: int) -> Optional[int]:
+    function = module.ResolveFileAddress(file_address).GetFunction()
+    if not function.IsValid():
+        return None
+    address = function.GetStartAddress().GetLoadAddress(target) + function.GetPrologueByteSize()
+    source_file = target.ResolveLoadAddress(address).GetLineEntry().GetFileSpec().GetFilename()
+    if source_file in [None, COMPILER_GENERATED_FILE]:
+        return None
+    return address
+
+
+class KonanRunToKotlin(object):
+    """Steps into the Kotlin function behind an `objc2kotlin_` bridge in a single resume instead of one line range at
+    a time: breakpoints go on the first line of every function the bridge may call, see `run_to_kotlin_destinations`,
+    and on its return address. Getting back there means the callee was missed, the step goes on with `KonanStepIn`."""
+
+    def __init__(self, thread_plan, dict, *args):
+        self.thread_plan = thread_plan
+        self.breakpoints: List[lldb.SBBreakpoint] = []
+        self.step_in_plan: Optional[lldb.SBThreadPlan] = None
+        thread = thread_plan.GetThread()
+        frame = thread.GetFrameAtIndex(0)
+        self.target = thread.GetProcess().GetTarget()
+        # Frames deeper than the bridge have a lower CFA, so recursion through the same bridge is told apart without
+        # unwinding the whole stack.
+        self.bridge_cfa = frame.GetCFA()
+        self.return_address = thread.GetFrameAtIndex(1).GetPC()
+
+        destinations = run_to_kotlin_destinations(frame)
+        if destinations is None or self.return_address == lldb.LLDB_INVALID_ADDRESS:
+            # The stop hook only picks this plan when the destinations are known, they may have changed since.
+            self.step_in_plan = self._queue_step_in()
+            return
+        destinations.append(self.return_address)
+
+        for address in destinations:
+            breakpoint = self.target.BreakpointCreateByAddress(address)
+            breakpoint.SetThreadID(thread.GetThreadID())
+            self.breakpoints.append(breakpoint)
+        log(lambda: "KonanRunToKotlin: {}".format(', '.join('{:#x}'.format(address) for address in destinations)))
+
+    def explains_stop(self, event) -> bool:
+        thread = self.thread_plan.GetThread()
+        stop_reason = thread.GetStopReason()
+        if stop_reason == lldb.eStopReasonBreakpoint:
+            breakpoint_id = thread.GetStopReasonDataAtIndex(0)
+            if any(breakpoint.GetID() == breakpoint_id for breakpoint in self.breakpoints):
+                return True
+        if stop_reason in _INTERRUPTING_STOP_REASONS:
+            # E.g. a breakpoint of the user, the step is over and `is_stale` gets it discarded.
+            self._delete_breakpoints()
+        return False
+
+    def should_stop(self, event) -> bool:
+        if self.step_in_plan is not None:
+            # Once the step in queued instead is done.
+            self._complete()
+            return True
+
+        frame = self.thread_plan.GetThread().GetFrameAtIndex(0)
+        if frame.GetPC() == self.return_address:
+            if frame.GetCFA() <= self.bridge_cfa:
+                # Another activation of the same code, keep running.
+                return False
+            # Back in the caller without reaching any of the destinations.
+            self._delete_breakpoints()
+            self.step_in_plan = self._queue_step_in()
+            return False
+        if frame.GetCFA() >= self.bridge_cfa:
+            return False
+
+        self._complete()
+        return True
+
+    def should_step(self) -> bool:
+        return False
+
+    def is_stale(self) -> bool:
+        if self.step_in_plan is not None:
+            return False
+        # The bridge returned without getting anywhere, e.g. the callee threw, or another stop ended the step.
+        stale = not self.breakpoints or self.thread_plan.GetThread().GetFrameAtIndex(0).GetCFA() > self.bridge_cfa
+        if stale:
+            self._delete_breakpoints()
+        return stale
+
+    def _queue_step_in(self) -> lldb.SBThreadPlan:
+        self._delete_breakpoints()
+        return self.thread_plan.QueueThreadPlanForStepScripted(
+            '{}.{}'.format(KonanStepIn.__module__, KonanStepIn.__name__)
+        )
+
+    def _complete(self):
+        self._delete_breakpoints()
+        self.thread_plan.SetPlanComplete(True)
+
+    def _delete_breakpoints(self):
+        for breakpoint in self.breakpoints:
+            self.target.BreakpointDelete(breakpoint.GetID())
+        self.breakpoints = []
@@ -1,3 +1,6 @@
+from .bridging import bridging_function_remainder
+
+
 class KonanStep(object):
     def __init__(self, thread_plan):
         self.thread_plan = thread_plan
@@ -26,6 +29,10 @@ class KonanStep(object):
 
     def queue_thread_plan(self):
         address = self.thread_plan.GetThread().GetFrameAtIndex(0).GetPCAddress()
+        # A bridge is stepped through as a whole, not one compiler-generated line at a time.
+        remainder = bridging_function_remainder(address)
+        if remainder is not None:
+            return self.do_queue_thread_plan(address, remainder)
         line_entry = self.thread_plan.GetThread().GetFrameAtIndex(0).GetLineEntry()
         begin_address = line_entry.GetStartAddress().GetFileAddress()
         end_address = line_entry.GetEndAddress().GetFileAddress()
@@ -0,0 +1,113 @@
+"""Address ranges of the `objc2kotlin_` bridges, which the stop hook and step plans step through rather than stop in,
+and the Kotlin functions behind them."""
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import lldb
+
+from ..types.kotlin_modules import is_kotlin_module
+from ..util.symbol_index import get_symbol_index, module_key
+
+BRIDGING_FUNCTION_PREFIX = 'objc2kotlin_'
+KOTLIN_FUNCTION_PREFIX = 'kfun:'
+# Beyond this many overrides, placing a breakpoint on each would cost more than the stops it saves.
+MAX_OVERRIDE_CANDIDATES = 8
+
+
+class IntervalIndex:
+    """Disjoint `[start, end)` ranges of file addresses, looked up with a single bisect."""
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]]):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in sorted(ranges):
+            # Aliases of the same function share its range.
+            if self._starts and start < self._ends[-1]:
+                continue
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def find(self, address: int) -> Optional[Tuple[int, int]]:
+        i = bisect.bisect_right(self._starts, address) - 1
+        if i >= 0 and address < self._ends[i]:
+            return self._starts[i], self._ends[i]
+        return None
+
+
+# Built once per module from its symbol index, by `module_key`. File addresses hold across launches.
+_bridging_ranges: Dict[str, IntervalIndex] = {}
+_NO_RANGES = IntervalIndex(())
+# File addresses of the Kotlin member functions by what follows the class name, e.g. `#foo(kotlin.Int){}`.
+_members: Dict[str, Dict[str, List[int]]] = {}
+
+
+def bridging_function_remainder(address: lldb.SBAddress) -> Optional[int]:
+    """Number of bytes from `address` to the end of the bridging function it is in, None when it's not in one."""
+    module = address.GetModule()
+    if not module.IsValid():
+        return None
+    file_address = address.GetFileAddress()
+    found = _module_bridging_ranges(module).find(file_address)
+    return found[1] - file_address if found is not None else None
+
+
+def bridged_kotlin_functions(address: lldb.SBAddress) -> Optional[List[int]]:
+    """File addresses of all the Kotlin functions the bridge at `address` may call: the one it is named after, and the
+    overrides of the same member. None when they aren't all known, e.g. a member with too many overrides."""
+    module = address.GetModule()
+    if not module.IsValid():
+        return None
+    found = _module_bridging_ranges(module).find(address.GetFileAddress())
+    if found is None:
+        return None
+    index = get_symbol_index(module)
+    kotlin_name = next(
+        (
+            name[len(BRIDGING_FUNCTION_PREFIX):]
+            for name in index.names_at(found[0])
+            if name.startswith(BRIDGING_FUNCTION_PREFIX)
+        ),
+        None,
+    )
+    if kotlin_name is None:
+        return None
+
+    functions = list(index.addresses(kotlin_name))
+    if not functions:
+        return None
+    _, separator, member = kotlin_name.partition('#')
+    if separator:
+        overrides = _module_members(module).get(member, [])
+        if len(overrides) > MAX_OVERRIDE_CANDIDATES:
+            return None
+        functions.extend(overrides)
+    return list(dict.fromkeys(functions))
+
+
+def _module_members(module: lldb.SBModule) -> Dict[str, List[int]]:
+    key = module_key(module)
+    members = _members.get(key)
+    if members is None:
+        members = {}
+        index = get_symbol_index(module)
+        for name in index.names_with_prefix(KOTLIN_FUNCTION_PREFIX):
+            _, separator, member = name.partition('#')
+            if separator:
+                members.setdefault(member, []).extend(index.addresses(name))
+        _members[key] = members
+    return members
+
+
+def _module_bridging_ranges(module: lldb.SBModule) -> IntervalIndex:
+    # Only Kotlin modules have bridges, indexing the symbols of the system libraries would be wasted.
+    if not is_kotlin_module(module):
+        return _NO_RANGES
+    key = module_key(module)
+    ranges = _bridging_ranges.get(key)
+    if ranges is None:
+        ranges = IntervalIndex(get_symbol_index(module).ranges_with_prefix(BRIDGING_FUNCTION_PREFIX))
+        _bridging_ranges[key] = ranges
+    return ranges
@@ -1,47 +1,150 @@
+from typing import Dict, Optional, Set
+
 import lldb
 
-from ..util import log, evaluate
-from .base import _TYPE_CONVERSION, array_header_type, runtime_type_alignment, runtime_type_size
+from ..util import log, DebuggerException
+from ..util.kotlin_object_to_cstring import DESCRIBE_BATCH_SIZE
+from ..util.log import WARNING
+from ..util.memory import create_data, read_memory, unpack_pointers
+from .base import _PRIMITIVE_BASIC_TYPES, _TYPE_CONVERSION, RT_OBJECT, array_data_offset, array_header_struct, \
+    array_header_type, runtime_type_alignment, runtime_type_size
+from .layout import TypeLayout, get_type_layout
+from .paging import ChildPages
+from .preview import PreviewBudget, array_preview
 from .KonanBaseSyntheticProvider import KonanBaseSyntheticProvider
 
+# Elements are read in pages of this many elements from the first one shown, one ReadMemory per page.
+ARRAY_PAGE_SIZE = 0x1000
+
 
 class KonanArraySyntheticProvider(KonanBaseSyntheticProvider):
-    def __init__(self, valobj: lldb.SBValue, type_info: lldb.value):
+    def __init__(self, valobj: lldb.SBValue, type_info: lldb.value, owner: Optional[lldb.SBValue] = None):
+        # The value shown for the array, e.g. the list it backs. Its name tells which range of the elements it holds.
+        self._owner = owner
         self._children_count = 0
+        self._child_pages: ChildPages = None  # type: ignore
+        self._layout: TypeLayout = None  # type: ignore
+        self._element_type = 0
+        self._element_size = 0
+        self._data_address = 0
+        self._element_sbtype: Optional[lldb.SBType] = None
+        self._pages: Dict[int, memoryview] = {}
+        self._prefetched_windows: Set[int] = set()
 
         super().__init__(valobj.Cast(array_header_type()), type_info)
+        if self._owner is None:
+            self._owner = self._valobj
 
     def update(self) -> bool:
         super().update()
-        self._children_count = int(self._val.count_)
+        self._layout = get_type_layout(self._process, self._type_info)
+
+        header_layout = array_header_struct()
+        header = header_layout.unpack(read_memory(self._process, self._valobj.unsigned, header_layout.size))
+        self._children_count = header['count_']
+        self._child_pages = ChildPages.of(self._owner, self._children_count)
+
+        self._element_type = -self._layout.fields_count
+        self._element_size = runtime_type_size()[self._element_type]
+        self._data_address = self._valobj.unsigned + array_data_offset(runtime_type_alignment()[self._element_type])
+
+        basic_type = _PRIMITIVE_BASIC_TYPES.get(self._element_type)
+        self._element_sbtype = None if basic_type is None else self._valobj.GetTarget().GetBasicType(basic_type)
+        self._pages = {}
+        self._prefetched_windows = set()
         return False
 
+    @property
+    def child_pages(self) -> ChildPages:
+        return self._child_pages
+
     def num_children(self):
-        return self._children_count
+        return len(self._child_pages)
 
     def has_children(self):
         return True
 
     def get_child_index(self, name):
         log(lambda: "KonanArraySyntheticProvider::get_child_index({})".format(name))
-        index = int(name.removeprefix('[').removesuffix(']'))
-        return index if (0 <= index < self._children_count) else -1
+        return self._child_pages.child_index(name)
+
+    def get_child_at_index(self, child_index):
+        index = self._child_pages.element_index(child_index)
+        if index is None:
+            return self._child_pages.range_node(self._owner, child_index)
 
-    def get_child_at_index(self, index):
+        name = '[{}]'.format(index)
+        if self._element_sbtype is not None:
+            try:
+                return self._primitive_child_at_index(index, name)
+            except DebuggerException as e:
+                log(lambda: "KonanArraySyntheticProvider: bulk read failed ({})".format(e.msg), WARNING)
+        else:
+            self.prefetch_window_descriptions(index // DESCRIBE_BATCH_SIZE)
+
+        address = self._data_address + index * self._element_size
+        return _TYPE_CONVERSION[self._element_type](self, self._valobj, address, name)
 
-        value_type = -int(self._type_info.extendedInfo_.fieldsCount_)
-        address = self._valobj.unsigned + self._align_up(
-            self._valobj.type.GetPointeeType().GetByteSize(),
-            int(runtime_type_alignment()[value_type])
-        ) + index * int(runtime_type_size()[value_type])
-        return _TYPE_CONVERSION[int(value_type)](self, self._valobj, address, '[{}]'.format(index))
+    @property
+    def data_address(self) -> int:
+        return self._data_address
 
     def to_string(self):
-        if self._children_count == 1:
+        try:
+            return array_preview(
+                self._process,
+                self._data_address,
+                self._element_type,
+                self._child_pages.start,
+                self._child_pages.count,
+                PreviewBudget(),
+            )
+        except DebuggerException as e:
+            log(lambda: "KonanArraySyntheticProvider: preview failed ({})".format(e.msg), WARNING)
+
+        if self._child_pages.count == 1:
             return '1 value'
         else:
-            return '{} values'.format(self._children_count)
+            return '{} values'.format(self._child_pages.count)
+
+    def element_bytes(self, index: int) -> memoryview:
+        """Raw bytes of the element at `index`, sliced out of the page it was read with."""
+        page_index, page_offset = divmod(index - self._child_pages.start, ARRAY_PAGE_SIZE)
+        start = page_offset * self._element_size
+        return self._page(page_index)[start:start + self._element_size]
+
+    def _primitive_child_at_index(self, index: int, name: str) -> lldb.SBValue:
+        data = create_data(self._process, self.element_bytes(index).tobytes())
+        return self._valobj.CreateValueFromData(name, data, self._element_sbtype)
+
+    def prefetch_window_descriptions(self, window: int):
+        """Elements are shown in order, so object elements are described a window of DESCRIBE_BATCH_SIZE at a time."""
+        if self._element_type != RT_OBJECT or window in self._prefetched_windows:
+            return
+        self._prefetched_windows.add(window)
+
+        # Within the elements of this range node, not of the whole array.
+        first = max(window * DESCRIBE_BATCH_SIZE, self._child_pages.start)
+        count = min((window + 1) * DESCRIBE_BATCH_SIZE, self._child_pages.end) - first
+        try:
+            data = read_memory(
+                self._process,
+                self._data_address + first * self._element_size,
+                count * self._element_size,
+            )
+        except DebuggerException:
+            return
+        self.prefetch_descriptions(unpack_pointers(self._process, data, count))
 
-    @staticmethod
-    def _align_up(size, alignment):
-        return (size + alignment - 1) & ~(alignment - 1)
+    def _page(self, page_index: int) -> memoryview:
+        page = self._pages.get(page_index)
+        if page is None:
+            first = self._child_pages.start + page_index * ARRAY_PAGE_SIZE
+            count = min(ARRAY_PAGE_SIZE, self._child_pages.end - first)
+            page = memoryview(read_memory(
+                self._process,
+                self._data_address + first * self._element_size,
+                count * self._element_size,
+            ))
+            self._pages[page_index] = page
+        return page
@@ -1,6 +1,14 @@
+from typing import Iterable
+
 import lldb
 
-from ..util import DebuggerException, kotlin_object_to_string
+from .base import type_info_address
+from .classify import is_plain_object
+from .type_name import get_type_name_at
+from ..util import DebuggerException, log
+from ..util.kotlin_object_to_cstring import kotlin_object_description, prefetch_object_descriptions
+from ..util.log import WARNING
+from ..util.memory import read_cstring
 
 
 class KonanBaseSyntheticProvider(object):
@@ -10,31 +18,29 @@ class KonanBaseSyntheticProvider(object):
         self._valobj: lldb.SBValue = valobj
         self._val: lldb.value = lldb.value(valobj.GetNonSyntheticValue())
         self._type_info: lldb.value = type_info
-        self._process: lldb.SBProcess = lldb.debugger.GetSelectedTarget().process
+        self._process: lldb.SBProcess = valobj.GetProcess()
 
     def update(self) -> bool:
         return False
 
     def get_type_name(self) -> str:
-        package_name = kotlin_object_to_string(self._process, self._type_info.packageName_.sbvalue.unsigned)
-        relative_name = kotlin_object_to_string(self._process, self._type_info.relativeName_.sbvalue.unsigned)
-        return '{}.{}'.format(package_name, relative_name)
+        return get_type_name_at(self._process, type_info_address(self._type_info))
 
     def read_cstring(self, address: int) -> str:
-        error = lldb.SBError()
-        result = self._process.ReadCStringFromMemory(
-            address,
-            0x1000,
-            error,
-        )
-        if not error.Success():
-            raise DebuggerException(
-                'Could not read cstring at address {:#x} (error: {})'.format(
-                    address,
-                    error.description,
-                )
-            )
-        return result
+        return read_cstring(self._process, address)
 
     def to_string(self):
-        return kotlin_object_to_string(self._process, self._valobj.unsigned)
+        return kotlin_object_description(self._process, self._valobj.unsigned)
+
+    def prefetch_descriptions(self, object_addrs: Iterable[int]):
+        """Describes the objects about to be shown as children in one go. Only plain objects need the runtime, strings
+        and collections are formatted from memory."""
+        try:
+            plain_objects = [
+                address for address in object_addrs
+                if is_plain_object(self._process, address)
+            ]
+            prefetch_object_descriptions(self._process, plain_objects)
+        except DebuggerException as e:
+            log(lambda: "prefetch_descriptions failed: {}".format(e.msg), WARNING)
+
@@ -2,15 +2,13 @@ from typing import Optional
 
 import lldb
 
-from .base import get_type_info
+from .base import LIST_BACKING_FIELDS, get_type_info
 from ..util import log, DebuggerException
 from .KonanObjectSyntheticProvider import KonanObjectSyntheticProvider
 from .KonanArraySyntheticProvider import KonanArraySyntheticProvider
 
 
 class KonanListSyntheticProvider(KonanObjectSyntheticProvider):
-    __possible_backing_properties = {'backing', '$this_asList', 'backingArray'}
-
     def __init__(self, valobj: lldb.SBValue, type_info: lldb.value):
         self._backing: KonanArraySyntheticProvider = None  # type: ignore
 
@@ -22,7 +20,7 @@ class KonanListSyntheticProvider(KonanObjectSyntheticProvider):
         if self._backing is None:
             backing: Optional[KonanArraySyntheticProvider] = None
             for index, name in enumerate(self._children_names):
-                if name in KonanListSyntheticProvider.__possible_backing_properties:
+                if name in LIST_BACKING_FIELDS:
                     backing = self._create_backing(index, name)
                     if backing is not None:
                         break
@@ -63,4 +61,4 @@ class KonanListSyntheticProvider(KonanObjectSyntheticProvider):
         if child_type_info is None:
             return None
         else:
-            return KonanArraySyntheticProvider(backing_value, child_type_info)
+            return KonanArraySyntheticProvider(backing_value, child_type_info, owner=self._valobj)
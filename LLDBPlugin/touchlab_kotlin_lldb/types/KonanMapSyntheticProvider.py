@@ -4,9 +4,12 @@ import lldb
 
 from .KonanArraySyntheticProvider import KonanArraySyntheticProvider
 from .KonanObjectSyntheticProvider import KonanObjectSyntheticProvider
-from .base import get_type_info
-from ..util import DebuggerException
-from ..util.expression import EXPRESSION_OPTIONS
+from .base import MAP_KEYS_FIELD, MAP_VALUES_FIELD, get_type_info, map_entry_type
+from .preview import PreviewBudget, map_preview
+from ..util import DebuggerException, log
+from ..util.kotlin_object_to_cstring import DESCRIBE_BATCH_SIZE
+from ..util.log import WARNING
+from ..util.memory import create_data
 
 
 class KonanMapSyntheticProvider(KonanObjectSyntheticProvider):
@@ -24,9 +27,9 @@ class KonanMapSyntheticProvider(KonanObjectSyntheticProvider):
             values: Optional[KonanArraySyntheticProvider] = None
 
             for index, name in enumerate(self._children_names):
-                if name == 'keysArray':
+                if name == MAP_KEYS_FIELD:
                     keys = self._create_backing(index, name)
-                elif name == 'valuesArray':
+                elif name == MAP_VALUES_FIELD:
                     values = self._create_backing(index, name)
 
             if keys is None or values is None:
@@ -49,22 +52,41 @@ class KonanMapSyntheticProvider(KonanObjectSyntheticProvider):
         return True
 
     def get_child_index(self, name):
-        # TODO: Not correct, we need to look at the values which this doesn't do
-        return self._keys.get_child_index(name)
+        return self._keys.child_pages.child_index(name)
 
-    def get_child_at_index(self, index):
-        lldb.debugger.GetSelectedTarget().GetProcess()
-        return self._valobj.CreateValueFromExpression(
+    def get_child_at_index(self, child_index):
+        index = self._keys.child_pages.element_index(child_index)
+        if index is None:
+            return self._keys.child_pages.range_node(self._valobj, child_index)
+
+        window = index // DESCRIBE_BATCH_SIZE
+        self._keys.prefetch_window_descriptions(window)
+        self._values.prefetch_window_descriptions(window)
+
+        # MapEntry is just the key pointer followed by the value pointer, so the entry is assembled from the bytes of
+        # both backing arrays instead of compiling an expression for every entry.
+        entry_bytes = self._keys.element_bytes(index).tobytes() + self._values.element_bytes(index).tobytes()
+        return self._valobj.CreateValueFromData(
             f'[{index}]',
-            '(MapEntry){{ (ObjHeader*){:#x}, (ObjHeader*){:#x} }};'.format(
-                self._keys.get_child_at_index(index).unsigned,
-                self._values.get_child_at_index(index).unsigned,
-            ),
-            EXPRESSION_OPTIONS,
+            create_data(self._process, entry_bytes),
+            map_entry_type(),
         )
 
     def to_string(self):
-        children_count = self._keys.num_children()
+        child_pages = self._keys.child_pages
+        try:
+            return map_preview(
+                self._process,
+                self._keys.data_address,
+                self._values.data_address,
+                child_pages.start,
+                child_pages.count,
+                PreviewBudget(),
+            )
+        except DebuggerException as e:
+            log(lambda: "KonanMapSyntheticProvider: preview failed ({})".format(e.msg), WARNING)
+
+        children_count = child_pages.count
         if children_count == 1:
             return '1 key/value pair'
         else:
@@ -81,4 +103,4 @@ class KonanMapSyntheticProvider(KonanObjectSyntheticProvider):
         if child_type_info is None:
             return None
         else:
-            return KonanArraySyntheticProvider(backing_value, child_type_info)
+            return KonanArraySyntheticProvider(backing_value, child_type_info, owner=self._valobj)
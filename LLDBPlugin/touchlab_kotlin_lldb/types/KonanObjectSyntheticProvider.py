@@ -1,28 +1,29 @@
 import lldb
 
 
-from .base import _TYPE_CONVERSION, type_info_type
+from .base import _TYPE_CONVERSION, RT_OBJECT
+from .layout import TypeLayout, get_type_layout
 from .KonanBaseSyntheticProvider import KonanBaseSyntheticProvider
+from ..util import DebuggerException
+from ..util.memory import pointer_size, read_memory, unpack_pointers
 
 
 class KonanObjectSyntheticProvider(KonanBaseSyntheticProvider):
     def __init__(self, valobj: lldb.SBValue, type_info: lldb.value):
         self._children_count = 0
         self._children_names = []
+        self._layout: TypeLayout = None  # type: ignore
         self._was_updated = False
+        self._descriptions_prefetched = False
 
         super().__init__(valobj, type_info)
 
     def update(self) -> bool:
         self._was_updated = True
-        self._children_count = int(self._type_info.extendedInfo_.fieldsCount_)
-        if self._children_count < 0:
-            self._children_count = 0
-        if self._children_count > 0:
-            field_names = self._type_info.extendedInfo_.fieldNames_
-            self._children_names = [
-                self.read_cstring(int(field_names[i])) for i in range(self._children_count)
-            ]
+        self._layout = get_type_layout(self._process, self._type_info)
+        self._children_count = max(self._layout.fields_count, 0)
+        self._children_names = self._layout.field_names
+        self._descriptions_prefetched = False
         return False
 
     def num_children(self):
@@ -32,13 +33,31 @@ class KonanObjectSyntheticProvider(KonanBaseSyntheticProvider):
         return True
 
     def get_child_index(self, name):
-        # if self._children is None:
-        return self._children_names.index(name)
+        return self._layout.field_indices.get(name, -1)
 
     def get_child_at_index(self, index):
-        value_type = self._type_info.extendedInfo_.fieldTypes_[index]
+        if not self._descriptions_prefetched:
+            self._descriptions_prefetched = True
+            self._prefetch_field_descriptions()
+
+        value_type = self._layout.field_types[index]
         address = self.get_child_address_at_index(index)
-        return _TYPE_CONVERSION[int(value_type)](self, self._valobj, address, self._children_names[index])
+        return _TYPE_CONVERSION[value_type](self, self._valobj, address, self._children_names[index])
 
     def get_child_address_at_index(self, index):
-        return self._valobj.unsigned + int(self._type_info.extendedInfo_.fieldOffsets_[index])
+        return self._valobj.unsigned + self._layout.field_offsets[index]
+
+    def _prefetch_field_descriptions(self):
+        offsets = [
+            self._layout.field_offsets[index]
+            for index in range(self._children_count)
+            if self._layout.field_types[index] == RT_OBJECT
+        ]
+        if not offsets:
+            return
+        # All reference fields are read with a single read of the object body.
+        try:
+            body = read_memory(self._process, self._valobj.unsigned, max(offsets) + pointer_size(self._process))
+        except DebuggerException:
+            return
+        self.prefetch_descriptions(unpack_pointers(self._process, body, 1, offset)[0] for offset in offsets)
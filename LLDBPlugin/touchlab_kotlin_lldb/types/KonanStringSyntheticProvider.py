@@ -1,8 +1,11 @@
 import lldb
 
-from .base import array_header_type
+from .base import ELLIPSIS, array_header_type
+from .kotlin_string import STRING_CHAR_SIZE, read_kotlin_string
+from .layout import get_type_layout
 from .KonanBaseSyntheticProvider import KonanBaseSyntheticProvider
-from ..util import kotlin_object_to_string, log
+from ..util import DebuggerException, kotlin_object_to_string, log
+from ..util.log import WARNING
 
 
 class KonanStringSyntheticProvider(KonanBaseSyntheticProvider):
@@ -25,8 +28,24 @@ class KonanStringSyntheticProvider(KonanBaseSyntheticProvider):
         return None
 
     def to_string(self):
-        s = kotlin_object_to_string(self._process, self._valobj.unsigned)
+        s = self._read_from_memory()
+        if s is None:
+            s = kotlin_object_to_string(self._process, self._valobj.unsigned)
         if s is None:
             return self._valobj.GetValue()
         else:
             return '"{}"'.format(s)
+
+    def _read_from_memory(self):
+        try:
+            # Anything other than plain UTF-16 storage is left to the runtime to decode.
+            if get_type_layout(self._process, self._type_info).instance_size != -STRING_CHAR_SIZE:
+                return None
+            s, length = read_kotlin_string(self._process, self._valobj.unsigned)
+        except DebuggerException as e:
+            log(lambda: "KonanStringSyntheticProvider: falling back to the runtime ({})".format(e.msg), WARNING)
+            return None
+
+        if len(s) < length:
+            return s + ELLIPSIS
+        return s
@@ -1,18 +1,19 @@
-from typing import Optional
+from typing import Optional, Tuple
 
 import lldb
 
-from ..util import strip_quotes, log, evaluate
+from ..util import log, evaluate
+from ..util.expression import evaluation_target
+from ..util.memory import StructLayout, read_pointer
 from ..cache import LLDBCache
 
-KOTLIN_OBJ_HEADER_TYPE = lldb.SBTypeNameSpecifier('ObjHeader', lldb.eMatchTypeNormal)
-KOTLIN_ARRAY_HEADER_TYPE = lldb.SBTypeNameSpecifier('ArrayHeader', lldb.eMatchTypeNormal)
-KOTLIN_CATEGORY = 'Kotlin'
+# Marks anything shown cut short: truncated strings, previews and degraded summaries.
+ELLIPSIS = '…'
 
 _TYPE_CONVERSION = [
     # INVALID
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeVoid).GetPointerType()
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeVoid).GetPointerType()
     ),
     # OBJECT
     lambda obj, value, address, name: value.synthetic_child_from_address(
@@ -20,40 +21,58 @@ _TYPE_CONVERSION = [
     ),
     # INT8
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeChar)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeChar)
     ),
     # INT16
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeShort)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeShort)
     ),
     # INT32
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeInt)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeInt)
     ),
     # INT64
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeLongLong)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeLongLong)
     ),
     # FLOAT32
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeFloat)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeFloat)
     ),
     # FLOAT64
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeDouble)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeDouble)
     ),
     # NATIVE_PTR
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeVoid).GetPointerType()
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeVoid).GetPointerType()
     ),
     # BOOLEAN
     lambda obj, value, address, name: value.synthetic_child_from_address(
-        name, address, lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeBool)
+        name, address, value.GetTarget().GetBasicType(lldb.eBasicTypeBool)
     ),
     # TODO: VECTOR128
     lambda obj, value, address, name: None,
 ]
 
+RT_OBJECT = 1
+
+# Fields holding the elements of the collection classes.
+LIST_BACKING_FIELDS = ('backing', '$this_asList', 'backingArray')
+MAP_KEYS_FIELD = 'keysArray'
+MAP_VALUES_FIELD = 'valuesArray'
+
+# Runtime types whose values can be created straight from their bytes.
+_PRIMITIVE_BASIC_TYPES = {
+    2: lldb.eBasicTypeChar,  # INT8
+    3: lldb.eBasicTypeShort,  # INT16
+    4: lldb.eBasicTypeInt,  # INT32
+    5: lldb.eBasicTypeLongLong,  # INT64
+    6: lldb.eBasicTypeFloat,  # FLOAT32
+    7: lldb.eBasicTypeDouble,  # FLOAT64
+    9: lldb.eBasicTypeBool,  # BOOLEAN
+}
+
 
 def single_pointer(valobj: lldb.SBValue) -> lldb.SBValue:
     non_synthetic_value = valobj.GetNonSyntheticValue()
@@ -76,10 +95,6 @@ def obj_header_pointer(valobj: lldb.SBValue) -> lldb.SBValue:
     return single_pointer(valobj).Cast(obj_header_type())
 
 
-def get_runtime_type(variable):
-    return strip_quotes(evaluate("(char *)Konan_DebugGetTypeName({:#x})", variable.unsigned).summary)
-
-
 def type_info_type() -> lldb.SBType:
     self = LLDBCache.instance()
     if self._type_info_type is None:
@@ -87,6 +102,43 @@ def type_info_type() -> lldb.SBType:
     return self._type_info_type
 
 
+def extended_type_info_type() -> lldb.SBType:
+    self = LLDBCache.instance()
+    if self._extended_type_info_type is None:
+        self._extended_type_info_type = evaluate('(ExtendedTypeInfo*)0x0').GetNonSyntheticValue().type
+    return self._extended_type_info_type
+
+
+def type_info_struct() -> StructLayout:
+    self = LLDBCache.instance()
+    if self._type_info_struct is None:
+        self._type_info_struct = StructLayout(type_info_type().GetPointeeType())
+    return self._type_info_struct
+
+
+def extended_type_info_struct() -> StructLayout:
+    self = LLDBCache.instance()
+    if self._extended_type_info_struct is None:
+        self._extended_type_info_struct = StructLayout(extended_type_info_type().GetPointeeType())
+    return self._extended_type_info_struct
+
+
+def array_header_struct() -> StructLayout:
+    self = LLDBCache.instance()
+    if self._array_header_struct is None:
+        self._array_header_struct = StructLayout(array_header_type().GetPointeeType())
+    return self._array_header_struct
+
+
+def array_data_offset(element_alignment: int) -> int:
+    header_size = array_header_struct().size
+    return (header_size + element_alignment - 1) & ~(element_alignment - 1)
+
+
+def type_info_address(type_info: lldb.value) -> int:
+    return type_info.sbvalue.unsigned
+
+
 def obj_header_type() -> lldb.SBType:
     self = LLDBCache.instance()
     if self._obj_header_type is None:
@@ -101,22 +153,31 @@ def array_header_type() -> lldb.SBType:
     return self._array_header_type
 
 
-def runtime_type_size() -> lldb.value:
+def map_entry_type() -> lldb.SBType:
+    self = LLDBCache.instance()
+    if self._map_entry_type is None:
+        self._map_entry_type = evaluate('(MapEntry*)0x0').GetNonSyntheticValue().type.GetPointeeType()
+    return self._map_entry_type
+
+
+def runtime_type_size() -> Tuple[int, ...]:
     self = LLDBCache.instance()
     if self._runtime_type_size is None:
-        self._runtime_type_size = lldb.value(evaluate('runtimeTypeSize'))
+        self._runtime_type_size = _int_array(evaluate('runtimeTypeSize'))
     return self._runtime_type_size
 
 
-def runtime_type_alignment() -> lldb.value:
+def runtime_type_alignment() -> Tuple[int, ...]:
     self = LLDBCache.instance()
     if self._runtime_type_alignment is None:
-        self._runtime_type_alignment = lldb.value(
-            evaluate('runtimeTypeAlignment')
-        )
+        self._runtime_type_alignment = _int_array(evaluate('runtimeTypeAlignment'))
     return self._runtime_type_alignment
 
 
+def _int_array(value: lldb.SBValue) -> Tuple[int, ...]:
+    return tuple(value.GetChildAtIndex(i).signed for i in range(value.GetNumChildren()))
+
+
 def _symbol_loaded_address(name: str, target: lldb.SBTarget) -> int:
     candidates = target.FindSymbols(name)
     # take first
@@ -129,7 +190,7 @@ def _symbol_loaded_address(name: str, target: lldb.SBTarget) -> int:
 
 
 def _get_konan_class_symbol_value(cls_name: str) -> lldb.value:
-    target = lldb.debugger.GetSelectedTarget()
+    target = evaluation_target()
     address = _symbol_loaded_address(f'kclass:{cls_name}', target)
     return lldb.value(
         target.CreateValueFromAddress(
@@ -176,14 +237,14 @@ class KnownValueType:
         return KnownValueType.entries[raw]
 
 
-def void_type() -> lldb.SBType:
-    return lldb.debugger.GetSelectedTarget().GetBasicType(lldb.eBasicTypeVoid)
+def void_type(target: lldb.SBTarget) -> lldb.SBType:
+    return target.GetBasicType(lldb.eBasicTypeVoid)
 
 
 def get_type_info(obj: lldb.SBValue) -> Optional[lldb.value]:
     possible_type_info = obj.CreateValueFromAddress(
         "typeInfoOrMeta_",
-        obj.Cast(void_type().GetPointerType().GetPointerType()).Dereference().unsigned & ~0x3,
+        obj.Cast(void_type(obj.GetTarget()).GetPointerType().GetPointerType()).Dereference().unsigned & ~0x3,
         type_info_type(),
     )
     verification = possible_type_info.Cast(possible_type_info.type.GetPointerType()).Dereference()
@@ -192,3 +253,13 @@ def get_type_info(obj: lldb.SBValue) -> Optional[lldb.value]:
         return lldb.value(possible_type_info)
     else:
         return None
+
+
+def get_type_info_address(process: lldb.SBProcess, obj_address: int) -> int:
+    """Memory-only variant of `get_type_info`, returns 0 when there is no valid TypeInfo behind the object."""
+    if obj_address == 0:
+        return 0
+    type_info = read_pointer(process, read_pointer(process, obj_address) & ~0x3)
+    if type_info != 0 and read_pointer(process, type_info) == type_info:
+        return type_info
+    return 0
@@ -0,0 +1,68 @@
+import lldb
+
+from .base import (
+    KnownValueType, get_string_symbol, get_list_symbol, get_map_symbol, get_type_info_address, type_info_address,
+)
+from .layout import TypeLayout, get_type_layout_at
+from .module_cache import module_state, remember_value_type
+from ..cache import LLDBCache
+from ..util import perf
+
+TF_INTERFACE = 1 << 2
+
+
+def _is_subtype(process: lldb.SBProcess, obj_layout: TypeLayout, type_info: lldb.value) -> bool:
+    address = type_info_address(type_info)
+    if address == 0:
+        return False
+
+    # If it is an interface - check in the set of implemented interfaces.
+    if (get_type_layout_at(process, address).flags & TF_INTERFACE) != 0:
+        return address in obj_layout.implemented_interfaces
+
+    layout = obj_layout
+    while layout.address != address:
+        if layout.super_type == 0:
+            return False
+        layout = get_type_layout_at(process, layout.super_type)
+    return True
+
+
+def _classify(process: lldb.SBProcess, layout: TypeLayout) -> int:
+    if _is_subtype(process, layout, get_string_symbol()):
+        return KnownValueType.STRING
+    elif _is_subtype(process, layout, get_list_symbol()):
+        return KnownValueType.LIST
+    elif _is_subtype(process, layout, get_map_symbol()):
+        return KnownValueType.MAP
+    elif layout.instance_size < 0 and layout.fields_count < 0:
+        # Without the element type from the ExtendedTypeInfo the elements can't be read.
+        return KnownValueType.ARRAY
+    else:
+        return KnownValueType.ANY
+
+
+def classify_type(type_info: lldb.value) -> int:
+    """Returns the KnownValueType of the given TypeInfo, computed once per type."""
+    return classify_type_at(type_info.sbvalue.GetProcess(), type_info_address(type_info))
+
+
+def classify_type_at(process: lldb.SBProcess, address: int) -> int:
+    self = LLDBCache.instance()
+    value_type = self._known_value_types.get(address)
+    perf.hit('known_value_type', value_type is not None)
+    if value_type is None:
+        state = module_state(process, address)
+        value_type = self._known_value_types.get(address)
+        if value_type is None:
+            value_type = _classify(process, get_type_layout_at(process, address))
+            self._known_value_types[address] = value_type
+            if state is not None:
+                remember_value_type(state, address, value_type)
+    return value_type
+
+
+def is_plain_object(process: lldb.SBProcess, address: int) -> bool:
+    """Whether the object needs the runtime to be described, unlike strings and collections that are read from memory."""
+    type_info_addr = get_type_info_address(process, address)
+    return type_info_addr != 0 and classify_type_at(process, type_info_addr) == KnownValueType.ANY
@@ -0,0 +1,175 @@
+"""Kotlin modules of the debugged processes, and the formatters for the ObjC classes they export."""
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import lldb
+
+from ..util.log import log
+from ..util.symbol_index import get_symbol_index, index_module_in_background, module_key
+
+KOTLIN_OBJ_HEADER_TYPE_NAME = 'ObjHeader'
+KOTLIN_ARRAY_HEADER_TYPE_NAME = 'ArrayHeader'
+KOTLIN_OBJ_HEADER_TYPE = lldb.SBTypeNameSpecifier(KOTLIN_OBJ_HEADER_TYPE_NAME, lldb.eMatchTypeNormal)
+KOTLIN_ARRAY_HEADER_TYPE = lldb.SBTypeNameSpecifier(KOTLIN_ARRAY_HEADER_TYPE_NAME, lldb.eMatchTypeNormal)
+KOTLIN_CATEGORY = 'Kotlin'
+KONAN_INIT_PREFIX = '_Konan_init_'
+KONAN_INIT_SUFFIX = '_kexe'
+# Only binaries with the Kotlin/Native runtime linked in have this one.
+KONAN_RUNTIME_SYMBOL = 'Konan_DebugBuffer'
+KOTLIN_BASE_CLASS_RO_SYMBOL = '_OBJC_CLASS_RO_$_KotlinBase'
+# Offset of the `name` field in `class_ro_t`.
+CLASS_RO_NAME_OFFSET = 6 * 4
+# Libraries of the OS (on the host and inside simulator runtimes), never Kotlin.
+_SYSTEM_PATHS = ('/usr/lib/', '/System/Library/')
+
+# Modules loaded since the last stop, collected by the event listener.
+_pending_modules: Deque[Tuple[lldb.SBTarget, lldb.SBModule]] = deque()
+_inspected_modules: Set[str] = set()
+# Every Kotlin module ever loaded, by `module_key`.
+_kotlin_module_keys: Set[str] = set()
+
+# Type names are matched against these sets, so the cost of a match doesn't depend on the number of modules.
+_module_names: Set[str] = set()
+_objc_prefixes_by_length: Dict[int, Set[str]] = {}
+
+# Summary and synthetic the ObjC classes are registered with, and the regex they are registered under when LLDB can't
+# call back into Python to match types.
+_formatters: Optional[Tuple[lldb.SBTypeSummary, lldb.SBTypeSynthetic]] = None
+_registered_regex: Optional[lldb.SBTypeNameSpecifier] = None
+
+
+def scan_loaded_modules(debugger: lldb.SBDebugger):
+    """Picks the Kotlin modules loaded before the plugin, e.g. when attaching."""
+    for i in range(debugger.GetNumTargets()):
+        target = debugger.GetTargetAtIndex(i)
+        for module in target.modules:
+            note_loaded_module(target, module)
+
+
+def kotlin_modules_loaded() -> bool:
+    return bool(_kotlin_module_keys)
+
+
+def is_kotlin_module(module: lldb.SBModule) -> bool:
+    return module_key(module) in _kotlin_module_keys
+
+
+def configure_objc_types(debugger: lldb.SBDebugger, matcher_name: str, summary_name: str, synthetic_name: str):
+    """Registers the formatters of all Kotlin ObjC classes once, Kotlin modules found later only extend the matcher."""
+    global _formatters
+    _formatters = (
+        lldb.SBTypeSummary.CreateWithFunctionName(summary_name, lldb.eTypeOptionHideValue),
+        lldb.SBTypeSynthetic.CreateWithClassName(synthetic_name),
+    )
+    if _supports_match_callbacks():
+        _add_formatters(
+            debugger.GetCategory(KOTLIN_CATEGORY), lldb.SBTypeNameSpecifier(matcher_name, lldb.eFormatterMatchCallback)
+        )
+
+
+def is_kotlin_objc_type(sbtype: lldb.SBType, internal_dict) -> bool:
+    """Type matcher of the Kotlin ObjC class formatters."""
+    name = sbtype.GetName()
+    if name is None:
+        return False
+    module_name, dot, _ = name.partition('.')
+    if dot and module_name in _module_names:
+        return True
+    for length, prefixes in _objc_prefixes_by_length.items():
+        if name[:length] in prefixes:
+            return True
+    return False
+
+
+def note_loaded_module(target: lldb.SBTarget, module: lldb.SBModule):
+    """Called by the event listener for every loaded module, picks the Kotlin ones for the next stop."""
+    path = module.GetFileSpec().fullpath or ''
+    if any(system_path in path for system_path in _SYSTEM_PATHS):
+        return
+    if not module.FindSymbol(KONAN_RUNTIME_SYMBOL).IsValid():
+        return
+    _kotlin_module_keys.add(module_key(module))
+    # Its `_Konan_init_` symbols are needed at the next stop.
+    index_module_in_background(module)
+    _pending_modules.append((target, module))
+
+
+def register_loaded_kotlin_modules(debugger: lldb.SBDebugger):
+    """Called while stopped, as reading the ObjC class prefix of a module needs its process."""
+    changed = False
+    while _pending_modules:
+        target, module = _pending_modules.popleft()
+        key = module_key(module)
+        if key in _inspected_modules:
+            continue
+        _inspected_modules.add(key)
+        changed = _inspect_module(target, module) or changed
+
+    if changed and not _supports_match_callbacks():
+        _register_combined_regex(debugger.GetCategory(KOTLIN_CATEGORY))
+
+
+def _inspect_module(target: lldb.SBTarget, module: lldb.SBModule) -> bool:
+    names = [
+        name[len(KONAN_INIT_PREFIX):].removesuffix(KONAN_INIT_SUFFIX)
+        for name in get_symbol_index(module).names_with_prefix(KONAN_INIT_PREFIX)
+    ]
+    names = [name for name in names if name and name != 'stdlib']
+    objc_prefix = _objc_class_prefix(target, module)
+    log(lambda: "Kotlin module {}: {}, ObjC prefix {}".format(module.GetFileSpec(), names, objc_prefix))
+
+    changed = not _module_names.issuperset(names)
+    _module_names.update(names)
+    if objc_prefix:
+        prefixes = _objc_prefixes_by_length.setdefault(len(objc_prefix), set())
+        changed = changed or objc_prefix not in prefixes
+        prefixes.add(objc_prefix)
+    return changed
+
+
+def _objc_class_prefix(target: lldb.SBTarget, module: lldb.SBModule) -> Optional[str]:
+    """The exported `KotlinBase` class is named `<prefix>Base`, all classes of the module share the prefix."""
+    symbol = module.FindSymbol(KOTLIN_BASE_CLASS_RO_SYMBOL)
+    if not symbol.IsValid():
+        return None
+    process = target.GetProcess()
+    error = lldb.SBError()
+    name_address = process.ReadPointerFromMemory(
+        symbol.GetStartAddress().GetLoadAddress(target) + CLASS_RO_NAME_OFFSET, error
+    )
+    if not error.Success():
+        log(lambda: "Could not read the KotlinBase class name of {}: {}".format(module.GetFileSpec(), error))
+        return None
+    base_class_name = process.ReadCStringFromMemory(name_address, 128, error)
+    if not error.Success():
+        log(lambda: "Could not read the KotlinBase class name of {}: {}".format(module.GetFileSpec(), error))
+        return None
+    return base_class_name.removesuffix('Base')
+
+
+def _supports_match_callbacks() -> bool:
+    # Available since LLDB 16.
+    return hasattr(lldb, 'eFormatterMatchCallback')
+
+
+def _register_combined_regex(category: lldb.SBTypeCategory):
+    global _registered_regex
+    if _registered_regex is not None:
+        category.DeleteTypeSummary(_registered_regex)
+        category.DeleteTypeSynthetic(_registered_regex)
+
+    alternatives: List[str] = []
+    if _module_names:
+        alternatives.append('^({})\\.'.format('|'.join(sorted(_module_names))))
+    prefixes = sorted(prefix for group in _objc_prefixes_by_length.values() for prefix in group)
+    if prefixes:
+        alternatives.append('^({})'.format('|'.join(prefixes)))
+
+    _registered_regex = lldb.SBTypeNameSpecifier('|'.join(alternatives), lldb.eMatchTypeRegex)
+    _add_formatters(category, _registered_regex)
+
+
+def _add_formatters(category: lldb.SBTypeCategory, specifier: lldb.SBTypeNameSpecifier):
+    summary, synthetic = _formatters
+    category.AddTypeSummary(specifier, summary)
+    category.AddTypeSynthetic(specifier, synthetic)
@@ -0,0 +1,27 @@
+from typing import Tuple
+
+import lldb
+
+from .base import array_data_offset, array_header_struct
+from ..util.memory import read_memory
+
+# Strings are UTF-16 arrays.
+STRING_CHAR_SIZE = 2
+# Longer strings are only read and shown up to this many characters.
+MAX_STRING_LENGTH = 0x1000
+
+
+def read_kotlin_string(process: lldb.SBProcess, address: int, max_length: int = MAX_STRING_LENGTH) -> Tuple[str, int]:
+    """Decodes a kotlin.String straight from memory, without running any code in the inferior.
+
+    Returns the decoded prefix of at most `max_length` characters and the full length of the string."""
+    header_layout = array_header_struct()
+    header = header_layout.unpack(read_memory(process, address, header_layout.size))
+    length = header['count_']
+
+    data = read_memory(
+        process,
+        address + array_data_offset(STRING_CHAR_SIZE),
+        min(length, max_length) * STRING_CHAR_SIZE,
+    )
+    return data.decode('utf-16-le', errors='replace'), length
@@ -0,0 +1,109 @@
+import struct
+from typing import Dict, FrozenSet, List, Sequence
+
+import lldb
+
+from .base import extended_type_info_struct, type_info_address, type_info_struct
+from ..cache import LLDBCache
+from ..util import log, perf
+from ..util.memory import read_cstrings, read_memory, read_pointers
+
+
+class TypeLayout:
+    """Field layout of a Kotlin class, decoded once per TypeInfo and shared by all instances of that class."""
+
+    def __init__(
+            self,
+            address: int,
+            instance_size: int,
+            super_type: int,
+            flags: int,
+            implemented_interfaces: FrozenSet[int],
+            fields_count: int,
+            field_offsets: Sequence[int],
+            field_types: Sequence[int],
+            field_names: List[str],
+            package_name: int,
+            relative_name: int,
+    ):
+        self.address = address
+        # Negated element size for arrays and strings.
+        self.instance_size = instance_size
+        self.super_type = super_type
+        self.flags = flags
+        # Addresses of the TypeInfos of all implemented interfaces.
+        self.implemented_interfaces = implemented_interfaces
+        # Negated Konan_RuntimeType of the elements for array types.
+        self.fields_count = fields_count
+        self.field_offsets = field_offsets
+        self.field_types = field_types
+        self.field_names = field_names
+        self.field_indices: Dict[str, int] = {name: index for index, name in enumerate(field_names)}
+        # Addresses of the kotlin.String objects holding the package and class names, 0 when there are none.
+        self.package_name = package_name
+        self.relative_name = relative_name
+
+
+def get_type_layout(process: lldb.SBProcess, type_info: lldb.value) -> TypeLayout:
+    return get_type_layout_at(process, type_info_address(type_info))
+
+
+def get_type_layout_at(process: lldb.SBProcess, address: int) -> TypeLayout:
+    self = LLDBCache.instance()
+    layout = self._type_layouts.get(address)
+    perf.hit('type_layout', layout is not None)
+    if layout is None:
+        # Imported here, the module cache builds on the layouts.
+        from .module_cache import module_state, remember_type_layout
+        state = module_state(process, address)
+        layout = self._type_layouts.get(address)
+        if layout is None:
+            layout = _read_type_layout(process, address)
+            self._type_layouts[address] = layout
+            if state is not None:
+                remember_type_layout(state, layout)
+    return layout
+
+
+def _read_type_layout(process: lldb.SBProcess, address: int) -> TypeLayout:
+    type_info_layout = type_info_struct()
+    extended_info_layout = extended_type_info_struct()
+
+    type_info = type_info_layout.unpack(read_memory(process, address, type_info_layout.size))
+
+    implemented_interfaces = frozenset(
+        read_pointers(process, type_info['implementedInterfaces_'], type_info['implementedInterfacesCount_'])
+    )
+
+    fields_count = 0
+    field_offsets: Sequence[int] = ()
+    field_types: Sequence[int] = ()
+    field_names: List[str] = []
+    # Types without fields, or built without reflection info, have no ExtendedTypeInfo at all.
+    if type_info['extendedInfo_'] != 0:
+        extended_info = extended_info_layout.unpack(
+            read_memory(process, type_info['extendedInfo_'], extended_info_layout.size)
+        )
+        fields_count = extended_info['fieldsCount_']
+    if fields_count > 0:
+        field_offsets = struct.unpack(
+            '<{}i'.format(fields_count),
+            read_memory(process, extended_info['fieldOffsets_'], fields_count * 4),
+        )
+        field_types = read_memory(process, extended_info['fieldTypes_'], fields_count)
+        field_names = read_cstrings(process, read_pointers(process, extended_info['fieldNames_'], fields_count))
+
+    log(lambda: "_read_type_layout({:#x}): {}".format(address, field_names))
+    return TypeLayout(
+        address,
+        type_info['instanceSize_'],
+        type_info['superType_'],
+        type_info['flags_'],
+        implemented_interfaces,
+        fields_count,
+        field_offsets,
+        field_types,
+        field_names,
+        type_info['packageName_'],
+        type_info['relativeName_'],
+    )
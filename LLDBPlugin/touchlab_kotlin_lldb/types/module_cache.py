@@ -0,0 +1,183 @@
+import atexit
+import threading
+from typing import Dict, Optional, Set
+
+import lldb
+
+from .layout import TypeLayout
+from ..cache import LLDBCache
+from ..cache.persistent import ModuleTypes, StoredTypeLayout, load_types, save_types
+from ..util import log, perf
+from ..util.log import WARNING
+from ..util.symbol_index import load_address_slide
+
+# Snapshots of the module types waiting to be written by the writer thread, the latest one by module UUID.
+_pending_writes: Dict[str, ModuleTypes] = {}
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+class ModuleState:
+    """A module loaded in the current launch, with the slide to translate its stored types to load addresses."""
+
+    def __init__(self, target: lldb.SBTarget, key: str, slide: int, stored: ModuleTypes):
+        self.target = target
+        self.key = key
+        self.slide = slide
+        self.stored = stored
+        # Load addresses of the TypeInfos of this module that are cached.
+        self.type_infos: Set[int] = set()
+        # Whether `stored` has entries that haven't been written to disk yet.
+        self.dirty = False
+
+    def owns(self, address: int) -> bool:
+        if address == 0:
+            return True
+        module = self.target.ResolveLoadAddress(address).GetModule()
+        return module.IsValid() and module.GetUUIDString() == self.key
+
+    def load_address(self, file_address: int) -> int:
+        return file_address + self.slide if file_address != 0 else 0
+
+    def file_address(self, load_address: int) -> int:
+        return load_address - self.slide if load_address != 0 else 0
+
+
+def module_state(process: lldb.SBProcess, type_info_address: int) -> Optional[ModuleState]:
+    """Called when a TypeInfo isn't cached yet. The first time its module is seen in this launch, fills the caches
+    with everything known about the module's build, from an earlier launch or from disk."""
+    target = process.GetTarget()
+    module = target.ResolveLoadAddress(type_info_address).GetModule()
+    # Modules without a UUID can't be told apart from their next build.
+    if not module.IsValid() or not module.GetUUIDString():
+        return None
+
+    self = LLDBCache.instance()
+    key = module.GetUUIDString()
+    slide = load_address_slide(target, module)
+    state: Optional[ModuleState] = self._module_states.get(key)
+    if state is None or state.slide != slide:
+        stored = self._module_types.get(key)
+        if stored is None:
+            stored = perf.call_timed('persistent_cache.load', load_types, key) or ModuleTypes()
+            self._module_types[key] = stored
+        state = ModuleState(target, key, slide, stored)
+        self._module_states[key] = state
+        _populate(self, state)
+    state.type_infos.add(type_info_address)
+    return state
+
+
+def remember_type_layout(state: ModuleState, layout: TypeLayout):
+    references = [layout.super_type, layout.package_name, layout.relative_name, *layout.implemented_interfaces]
+    # A layout pointing into another module, or into the heap, would be wrong in the next launch.
+    if not all(state.owns(reference) for reference in references):
+        return
+    state.stored.layouts[state.file_address(layout.address)] = StoredTypeLayout(
+        address=state.file_address(layout.address),
+        instance_size=layout.instance_size,
+        super_type=state.file_address(layout.super_type),
+        flags=layout.flags,
+        implemented_interfaces=tuple(state.file_address(interface) for interface in layout.implemented_interfaces),
+        fields_count=layout.fields_count,
+        field_offsets=tuple(layout.field_offsets),
+        field_types=bytes(layout.field_types),
+        field_names=tuple(layout.field_names),
+        package_name=state.file_address(layout.package_name),
+        relative_name=state.file_address(layout.relative_name),
+    )
+    state.dirty = True
+
+
+def remember_value_type(state: ModuleState, type_info_address: int, value_type: int):
+    state.stored.value_types[state.file_address(type_info_address)] = value_type
+    state.dirty = True
+
+
+def remember_type_name(state: ModuleState, type_info_address: int, name: str):
+    state.stored.type_names[state.file_address(type_info_address)] = name
+    state.dirty = True
+
+
+def persist_module_caches():
+    """Has what was learned about the modules since the last call written out in the background, for the next sessions
+    on the same builds. Called at every stop, so only takes snapshots and leaves the disk to the writer thread."""
+    for cache in LLDBCache.partitions():
+        persist_module_states(cache)
+
+
+def persist_module_states(self: LLDBCache):
+    """Has what was learned about the modules of one target since the last call written out in the background."""
+    for state in self._module_states.values():
+        if self._runtime_type_size is not None and state.stored.runtime_type_size is None:
+            state.stored.runtime_type_size = self._runtime_type_size
+            state.stored.runtime_type_alignment = self._runtime_type_alignment
+            state.dirty = True
+
+        if state.dirty:
+            state.dirty = False
+            _write_in_background(state.key, state.stored.copy())
+
+
+def flush_module_caches():
+    """Waits until everything handed to the writer thread is on disk."""
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.join()
+
+
+# The writer is a daemon thread, LLDB quitting right after a stop must not cut it short.
+atexit.register(flush_module_caches)
+
+
+def _write_in_background(key: str, types: ModuleTypes):
+    global _writer
+    with _writer_lock:
+        _pending_writes[key] = types
+        if _writer is None:
+            _writer = threading.Thread(target=_write_pending, name='konan_lldb persistent cache', daemon=True)
+            _writer.start()
+
+
+def _write_pending():
+    global _writer
+    while True:
+        with _writer_lock:
+            if not _pending_writes:
+                _writer = None
+                return
+            key, types = _pending_writes.popitem()
+        log(lambda: "persist_module_caches: {} entries of {}".format(types.entry_count(), key))
+        try:
+            save_types(key, types)
+        except Exception as e:
+            log(lambda: "persist_module_caches: could not write {} ({})".format(key, e), WARNING)
+
+
+def _populate(self: LLDBCache, state: ModuleState):
+    for layout in state.stored.layouts.values():
+        address = state.load_address(layout.address)
+        state.type_infos.add(address)
+        self._type_layouts.setdefault(address, TypeLayout(
+            address,
+            layout.instance_size,
+            state.load_address(layout.super_type),
+            layout.flags,
+            frozenset(state.load_address(interface) for interface in layout.implemented_interfaces),
+            layout.fields_count,
+            layout.field_offsets,
+            layout.field_types,
+            list(layout.field_names),
+            state.load_address(layout.package_name),
+            state.load_address(layout.relative_name),
+        ))
+    for file_address, value_type in state.stored.value_types.items():
+        state.type_infos.add(state.load_address(file_address))
+        self._known_value_types.setdefault(state.load_address(file_address), value_type)
+    for file_address, name in state.stored.type_names.items():
+        state.type_infos.add(state.load_address(file_address))
+        self._type_names.setdefault(state.load_address(file_address), name)
+    if self._runtime_type_size is None:
+        self._runtime_type_size = state.stored.runtime_type_size
+        self._runtime_type_alignment = state.stored.runtime_type_alignment
@@ -0,0 +1,68 @@
+import struct
+from typing import Optional, Tuple
+
+import lldb
+
+from .base import get_type_info_address
+from ..cache import LLDBCache
+from ..util import log, DebuggerException, evaluate
+from ..util.memory import read_memory, read_pointer
+
+# Instance variables of KotlinBase (ObjCExport.mm), every exported class keeps its Kotlin object in them.
+KOTLIN_BASE_REF_HOLDER_IVAR = '_OBJC_IVAR_$_KotlinBase.refHolder'
+KOTLIN_BASE_PERMANENT_IVAR = '_OBJC_IVAR_$_KotlinBase.permanent'
+
+
+def _ivar_offsets(target: lldb.SBTarget, symbol_name: str) -> Tuple[int, ...]:
+    """Each Kotlin framework carries its own copy of KotlinBase, so there can be more than one offset variable."""
+    self = LLDBCache.instance()
+    offsets = self._objc_ivar_offsets.get(symbol_name)
+    if offsets is None:
+        process = target.process
+        found = []
+        for symbol_context in target.FindSymbols(symbol_name):
+            address = symbol_context.symbol.GetStartAddress().GetLoadAddress(target)
+            try:
+                offset = struct.unpack('<i', read_memory(process, address, 4))[0]
+            except DebuggerException:
+                continue
+            if offset not in found:
+                found.append(offset)
+        offsets = tuple(found)
+        self._objc_ivar_offsets[symbol_name] = offsets
+        log(lambda: "_ivar_offsets({}) = {}".format(symbol_name, offsets))
+    return offsets
+
+
+def _read_kotlin_ref(target: lldb.SBTarget, objc_address: int) -> Optional[int]:
+    process = target.process
+    permanent_offsets = _ivar_offsets(target, KOTLIN_BASE_PERMANENT_IVAR)
+
+    for ref_holder_offset in _ivar_offsets(target, KOTLIN_BASE_REF_HOLDER_IVAR):
+        try:
+            # BackRefFromAssociatedObject holds the object itself for permanent objects and a pointer to the special
+            # reference slot otherwise.
+            ref = read_pointer(process, objc_address + ref_holder_offset)
+            is_permanent = any(
+                read_memory(process, objc_address + offset, 1) != b'\0' for offset in permanent_offsets
+            )
+            candidates = [ref] if is_permanent else [read_pointer(process, ref), ref]
+            for candidate in candidates:
+                if get_type_info_address(process, candidate) != 0:
+                    return candidate
+        except DebuggerException:
+            continue
+
+    return None
+
+
+def kotlin_ref_from_objc(target: lldb.SBTarget, objc_address: int) -> int:
+    """Address of the Kotlin object behind an exported ObjC object. Read from the KotlinBase instance variables when
+    possible, otherwise resolved by the runtime."""
+    ref = _read_kotlin_ref(target, objc_address)
+    if ref is None:
+        ref = evaluate(
+            'void* __result = 0; (ObjHeader*)Kotlin_ObjCExport_refFromObjC((void*){:#x}, &__result)',
+            objc_address,
+        ).unsigned
+    return ref
@@ -0,0 +1,53 @@
+from typing import Optional, Type
+
+import lldb
+
+from .base import get_type_info, obj_header_type, single_pointer
+from .KonanBaseSyntheticProvider import KonanBaseSyntheticProvider
+from .objc_export import kotlin_ref_from_objc
+from .select_provider import select_provider_class
+from ..cache import stop_scoped_cache
+from ..util import perf
+from ..util.memory import create_data, pack_pointer
+
+
+class ObjectInfo:
+    """What we know about a Kotlin object during a single stop, shared by its summary and synthetic provider."""
+
+    def __init__(self, type_info: Optional[lldb.value], provider_class: Optional[Type[KonanBaseSyntheticProvider]]):
+        self.type_info = type_info
+        self.provider_class = provider_class
+        self.summary: Optional[str] = None
+
+
+def get_object_info(cast_value: lldb.SBValue) -> ObjectInfo:
+    self = stop_scoped_cache(cast_value.GetProcess())
+
+    address = cast_value.unsigned
+    info = self._stop_objects.get(address)
+    perf.hit('object_info', info is not None)
+    if info is None:
+        type_info = get_type_info(cast_value)
+        provider_class = select_provider_class(type_info) if type_info else None
+        info = ObjectInfo(type_info, provider_class)
+        self._stop_objects[address] = info
+    return info
+
+
+def get_objc_kotlin_object(objc_obj: lldb.SBValue) -> lldb.SBValue:
+    """Returns the `ObjHeader*` behind an exported ObjC object."""
+    process = objc_obj.GetProcess()
+    self = stop_scoped_cache(process)
+
+    objc_address = single_pointer(objc_obj).unsigned
+    ref = self._stop_objc_refs.get(objc_address)
+    perf.hit('objc_ref', ref is not None)
+    if ref is None:
+        ref = kotlin_ref_from_objc(objc_obj.GetTarget(), objc_address)
+        self._stop_objc_refs[objc_address] = ref
+
+    return objc_obj.CreateValueFromData(
+        objc_obj.name,
+        create_data(process, pack_pointer(process, ref)),
+        obj_header_type(),
+    )
@@ -0,0 +1,96 @@
+"""Children of collections too large to show at once: their first elements, followed by range nodes for the rest that
+only get read once expanded."""
+import os
+import re
+from typing import Optional, Tuple
+
+import lldb
+
+from ..util.memory import create_data, pack_pointer
+
+CHILDREN_PAGE_SIZE_ENV = 'KONAN_LLDB_CHILDREN_PAGE_SIZE'
+DEFAULT_CHILDREN_PAGE_SIZE = 1000
+
+# Range nodes are named after the (inclusive) indices of the elements they hold.
+_RANGE_NAME = re.compile(r'^\[(\d+)\.\.(\d+)]$')
+
+
+def children_page_size() -> int:
+    try:
+        size = int(os.getenv(CHILDREN_PAGE_SIZE_ENV, ''))
+    except ValueError:
+        return DEFAULT_CHILDREN_PAGE_SIZE
+    return size if size > 0 else DEFAULT_CHILDREN_PAGE_SIZE
+
+
+def range_name(start: int, end: int) -> str:
+    return '[{}..{}]'.format(start, end - 1)
+
+
+def parse_range_name(name: Optional[str]) -> Optional[Tuple[int, int]]:
+    """The elements `[start, end)` a range node holds, None for any other value."""
+    match = _RANGE_NAME.match(name) if name is not None else None
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2)) + 1
+
+
+class ChildPages:
+    """Layout of the children showing the elements `[start, end)` of a collection: up to a page of elements, followed
+    by range nodes of a page each. When that would still make more than a page of range nodes, each one holds a page of
+    smaller ranges instead, so no value ever has more than about two pages of children."""
+
+    def __init__(self, start: int, end: int, page_size: int):
+        self.start = start
+        self.end = end
+        self.elements = min(end - start, page_size)
+        rest = end - start - self.elements
+        self.span = page_size
+        while rest > self.span * page_size:
+            self.span *= page_size
+        self.ranges = (rest + self.span - 1) // self.span
+
+    @classmethod
+    def of(cls, valobj: lldb.SBValue, count: int) -> 'ChildPages':
+        """Pages of the whole collection, or of the range a range node holds."""
+        window = parse_range_name(valobj.GetName())
+        start, end = window if window is not None else (0, count)
+        return cls(min(start, count), min(end, count), children_page_size())
+
+    def __len__(self) -> int:
+        return self.elements + self.ranges
+
+    @property
+    def count(self) -> int:
+        return self.end - self.start
+
+    def element_index(self, child_index: int) -> Optional[int]:
+        """Index in the collection of the element shown as the given child, None for range nodes."""
+        return self.start + child_index if child_index < self.elements else None
+
+    def range_at(self, child_index: int) -> Tuple[int, int]:
+        start = self.start + self.elements + (child_index - self.elements) * self.span
+        return start, min(start + self.span, self.end)
+
+    def child_index(self, name: str) -> int:
+        window = parse_range_name(name)
+        if window is not None:
+            child_index = self.elements + (window[0] - self.start - self.elements) // self.span
+            if self.elements <= child_index < len(self) and self.range_at(child_index) == window:
+                return child_index
+            return -1
+
+        try:
+            index = int(name.removeprefix('[').removesuffix(']'))
+        except ValueError:
+            return -1
+        return index - self.start if self.start <= index < self.start + self.elements else -1
+
+    def range_node(self, valobj: lldb.SBValue, child_index: int) -> lldb.SBValue:
+        """Another value of the same collection, its provider only shows the elements of the range."""
+        process = valobj.GetProcess()
+        return valobj.CreateValueFromData(
+            range_name(*self.range_at(child_index)),
+            create_data(process, pack_pointer(process, valobj.unsigned)),
+            valobj.GetType(),
+        )
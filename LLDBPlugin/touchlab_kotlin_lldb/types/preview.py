@@ -0,0 +1,237 @@
+"""Inline previews of the first elements of collections, shown in their summaries so they don't have to be expanded to
+see anything. A preview only reads memory, within a byte and time budget, and never runs code in the inferior."""
+import math
+import struct
+import time
+from typing import List, Optional, Tuple
+
+import lldb
+
+from .base import (
+    ELLIPSIS, LIST_BACKING_FIELDS, MAP_KEYS_FIELD, MAP_VALUES_FIELD, RT_OBJECT, KnownValueType, array_data_offset,
+    array_header_struct, get_type_info_address, runtime_type_alignment, runtime_type_size,
+)
+from .classify import classify_type_at
+from .kotlin_string import STRING_CHAR_SIZE, read_kotlin_string
+from .layout import get_type_layout_at
+from .type_name import get_type_name_at
+from ..cache import stop_scoped_cache
+from ..util.memory import pointer_format, pointer_size, read_memory, read_pointer
+
+MAX_PREVIEW_ELEMENTS = 5
+MAX_PREVIEW_TEXT_LENGTH = 24
+# Bytes one summary may read for its preview, nested previews included, and how long it may take.
+MAX_PREVIEW_BYTES = 1024
+MAX_PREVIEW_SECONDS = 0.005
+# Collections in a preview are previewed themselves down to this depth, deeper ones are elided.
+MAX_PREVIEW_DEPTH = 1
+
+# struct formats of the primitive runtime types.
+_ELEMENT_FORMATS = {
+    2: 'b',  # INT8
+    3: 'h',  # INT16
+    4: 'i',  # INT32
+    5: 'q',  # INT64
+    6: 'f',  # FLOAT32
+    7: 'd',  # FLOAT64
+    9: '?',  # BOOLEAN
+}
+_FLOAT32 = 6
+_NATIVE_PTR = 8
+# Reads behind `get_type_info_address`.
+_TYPE_INFO_POINTER_READS = 3
+
+
+class PreviewBudget:
+    """What is left of the bytes and time one summary may spend on its preview."""
+
+    def __init__(self):
+        self.bytes_left = MAX_PREVIEW_BYTES
+        self.deadline = time.perf_counter() + MAX_PREVIEW_SECONDS
+
+    def allows(self, size: int) -> bool:
+        """Whether reading `size` more bytes stays within the budget, counting them as read if so."""
+        if size > self.bytes_left or time.perf_counter() > self.deadline:
+            return False
+        self.bytes_left -= size
+        return True
+
+
+def array_preview(
+        process: lldb.SBProcess,
+        data_address: int,
+        element_type: int,
+        start: int,
+        count: int,
+        budget: PreviewBudget,
+        depth: int = 0,
+) -> str:
+    """`[e0, e1, … +n]` for the `count` elements of an array from index `start`."""
+    element_size = runtime_type_size()[element_type]
+    shown = min(count, MAX_PREVIEW_ELEMENTS)
+    parts: List[str] = []
+    if shown > 0 and budget.allows(shown * element_size):
+        data = read_memory(process, data_address + start * element_size, shown * element_size)
+        if element_type == RT_OBJECT or element_type == _NATIVE_PTR:
+            elements = struct.unpack_from('<{}{}'.format(shown, pointer_format(process)), data)
+        else:
+            elements = struct.unpack_from('<{}{}'.format(shown, _ELEMENT_FORMATS[element_type]), data)
+        for element in elements:
+            part = _element_preview(process, element_type, element, budget, depth)
+            if part is None:
+                break
+            parts.append(part)
+    return _join('[', parts, count, ']')
+
+
+def map_preview(
+        process: lldb.SBProcess,
+        keys_data_address: int,
+        values_data_address: int,
+        start: int,
+        count: int,
+        budget: PreviewBudget,
+        depth: int = 0,
+) -> str:
+    """`{k0=v0, k1=v1, … +n}` for the `count` entries of a map from index `start`."""
+    element_size = pointer_size(process)
+    shown = min(count, MAX_PREVIEW_ELEMENTS)
+    parts: List[str] = []
+    if shown > 0 and budget.allows(2 * shown * element_size):
+        offset = start * element_size
+        keys = struct.unpack_from(
+            '<{}{}'.format(shown, pointer_format(process)),
+            read_memory(process, keys_data_address + offset, shown * element_size),
+        )
+        values = struct.unpack_from(
+            '<{}{}'.format(shown, pointer_format(process)),
+            read_memory(process, values_data_address + offset, shown * element_size),
+        )
+        for key, value in zip(keys, values):
+            key_part = _object_preview(process, key, budget, depth)
+            value_part = _object_preview(process, value, budget, depth) if key_part is not None else None
+            if value_part is None:
+                break
+            parts.append('{}={}'.format(key_part, value_part))
+    return _join('{', parts, count, '}')
+
+
+def _join(opening: str, parts: List[str], count: int, closing: str) -> str:
+    if count > len(parts):
+        parts = parts + ['{} +{}'.format(ELLIPSIS, count - len(parts))]
+    return '{}{}{}'.format(opening, ', '.join(parts), closing)
+
+
+def _element_preview(
+        process: lldb.SBProcess, element_type: int, element, budget: PreviewBudget, depth: int,
+) -> Optional[str]:
+    if element_type == RT_OBJECT:
+        return _object_preview(process, element, budget, depth)
+    if element_type == _NATIVE_PTR:
+        return '{:#x}'.format(element)
+    if isinstance(element, bool):
+        return 'true' if element else 'false'
+    if isinstance(element, float):
+        return _float_preview(element, element_type == _FLOAT32)
+    return str(element)
+
+
+def _float_preview(value: float, is_float32: bool) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    # Enough digits to tell float32 values apart, without the noise of widening them to doubles.
+    text = '{:.7g}'.format(value) if is_float32 else repr(value)
+    return text if any(c in text for c in '.en') else text + '.0'
+
+
+def _object_preview(process: lldb.SBProcess, address: int, budget: PreviewBudget, depth: int) -> Optional[str]:
+    """Preview of a reference element, None once the budget is spent."""
+    if address == 0:
+        return 'null'
+    if not budget.allows(_TYPE_INFO_POINTER_READS * pointer_size(process)):
+        return None
+    type_info = get_type_info_address(process, address)
+    if type_info == 0:
+        return '{:#x}'.format(address)
+
+    value_type = classify_type_at(process, type_info)
+    if value_type == KnownValueType.STRING:
+        return _string_preview(process, address, type_info, budget)
+    if value_type == KnownValueType.ANY:
+        # Only descriptions the runtime already produced at this stop, anything else would need an expression.
+        described = stop_scoped_cache(process)._stop_descriptions.get(address)
+        if described is not None and described[1] is not None:
+            return _truncate(described[1])
+        return get_type_name_at(process, type_info).rpartition('.')[2]
+
+    if depth + 1 > MAX_PREVIEW_DEPTH:
+        return '{{{}}}'.format(ELLIPSIS) if value_type == KnownValueType.MAP else '[{}]'.format(ELLIPSIS)
+    return _collection_preview(process, address, type_info, value_type, budget, depth + 1)
+
+
+def _string_preview(process: lldb.SBProcess, address: int, type_info: int, budget: PreviewBudget) -> Optional[str]:
+    if get_type_layout_at(process, type_info).instance_size != -STRING_CHAR_SIZE:
+        # Not plain UTF-16 storage, which only the runtime knows how to decode.
+        return '"{}"'.format(ELLIPSIS)
+    if not budget.allows(array_header_struct().size + MAX_PREVIEW_TEXT_LENGTH * STRING_CHAR_SIZE):
+        return None
+    text, length = read_kotlin_string(process, address, MAX_PREVIEW_TEXT_LENGTH)
+    return '"{}{}"'.format(text, ELLIPSIS if len(text) < length else '')
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= MAX_PREVIEW_TEXT_LENGTH:
+        return text
+    return text[:MAX_PREVIEW_TEXT_LENGTH] + ELLIPSIS
+
+
+def _collection_preview(
+        process: lldb.SBProcess, address: int, type_info: int, value_type: int, budget: PreviewBudget, depth: int,
+) -> Optional[str]:
+    layout = get_type_layout_at(process, type_info)
+    if value_type == KnownValueType.ARRAY:
+        array = _array_at(process, address, type_info, budget)
+        if array is None:
+            return None
+        data_address, element_type, count = array
+        return array_preview(process, data_address, element_type, 0, count, budget, depth)
+
+    if value_type == KnownValueType.LIST:
+        backing = _array_field(process, address, layout, LIST_BACKING_FIELDS, budget)
+        if backing is None:
+            return None
+        data_address, element_type, count = backing
+        return array_preview(process, data_address, element_type, 0, count, budget, depth)
+
+    keys = _array_field(process, address, layout, (MAP_KEYS_FIELD,), budget)
+    values = _array_field(process, address, layout, (MAP_VALUES_FIELD,), budget) if keys is not None else None
+    if values is None:
+        return None
+    return map_preview(process, keys[0], values[0], 0, keys[2], budget, depth)
+
+
+def _array_field(
+        process: lldb.SBProcess, address: int, layout, names: Tuple[str, ...], budget: PreviewBudget,
+) -> Optional[Tuple[int, int, int]]:
+    index = next((layout.field_indices[name] for name in names if name in layout.field_indices), None)
+    if index is None or not budget.allows(pointer_size(process)):
+        return None
+    array = read_pointer(process, address + layout.field_offsets[index])
+    if array == 0 or not budget.allows(_TYPE_INFO_POINTER_READS * pointer_size(process)):
+        return None
+    type_info = get_type_info_address(process, array)
+    return _array_at(process, array, type_info, budget) if type_info != 0 else None
+
+
+def _array_at(
+        process: lldb.SBProcess, address: int, type_info: int, budget: PreviewBudget,
+) -> Optional[Tuple[int, int, int]]:
+    """Data address, element runtime type and element count of the array at `address`."""
+    header_layout = array_header_struct()
+    if not budget.allows(header_layout.size):
+        return None
+    count = header_layout.unpack(read_memory(process, address, header_layout.size))['count_']
+    element_type = -get_type_layout_at(process, type_info).fields_count
+    return address + array_data_offset(runtime_type_alignment()[element_type]), element_type, count
@@ -1,46 +1,98 @@
+import functools
 from typing import Optional, Union
 
 import lldb
 
-from ..util import evaluate
 from .KonanNotInitializedObjectSyntheticProvider import KonanNotInitializedObjectSyntheticProvider
 from .KonanBaseSyntheticProvider import KonanBaseSyntheticProvider
 from .KonanZerroSyntheticProvider import KonanZerroSyntheticProvider
-from .base import get_type_info, obj_header_pointer, single_pointer
+from .base import obj_header_pointer
+from .object_info import get_objc_kotlin_object, get_object_info
 from .select_provider import select_provider
+from ..cache import activate, target_cache
+from ..util import log, perf
+from ..util.budget import BudgetExceeded, record_degraded, value_budget
+from ..util.log import WARNING
 
 
 class KonanProxyTypeProvider:
     def __init__(self, valobj: lldb.SBValue, internal_dict):
         self._valobj = valobj
+        self._cache = target_cache(valobj.GetTarget())
         self._proxy: Optional[Union[KonanBaseSyntheticProvider, KonanZerroSyntheticProvider]] = None
+        # Stop at which the value ran out of time and got shown without children, it is tried again at the next one.
+        self._degraded_stop_id: Optional[int] = None
 
     def __getattr__(self, item):
+        # LLDB interleaves the calls to the providers of all the values it shows, which may be of different targets.
+        activate(self._cache)
+        if self._degraded_stop_id is not None and self._degraded_stop_id != self._valobj.GetProcess().GetStopID():
+            self._degraded_stop_id = None
+            self._proxy = None
+
         if self._proxy is None:
-            cast_value = obj_header_pointer(self._valobj)
-            type_info = get_type_info(cast_value)
+            try:
+                with value_budget(self._valobj.GetProcess()):
+                    cast_value = obj_header_pointer(self._valobj)
+                    info = get_object_info(cast_value)
+                    if not info.type_info:
+                        self._proxy = KonanNotInitializedObjectSyntheticProvider(self._valobj)
+                        return
+                    self._proxy = select_provider(cast_value, info.type_info, info.provider_class)
+            except BudgetExceeded as e:
+                self._degrade(item, e)
 
-            if not type_info:
-                self._proxy = KonanNotInitializedObjectSyntheticProvider(self._valobj)
-                return
+        attribute = getattr(self._proxy, item)
+        if not callable(attribute):
+            return attribute
+        return self._within_budget(item, attribute)
 
-            self._proxy = select_provider(cast_value, type_info)
+    def _within_budget(self, item: str, attribute):
+        name = '{}.{}'.format(type(self._proxy).__name__, item)
 
-        return getattr(self._proxy, item)
+        # LLDB inspects the signature to decide what to pass, e.g. `num_children(self)` versus
+        # `num_children(self, max_count)`, `wraps` makes it see the provider's own.
+        @functools.wraps(attribute)
+        def call(*args):
+            try:
+                with value_budget(self._valobj.GetProcess()):
+                    return perf.call_timed(name, attribute, *args)
+            except BudgetExceeded as e:
+                self._degrade(item, e)
+                return getattr(self._proxy, item)(*args)
+
+        return call
+
+    def _degrade(self, item: str, e: BudgetExceeded):
+        log(lambda: "KonanProxyTypeProvider.{}({:#x}): {}".format(item, self._valobj.unsigned, e.msg), WARNING)
+        record_degraded(item)
+        self._proxy = KonanZerroSyntheticProvider(self._valobj)
+        self._degraded_stop_id = self._valobj.GetProcess().GetStopID()
 
 
 class KonanObjcProxyTypeProvider:
     def __init__(self, objc_obj: lldb.SBValue, internal_dict):
         self._objc_obj = objc_obj
-        self._proxy: Optional[KonanProxyTypeProvider] = None
+        self._cache = target_cache(objc_obj.GetTarget())
+        self._proxy: Optional[Union[KonanProxyTypeProvider, KonanZerroSyntheticProvider]] = None
+        # Same as `KonanProxyTypeProvider`, for the resolution of the Kotlin object, which may run an expression.
+        self._degraded_stop_id: Optional[int] = None
 
     def __getattr__(self, item):
-        if self._proxy is None:
-            objc_obj = single_pointer(self._objc_obj)
+        activate(self._cache)
+        if self._degraded_stop_id is not None and self._degraded_stop_id != self._objc_obj.GetProcess().GetStopID():
+            self._degraded_stop_id = None
+            self._proxy = None
 
-            konan_obj = evaluate(
-                'void* __result = 0; (ObjHeader*)Kotlin_ObjCExport_refFromObjC((void*){:#x}, &__result)',
-                objc_obj.unsigned
-            )
-            self._proxy = KonanProxyTypeProvider(konan_obj, {})
+        if self._proxy is None:
+            try:
+                with value_budget(self._objc_obj.GetProcess()):
+                    konan_obj = get_objc_kotlin_object(self._objc_obj)
+                self._proxy = KonanProxyTypeProvider(konan_obj, {})
+            except BudgetExceeded as e:
+                log(lambda: "KonanObjcProxyTypeProvider.{}({:#x}): {}".format(item, self._objc_obj.unsigned, e.msg),
+                    WARNING)
+                record_degraded(item)
+                self._proxy = KonanZerroSyntheticProvider(self._objc_obj)
+                self._degraded_stop_id = self._objc_obj.GetProcess().GetStopID()
         return getattr(self._proxy, item)
@@ -1,49 +1,52 @@
+from typing import Optional, Type
+
 import lldb
 
-from .base import get_string_symbol, get_list_symbol, get_map_symbol
+from .base import KnownValueType, type_info_address
+from .classify import classify_type
 from .KonanStringSyntheticProvider import KonanStringSyntheticProvider
 from .KonanArraySyntheticProvider import KonanArraySyntheticProvider
 from .KonanListSyntheticProvider import KonanListSyntheticProvider
 from .KonanObjectSyntheticProvider import KonanObjectSyntheticProvider
 from .KonanBaseSyntheticProvider import KonanBaseSyntheticProvider
 from .KonanMapSyntheticProvider import KonanMapSyntheticProvider
-from ..util import log
+from ..util import log, perf
+
 
+_PROVIDER_CLASSES = {
+    KnownValueType.ANY: KonanObjectSyntheticProvider,
+    KnownValueType.STRING: KonanStringSyntheticProvider,
+    KnownValueType.ARRAY: KonanArraySyntheticProvider,
+    KnownValueType.LIST: KonanListSyntheticProvider,
+    KnownValueType.MAP: KonanMapSyntheticProvider,
+}
 
-def _is_subtype(obj_type_info: lldb.value, type_info: lldb.value) -> bool:
+
+def select_provider_class(type_info: lldb.value) -> Type[KonanBaseSyntheticProvider]:
     try:
-        # noinspection PyPep8Naming
-        TF_INTERFACE = 1 << 2
-        # If it is an interface - check in list of implemented interfaces.
-        if (int(type_info.flags_) & TF_INTERFACE) != 0:
-            for i in range(int(obj_type_info.implementedInterfacesCount_)):
-                if obj_type_info.implementedInterfaces_[i] == type_info:
-                    return True
-            return False
-        while obj_type_info != 0 and obj_type_info != type_info:
-            obj_type_info = obj_type_info.superType_
+        return _PROVIDER_CLASSES[classify_type(type_info)]
 
-        return obj_type_info != 0
-    except BaseException as e:
+    except:
         import traceback
+        import sys
+        sys.stderr.write("Couldn't classify type info {:#x}.\n".format(type_info_address(type_info)))
         traceback.print_exc()
-        return False
+        sys.stderr.write('\nFalling back to KonanObjectSyntheticProvider.\n')
+        return KonanObjectSyntheticProvider
 
 
-def select_provider(valobj: lldb.SBValue, type_info: lldb.value) -> KonanBaseSyntheticProvider:
+def select_provider(
+        valobj: lldb.SBValue,
+        type_info: lldb.value,
+        provider_class: Optional[Type[KonanBaseSyntheticProvider]] = None,
+) -> KonanBaseSyntheticProvider:
     log(lambda: "[BEGIN] select_provider")
 
+    if provider_class is None:
+        provider_class = select_provider_class(type_info)
+
     try:
-        if _is_subtype(type_info, get_string_symbol()):
-            provider = KonanStringSyntheticProvider(valobj, type_info)
-        elif _is_subtype(type_info, get_list_symbol()):
-            provider = KonanListSyntheticProvider(valobj, type_info)
-        elif _is_subtype(type_info, get_map_symbol()):
-            provider = KonanMapSyntheticProvider(valobj, type_info)
-        elif int(type_info.instanceSize_) < 0:
-            provider = KonanArraySyntheticProvider(valobj, type_info)
-        else:
-            provider = KonanObjectSyntheticProvider(valobj, type_info)
+        provider = provider_class(valobj, type_info)
 
     except:
         import traceback
@@ -58,6 +61,7 @@ def select_provider(valobj: lldb.SBValue, type_info: lldb.value) -> KonanBaseSyn
         sys.stderr.write('\nFalling back to KonanObjectSyntheticProvider.\n')
         provider = KonanObjectSyntheticProvider(valobj, type_info)
 
+    perf.record('select_provider.{}'.format(type(provider).__name__))
     log(lambda: "[END] select_provider = {}".format(
         provider,
     ))
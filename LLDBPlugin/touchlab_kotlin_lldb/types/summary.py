@@ -1,32 +1,116 @@
 import lldb
 
 from .select_provider import select_provider
-from .base import get_type_info, obj_header_pointer, single_pointer
-from ..util import log, evaluate
+from .base import ELLIPSIS, KnownValueType, get_type_info_address, obj_header_pointer
+from .classify import classify_type
+from .kotlin_modules import KOTLIN_ARRAY_HEADER_TYPE_NAME, KOTLIN_OBJ_HEADER_TYPE_NAME
+from .object_info import get_objc_kotlin_object, get_object_info
+from .paging import parse_range_name
+from .type_name import get_type_name_at
+from ..cache import stop_scoped_cache, target_cache
+from ..util import DebuggerException, log, perf
+from ..util.budget import BudgetExceeded, record_degraded, value_budget
+from ..util.kotlin_object_to_cstring import prefetch_object_descriptions
+from ..util.log import WARNING
 
 
+@perf.timed('kotlin_object_type_summary')
 def kotlin_object_type_summary(valobj: lldb.SBValue, internal_dict):
     """Hook that is run by lldb to display a Kotlin object."""
     log(lambda: "kotlin_object_type_summary({:#x}: {}: {})".format(valobj.unsigned, valobj.name, valobj.type.name))
+    target_cache(valobj.GetTarget())
     cast_value = obj_header_pointer(valobj)
+    try:
+        with value_budget(cast_value.GetProcess()):
+            return _object_summary(valobj, cast_value, internal_dict)
+    except BudgetExceeded as e:
+        log(lambda: "kotlin_object_type_summary({:#x}): {}".format(cast_value.unsigned, e.msg), WARNING)
+        record_degraded('summary')
+        summary = _degraded_summary(cast_value)
+        # Xcode asks again right away, which would only spend the budget of the stop a second time.
+        info = stop_scoped_cache(cast_value.GetProcess())._stop_objects.get(cast_value.unsigned)
+        if info is not None:
+            info.summary = summary
+        return summary
 
-    type_info = internal_dict["type_info"] if "type_info" in internal_dict.keys() else get_type_info(cast_value)
 
-    if not type_info:
+def _object_summary(valobj: lldb.SBValue, cast_value: lldb.SBValue, internal_dict) -> str:
+    if "type_info" in internal_dict.keys():
+        provider = select_provider(cast_value, internal_dict["type_info"])
+        provider.update()
+        return provider.to_string()
+
+    info = get_object_info(cast_value)
+
+    if not info.type_info:
         return cast_value.GetValue()
 
-    provider = select_provider(cast_value, type_info)
-    log(lambda: "kotlin_object_type_summary({:#x} - {})".format(cast_value.unsigned, type(provider).__name__))
-    provider.update()
-    return provider.to_string()
+    if parse_range_name(valobj.GetName()) is not None:
+        # A range node of a collection, summarized apart from the collection itself.
+        provider = select_provider(cast_value, info.type_info, info.provider_class)
+        provider.update()
+        return provider.to_string()
+
+    perf.hit('summary', info.summary is not None)
+    if info.summary is None:
+        _prefetch_frame_descriptions(valobj)
+        provider = select_provider(cast_value, info.type_info, info.provider_class)
+        log(lambda: "kotlin_object_type_summary({:#x} - {})".format(cast_value.unsigned, type(provider).__name__))
+        provider.update()
+        info.summary = provider.to_string()
+    return info.summary
+
+
+def _prefetch_frame_descriptions(valobj: lldb.SBValue):
+    """Describes the plain objects among the variables of the frame of `valobj` in one go, the first time any of them
+    is summarized at this stop. Children are prefetched by the synthetic provider of their parent."""
+    frame = valobj.GetFrame()
+    if not frame.IsValid():
+        return
+    process = valobj.GetProcess()
+    self = stop_scoped_cache(process)
+    if frame.GetCFA() in self._stop_prefetched_frames:
+        return
+    self._stop_prefetched_frames.add(frame.GetCFA())
 
+    try:
+        kotlin_type_names = (KOTLIN_OBJ_HEADER_TYPE_NAME, KOTLIN_ARRAY_HEADER_TYPE_NAME)
+        plain_objects = []
+        for variable in frame.GetVariables(True, True, False, True):
+            if variable.GetType().GetPointeeType().GetName() not in kotlin_type_names or variable.unsigned == 0:
+                continue
+            # The summaries of the variables reuse the object info.
+            cast_variable = obj_header_pointer(variable)
+            info = get_object_info(cast_variable)
+            if info.type_info and classify_type(info.type_info) == KnownValueType.ANY:
+                plain_objects.append(cast_variable.unsigned)
+        prefetch_object_descriptions(process, plain_objects)
+    except DebuggerException as e:
+        log(lambda: "_prefetch_frame_descriptions failed: {}".format(e.msg), WARNING)
 
+
+def _degraded_summary(cast_value: lldb.SBValue) -> str:
+    """Class and address of an object that ran out of time, its name is usually known already."""
+    process = cast_value.GetProcess()
+    name = 'object'
+    try:
+        type_info = get_type_info_address(process, cast_value.unsigned)
+        if type_info != 0:
+            name = get_type_name_at(process, type_info).rpartition('.')[2]
+    except DebuggerException as e:
+        log(lambda: "_degraded_summary({:#x}): {}".format(cast_value.unsigned, e.msg))
+    return '{} {:#x} {}'.format(name, cast_value.unsigned, ELLIPSIS)
+
+
+@perf.timed('kotlin_objc_class_summary')
 def kotlin_objc_class_summary(objc_obj: lldb.SBValue, internal_dict):
     # """Hook that is run by lldb to display a Kotlin ObjC class wrapper."""
-    objc_obj = single_pointer(objc_obj)
-
-    konan_obj = evaluate(
-        'void* __result = 0; (ObjHeader*)Kotlin_ObjCExport_refFromObjC((void*){:#x}, &__result)',
-        objc_obj.unsigned
-    )
-    return kotlin_object_type_summary(konan_obj, internal_dict)
\ No newline at end of file
+    target_cache(objc_obj.GetTarget())
+    try:
+        with value_budget(objc_obj.GetProcess()):
+            konan_obj = get_objc_kotlin_object(objc_obj)
+            return kotlin_object_type_summary(konan_obj, internal_dict)
+    except BudgetExceeded as e:
+        log(lambda: "kotlin_objc_class_summary({:#x}): {}".format(objc_obj.unsigned, e.msg), WARNING)
+        record_degraded('summary')
+        return '{} {:#x} {}'.format(objc_obj.GetTypeName(), objc_obj.unsigned, ELLIPSIS)
\ No newline at end of file
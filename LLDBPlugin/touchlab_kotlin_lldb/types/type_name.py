@@ -0,0 +1,66 @@
+from typing import Optional
+
+import lldb
+
+from .base import get_type_info_address
+from .kotlin_string import read_kotlin_string
+from .layout import get_type_layout_at
+from .module_cache import module_state, remember_type_name
+from ..cache import LLDBCache, target_cache
+from ..util import DebuggerException, log, perf
+from ..util.symbol_index import peek_symbol_index
+
+KCLASS_PREFIX = 'kclass:'
+
+
+def get_type_name_at(process: lldb.SBProcess, type_info_address: int) -> str:
+    """Qualified name of the class with the given TypeInfo, resolved without running code in the inferior."""
+    self = LLDBCache.instance()
+    name = self._type_names.get(type_info_address)
+    perf.hit('type_name', name is not None)
+    if name is None:
+        state = module_state(process, type_info_address)
+        name = self._type_names.get(type_info_address)
+        if name is None:
+            name = _kclass_name(process.GetTarget(), type_info_address)
+            if name is None:
+                name = _read_type_name(process, type_info_address)
+            self._type_names[type_info_address] = name
+            if state is not None:
+                remember_type_name(state, type_info_address, name)
+    return name
+
+
+def get_runtime_type(variable: lldb.SBValue) -> str:
+    """Qualified name of the runtime type of the object `variable` points to, or an empty string if it's not one."""
+    target_cache(variable.GetTarget())
+    process = variable.GetProcess()
+    try:
+        type_info_address = get_type_info_address(process, variable.unsigned)
+        return get_type_name_at(process, type_info_address) if type_info_address != 0 else ''
+    except DebuggerException as e:
+        log(lambda: "get_runtime_type({:#x}) failed: {}".format(variable.unsigned, e.msg))
+        return ''
+
+
+def _kclass_name(target: lldb.SBTarget, type_info_address: int) -> Optional[str]:
+    # Every TypeInfo emitted by the compiler has a `kclass:` symbol, the index maps its address back to the name.
+    address = target.ResolveLoadAddress(type_info_address)
+    module = address.GetModule()
+    if not module.IsValid():
+        return None
+    index = peek_symbol_index(module)
+    if index is None:
+        return None
+    return index.kotlin_symbol_at(KCLASS_PREFIX, address.GetFileAddress())
+
+
+def _read_type_name(process: lldb.SBProcess, type_info_address: int) -> str:
+    # TypeInfos created at runtime (e.g. for ObjC subclasses) have no symbol, their names are read from memory.
+    layout = get_type_layout_at(process, type_info_address)
+    parts = [
+        read_kotlin_string(process, address)[0]
+        for address in (layout.package_name, layout.relative_name)
+        if address != 0
+    ]
+    return '.'.join(part for part in parts if part)
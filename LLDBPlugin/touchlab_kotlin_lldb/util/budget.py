@@ -0,0 +1,82 @@
+"""Time the formatters may spend on one value and on all the values of a stop. Running out of it doesn't interrupt
+anything, the memory reads and expressions check it before they start and raise `BudgetExceeded`, the formatter then
+shows a degraded value instead."""
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import lldb
+
+from . import perf
+from .DebuggerException import DebuggerException
+from ..cache import stop_scoped_cache
+
+VALUE_BUDGET_ENV = 'KONAN_LLDB_VALUE_BUDGET_MS'
+STOP_BUDGET_ENV = 'KONAN_LLDB_STOP_BUDGET_MS'
+EXPRESSION_TIMEOUT_ENV = 'KONAN_LLDB_EXPRESSION_TIMEOUT_MS'
+DEFAULT_VALUE_BUDGET_MS = 250
+DEFAULT_STOP_BUDGET_MS = 3000
+# Longest a single expression may run while formatting, e.g. a `toString()` that deadlocks in the inferior.
+DEFAULT_EXPRESSION_TIMEOUT_MS = 500
+
+
+class BudgetExceeded(DebuggerException):
+    pass
+
+
+def _seconds(name: str, default_milliseconds: int) -> float:
+    try:
+        value = int(os.getenv(name, ''))
+    except ValueError:
+        value = 0
+    return (value if value > 0 else default_milliseconds) / 1000
+
+
+VALUE_BUDGET_SECONDS = _seconds(VALUE_BUDGET_ENV, DEFAULT_VALUE_BUDGET_MS)
+STOP_BUDGET_SECONDS = _seconds(STOP_BUDGET_ENV, DEFAULT_STOP_BUDGET_MS)
+EXPRESSION_TIMEOUT_SECONDS = _seconds(EXPRESSION_TIMEOUT_ENV, DEFAULT_EXPRESSION_TIMEOUT_MS)
+
+# When the value being formatted runs out of time, None outside of the formatters.
+_deadline: Optional[float] = None
+
+
+@contextmanager
+def value_budget(process: lldb.SBProcess) -> Iterator[None]:
+    """Bounds the formatting of one value by its own budget and by what is left of the stop's. Values formatted while
+    formatting another one share its budget."""
+    global _deadline
+    if _deadline is not None:
+        yield
+        return
+
+    self = stop_scoped_cache(process)
+    remaining = STOP_BUDGET_SECONDS - self._stop_formatting_seconds
+    if remaining <= 0:
+        raise BudgetExceeded('The formatting budget of this stop is spent')
+
+    started = time.perf_counter()
+    _deadline = started + min(VALUE_BUDGET_SECONDS, remaining)
+    try:
+        yield
+    finally:
+        _deadline = None
+        self._stop_formatting_seconds += time.perf_counter() - started
+
+
+def check_budget():
+    if _deadline is not None and time.perf_counter() > _deadline:
+        raise BudgetExceeded('The formatting budget of this value is spent')
+
+
+def expression_timeout_microseconds() -> Optional[int]:
+    """Timeout of the next expression, None outside of the formatters."""
+    if _deadline is None:
+        return None
+    check_budget()
+    timeout = min(EXPRESSION_TIMEOUT_SECONDS, _deadline - time.perf_counter())
+    return max(int(timeout * 1_000_000), 1)
+
+
+def record_degraded(what: str):
+    perf.record('budget.degraded.{}'.format(what))
@@ -1,4 +1,6 @@
 import lldb
+from . import perf
+from .budget import expression_timeout_microseconds
 from .log import log
 from ..cache import LLDBCache
 
@@ -25,19 +27,32 @@ def initialize_top_level_expression_options():
 
 EXPRESSION_OPTIONS = initialize_expression_options()
 TOP_LEVEL_EXPRESSION_OPTIONS = initialize_top_level_expression_options()
+# LLDB's own, which the commands keep. The formatters use a shorter one, see `expression_timeout_microseconds`.
+DEFAULT_EXPRESSION_TIMEOUT = EXPRESSION_OPTIONS.GetTimeoutInMicroSeconds()
 
 
+def evaluation_target() -> lldb.SBTarget:
+    """The target of the values being formatted, see `target_cache`."""
+    target = LLDBCache.instance()._target
+    return target if target is not None else lldb.debugger.GetSelectedTarget()
+
+
+@perf.timed('evaluate')
 def evaluate(expression: str, *args, **kwargs) -> lldb.SBValue:
     declare_helper_types()
     formatted_expression = expression.format(*args, **kwargs)
-    result = lldb.debugger.GetSelectedTarget().EvaluateExpression(formatted_expression, EXPRESSION_OPTIONS)
+    timeout = expression_timeout_microseconds()
+    EXPRESSION_OPTIONS.SetTimeoutInMicroSeconds(DEFAULT_EXPRESSION_TIMEOUT if timeout is None else timeout)
+    result = evaluation_target().EvaluateExpression(formatted_expression, EXPRESSION_OPTIONS)
     log(lambda: "evaluate: {} => {}".format(formatted_expression, result))
     return result
 
 
+@perf.timed('top_level_evaluate')
 def top_level_evaluate(expr) -> lldb.SBValue:
-    log(lambda: "top_level_evaluate: target={}".format(lldb.debugger.GetSelectedTarget()))
-    result = lldb.debugger.GetSelectedTarget().EvaluateExpression(expr, TOP_LEVEL_EXPRESSION_OPTIONS)
+    target = evaluation_target()
+    log(lambda: "top_level_evaluate: target={}".format(target))
+    result = target.EvaluateExpression(expr, TOP_LEVEL_EXPRESSION_OPTIONS)
     log(lambda: "top_level_evaluate: {} => {}".format(expr, result))
     return result
 
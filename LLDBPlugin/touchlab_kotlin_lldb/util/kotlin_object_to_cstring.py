@@ -1,11 +1,14 @@
-from typing import Optional
+import struct
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 
 from lldb import SBProcess, SBError
 
+from . import perf
 from .DebuggerException import DebuggerException
 from .expression import evaluate
 from .log import log
-from ..cache import LLDBCache
+from .memory import read_memory
+from ..cache import LLDBCache, stop_scoped_cache
 
 
 def get_debug_buffer_addr() -> int:
@@ -36,7 +39,112 @@ def kotlin_object_to_string(process: SBProcess, object_addr: int) -> Optional[st
         return None
 
     error = SBError()
-    s = process.ReadCStringFromMemory(debug_buffer_addr, int(string_len), error)
+    s = perf.call_timed('memory.read_cstring', process.ReadCStringFromMemory, debug_buffer_addr, int(string_len), error)
     if not error.Success():
         raise DebuggerException("Couldn't read object description Error: {}.".format(error.description))
     return s
+
+
+# Number of objects described by a single expression.
+DESCRIBE_BATCH_SIZE = 32
+# Smallest share of the debug buffer a single description gets in a batch.
+MIN_DESCRIPTION_SIZE = 64
+
+# Writes `[int32 length][type name][int32 length][description]` for each object into a scratch buffer and copies it to
+# the debug buffer at the end, so the runtime calls are free to use the debug buffer themselves. Stops early once the
+# buffer is full and evaluates to the number of bytes used in the high 32 bits and of objects written in the low ones.
+_DESCRIBE_OBJECTS_EXPRESSION = '''
+__konan_safe_void_t *__objects[] = {{ {objects} }};
+__konan_safe_char_t __results[{size}];
+int __offset = 0;
+int __written = 0;
+for (int __i = 0; __i < {count}; ++__i) {{
+    const __konan_safe_char_t *__name = (const __konan_safe_char_t *)Konan_DebugGetTypeName(__objects[__i]);
+    int __name_length = 0;
+    while (__name != 0 && __name[__name_length] != 0 && __offset + 8 + __name_length < {size}) ++__name_length;
+    if (__offset + 8 + __name_length + {min_description} > {size}) break;
+    *(int *)(__results + __offset) = __name_length;
+    for (int __j = 0; __j < __name_length; ++__j) __results[__offset + 4 + __j] = __name[__j];
+    __offset += 4 + __name_length;
+    int __available = {size} - __offset - 4;
+    if (__available > {max_description}) __available = {max_description};
+    int __length = (__konan_safe_int_t)Konan_DebugObjectToUtf8Array(
+        __objects[__i], (__konan_safe_void_t *)(__results + __offset + 4), __available);
+    if (__length < 0) __length = 0;
+    *(int *)(__results + __offset) = __length;
+    __offset += 4 + __length;
+    ++__written;
+}}
+for (int __i = 0; __i < __offset; ++__i) ((__konan_safe_char_t *){buffer:#x})[__i] = __results[__i];
+((long long)__offset << 32) | __written;
+'''
+
+
+def describe_objects(process: SBProcess, object_addrs: Sequence[int]) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+    """Type names and descriptions of the given objects by address, computed by a single expression.
+
+    Leaves out the objects the debug buffer had no space left for, and those whose description filled their share of
+    it, as it may have been cut off. Those are left to `kotlin_object_to_string`, which gives them the whole buffer."""
+    if not object_addrs:
+        return {}
+
+    debug_buffer_addr = get_debug_buffer_addr()
+    debug_buffer_size = get_debug_buffer_size()
+    max_description = max(MIN_DESCRIPTION_SIZE, debug_buffer_size // len(object_addrs))
+    result = evaluate(
+        _DESCRIBE_OBJECTS_EXPRESSION,
+        objects=', '.join('(__konan_safe_void_t *){:#x}'.format(addr) for addr in object_addrs),
+        count=len(object_addrs),
+        size=debug_buffer_size,
+        buffer=debug_buffer_addr,
+        min_description=MIN_DESCRIPTION_SIZE,
+        max_description=max_description,
+    ).signed
+    used, written = result >> 32, result & 0xffffffff
+
+    if written <= 0:
+        return {}
+
+    # Only what the expression wrote, usually a small part of the buffer.
+    data = read_memory(process, debug_buffer_addr, used)
+    offset = 0
+    descriptions = {}
+    for address in object_addrs[:written]:
+        type_name, offset = _read_entry_text(data, offset)
+        # Same share of the buffer as `__available` in the expression.
+        available = min(debug_buffer_size - offset - 4, max_description)
+        (length,) = struct.unpack_from('<i', data, offset)
+        description, offset = _read_entry_text(data, offset)
+        if length < available:
+            descriptions[address] = (type_name, description)
+    return descriptions
+
+
+def _read_entry_text(data: bytes, offset: int) -> Tuple[Optional[str], int]:
+    (length,) = struct.unpack_from('<i', data, offset)
+    text = data[offset + 4:offset + 4 + length].split(b'\0', 1)[0]
+    return text.decode('utf-8', errors='replace') if length > 0 else None, offset + 4 + length
+
+
+def prefetch_object_descriptions(process: SBProcess, object_addrs: Iterable[int]):
+    """Describes every object a view is about to show in as few expressions as possible, so their summaries can be
+    served from the per-stop cache."""
+    self = stop_scoped_cache(process)
+    pending = [addr for addr in dict.fromkeys(object_addrs) if addr != 0 and addr not in self._stop_descriptions]
+    for start in range(0, len(pending), DESCRIBE_BATCH_SIZE):
+        batch = pending[start:start + DESCRIBE_BATCH_SIZE]
+        if len(batch) == 1:
+            # Nothing to batch, the plain call is cheaper and gets the whole buffer.
+            self._stop_descriptions[batch[0]] = (None, kotlin_object_to_string(process, batch[0]))
+            continue
+        descriptions = describe_objects(process, batch)
+        log(lambda: "prefetch_object_descriptions: {} of {}".format(len(descriptions), len(batch)))
+        self._stop_descriptions.update(descriptions)
+
+
+def kotlin_object_description(process: SBProcess, object_addr: int) -> Optional[str]:
+    described = stop_scoped_cache(process)._stop_descriptions.get(object_addr)
+    perf.hit('description', described is not None)
+    if described is not None:
+        return described[1]
+    return kotlin_object_to_string(process, object_addr)
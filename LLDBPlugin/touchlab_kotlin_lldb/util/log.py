@@ -1,21 +1,137 @@
-import sys
+import atexit
 import os
-from typing import Callable
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {
+    DEBUG: 'DEBUG',
+    INFO: 'INFO',
+    WARNING: 'WARNING',
+    ERROR: 'ERROR',
+}
 
 logging = False
 exe_logging = os.getenv('GLOG_log_dir') is not None
 
 
-def log(msg: Callable[[], str]):
+def level_from_name(name: str) -> Optional[int]:
+    for level, level_name in LEVEL_NAMES.items():
+        if level_name == name.upper():
+            return level
+    return None
+
+
+# Records below this level are dropped before their message is even formatted.
+log_level = level_from_name(os.getenv('KONAN_LLDB_LOG_LEVEL', '')) or (DEBUG if logging or exe_logging else WARNING)
+
+# Number of recent records kept in memory for `kotlin_log dump`.
+RING_BUFFER_SIZE = int(os.getenv('KONAN_LLDB_LOG_BUFFER_SIZE', '1000'))
+# Maximum number of records the writer thread writes to the log file before flushing it.
+WRITER_BATCH_SIZE = 256
+
+Record = Tuple[float, int, str]
+
+_records: Deque[Record] = deque(maxlen=RING_BUFFER_SIZE)
+
+
+def log(msg: Callable[[], str], level: int = DEBUG):
+    if level < log_level:
+        return
+    record = (time.time(), level, msg())
+    _records.append(record)
     if logging:
-        sys.stderr.write(msg())
+        sys.stderr.write(record[2])
         sys.stderr.write('\n')
-    exelog(msg)
+    if exe_logging:
+        _writer().enqueue(record)
 
 
 def exelog(stmt: Callable[[], str]):
     if exe_logging:
-        f = open(os.getenv('GLOG_log_dir', '') + "/konan_lldb.log", "a")
-        f.write(stmt())
-        f.write("\n")
-        f.close()
+        _writer().enqueue((time.time(), DEBUG, stmt()))
+
+
+def format_record(record: Record) -> str:
+    timestamp, level, message = record
+    return '{}.{:03d} {:<7} {}'.format(
+        time.strftime('%H:%M:%S', time.localtime(timestamp)),
+        int(timestamp * 1000) % 1000,
+        LEVEL_NAMES.get(level, level),
+        message,
+    )
+
+
+def recent_records(count: Optional[int] = None) -> List[Record]:
+    records = list(_records)
+    return records if count is None else records[-count:]
+
+
+def clear_records():
+    _records.clear()
+
+
+def get_level() -> int:
+    return log_level
+
+
+def set_level(level: int):
+    global log_level
+    log_level = level
+
+
+class _LogWriter:
+    """Appends records to `konan_lldb.log` from a background thread, so logging doesn't cost a file open per line."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._queue: 'queue.SimpleQueue[Optional[Record]]' = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='konan_lldb log writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, record: Record):
+        self._queue.put(record)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        with open(self._path, 'a') as f:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < WRITER_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                for record in batch:
+                    if record is None:
+                        f.flush()
+                        return
+                    f.write(format_record(record))
+                    f.write('\n')
+                f.flush()
+
+
+__writer: Optional[_LogWriter] = None
+__writer_lock = threading.Lock()
+
+
+def _writer() -> _LogWriter:
+    global __writer
+    if __writer is None:
+        with __writer_lock:
+            if __writer is None:
+                __writer = _LogWriter(os.getenv('GLOG_log_dir', '') + "/konan_lldb.log")
+    return __writer
@@ -0,0 +1,139 @@
+import struct
+from typing import Dict, List, Sequence, Tuple
+
+import lldb
+
+from . import perf
+from .budget import check_budget
+from .DebuggerException import DebuggerException
+
+# Upper bound for a single C string read, same as the one used by `ReadCStringFromMemory` callers.
+MAX_CSTRING_LENGTH = 0x1000
+# Names scattered further apart than this are read one by one instead of in a single block.
+MAX_CSTRING_BLOCK_SIZE = 0x10000
+
+_SIGNED_BASIC_TYPES = {
+    lldb.eBasicTypeChar,
+    lldb.eBasicTypeSignedChar,
+    lldb.eBasicTypeShort,
+    lldb.eBasicTypeInt,
+    lldb.eBasicTypeLong,
+    lldb.eBasicTypeLongLong,
+}
+_UNSIGNED_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+class StructLayout:
+    """Offsets and `struct` formats of the scalar fields of a C struct, so it can be decoded from raw memory."""
+
+    def __init__(self, sbtype: lldb.SBType):
+        self.size: int = sbtype.GetByteSize()
+        self.fields: Dict[str, Tuple[int, str]] = {}
+
+        for i in range(sbtype.GetNumberOfFields()):
+            member = sbtype.GetFieldAtIndex(i)
+            member_type = member.GetType().GetCanonicalType()
+            field_format = _UNSIGNED_FORMATS.get(member_type.GetByteSize())
+            if field_format is None:
+                continue
+            if not member_type.IsPointerType() and member_type.GetBasicType() in _SIGNED_BASIC_TYPES:
+                field_format = field_format.lower()
+            self.fields[member.GetName()] = (member.GetOffsetInBytes(), '<' + field_format)
+
+    def offset_of(self, name: str) -> int:
+        return self.fields[name][0]
+
+    def unpack(self, data: bytes) -> Dict[str, int]:
+        return {
+            name: struct.unpack_from(field_format, data, offset)[0]
+            for name, (offset, field_format) in self.fields.items()
+        }
+
+
+def read_memory(process: lldb.SBProcess, address: int, size: int) -> bytes:
+    if size <= 0:
+        return b''
+    check_budget()
+    error = lldb.SBError()
+    data = perf.call_timed('memory.read', process.ReadMemory, address, size, error)
+    perf.record('memory.read_bytes', size)
+    if not error.Success() or data is None or len(data) < size:
+        raise DebuggerException(
+            'Could not read {} bytes at address {:#x} (error: {})'.format(size, address, error.description)
+        )
+    return data
+
+
+def create_data(process: lldb.SBProcess, data: bytes) -> lldb.SBData:
+    error = lldb.SBError()
+    result = lldb.SBData()
+    result.SetData(error, data, process.GetByteOrder(), process.GetAddressByteSize())
+    if not error.Success():
+        raise DebuggerException('Could not create data of {} bytes (error: {})'.format(len(data), error.description))
+    return result
+
+
+def pointer_size(process: lldb.SBProcess) -> int:
+    return process.GetAddressByteSize()
+
+
+def pointer_format(process: lldb.SBProcess) -> str:
+    return 'Q' if pointer_size(process) == 8 else 'I'
+
+
+def pack_pointer(process: lldb.SBProcess, value: int) -> bytes:
+    return struct.pack('<' + pointer_format(process), value)
+
+
+def unpack_pointers(process: lldb.SBProcess, data: bytes, count: int, offset: int = 0) -> Sequence[int]:
+    return struct.unpack_from('<{}{}'.format(count, pointer_format(process)), data, offset)
+
+
+def read_pointers(process: lldb.SBProcess, address: int, count: int) -> Sequence[int]:
+    if count <= 0:
+        return ()
+    return unpack_pointers(process, read_memory(process, address, count * pointer_size(process)), count)
+
+
+def read_pointer(process: lldb.SBProcess, address: int) -> int:
+    return read_pointers(process, address, 1)[0]
+
+
+def read_cstring(process: lldb.SBProcess, address: int) -> str:
+    check_budget()
+    error = lldb.SBError()
+    result = perf.call_timed('memory.read_cstring', process.ReadCStringFromMemory, address, MAX_CSTRING_LENGTH, error)
+    if not error.Success():
+        raise DebuggerException(
+            'Could not read cstring at address {:#x} (error: {})'.format(address, error.description)
+        )
+    return result
+
+
+def read_cstrings(process: lldb.SBProcess, addresses: Sequence[int]) -> List[str]:
+    """Reads C strings that the compiler usually emits next to each other (e.g. field names) in one block."""
+    if not addresses:
+        return []
+
+    start = min(addresses)
+    end = max(addresses) + MAX_CSTRING_LENGTH
+    block = None
+    if end - start <= MAX_CSTRING_BLOCK_SIZE:
+        try:
+            block = read_memory(process, start, end - start)
+        except DebuggerException:
+            # The last string can sit right before an unmapped page, read the strings individually then.
+            block = None
+
+    if block is None:
+        return [read_cstring(process, address) for address in addresses]
+
+    result = []
+    for address in addresses:
+        offset = address - start
+        terminator = block.find(b'\0', offset)
+        if terminator < 0:
+            result.append(read_cstring(process, address))
+        else:
+            result.append(block[offset:terminator].decode('utf-8', errors='replace'))
+    return result
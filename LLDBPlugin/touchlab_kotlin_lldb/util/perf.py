@@ -0,0 +1,157 @@
+import functools
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from ..cache import active_partition
+
+T = TypeVar('T')
+
+# Number of past stops whose breakdown is kept for `kotlin_perf stops`.
+MAX_RECORDED_STOPS = 16
+# Time from importing the plugin to the end of `__lldb_init_module` it may take in every debug session, Kotlin or not.
+STARTUP_BUDGET_SECONDS = 0.05
+# Startup phases counted against the budget, the others only run once a Kotlin module is loaded.
+STARTUP_READY_PHASES = ('import', 'init')
+
+
+class PerfEntry:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+class PerfStats:
+    """Counts and cumulative durations of named operations."""
+
+    def __init__(self, stop_id: Optional[int] = None, target_index: Optional[int] = None):
+        self.stop_id = stop_id
+        # Stop IDs are per process, several targets may be stopped at the same one.
+        self.target_index = target_index
+        self.entries: Dict[str, PerfEntry] = {}
+
+    def add(self, name: str, count: int, seconds: float):
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = PerfEntry()
+            self.entries[name] = entry
+        entry.count += count
+        entry.seconds += seconds
+
+
+_totals = PerfStats()
+_stops: Deque[PerfStats] = deque(maxlen=MAX_RECORDED_STOPS)
+# Phases of the plugin's startup in the order they ran, kept apart from the counters so `reset` doesn't lose them.
+_startup: Dict[str, float] = {}
+
+
+def record(name: str, count: int = 1, seconds: float = 0.0):
+    """Adds to the counter `name`, both in the totals and in the breakdown of the current stop of the target whose
+    values are being formatted."""
+    _totals.add(name, count, seconds)
+    partition = active_partition()
+    if partition is not None and partition._stop_perf is not None:
+        partition._stop_perf.add(name, count, seconds)
+
+
+def hit(cache_name: str, is_hit: bool):
+    record('cache.{}.{}'.format(cache_name, 'hit' if is_hit else 'miss'))
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator recording the number of calls and the time spent in the decorated function."""
+
+    def decorator(function: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, 1, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def call_timed(name: str, function: Callable[..., T], *args, **kwargs) -> T:
+    started = time.perf_counter()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        record(name, 1, time.perf_counter() - started)
+
+
+def record_startup(phase: str, seconds: float):
+    _startup[phase] = _startup.get(phase, 0.0) + seconds
+    record('startup.{}'.format(phase), 1, seconds)
+
+
+def startup_phases() -> Dict[str, float]:
+    return _startup
+
+
+def begin_stop(stop_id: int, target_index: int) -> PerfStats:
+    """Starts the breakdown of a new stop of a target, called once its process stopped again. The partition of the
+    target keeps it for the rest of the stop."""
+    stats = PerfStats(stop_id, target_index)
+    _stops.append(stats)
+    return stats
+
+
+def reset():
+    global _totals
+    _totals = PerfStats()
+    _stops.clear()
+
+
+def totals() -> PerfStats:
+    return _totals
+
+
+def recorded_stops() -> Deque[PerfStats]:
+    return _stops
+
+
+def format_stats(stats: PerfStats) -> str:
+    if not stats.entries:
+        return 'No operations recorded.'
+
+    name_width = max(len('Operation'), max(len(name) for name in stats.entries))
+    lines = ['{:<{width}} {:>9} {:>11} {:>11}'.format('Operation', 'Count', 'Total ms', 'Avg us', width=name_width)]
+    # Timed operations first, the most expensive on top, followed by the plain counters.
+    for name, entry in sorted(stats.entries.items(), key=lambda item: (-item[1].seconds, -item[1].count, item[0])):
+        if entry.seconds > 0:
+            lines.append('{:<{width}} {:>9} {:>11.3f} {:>11.1f}'.format(
+                name, entry.count, entry.seconds * 1e3, entry.seconds * 1e6 / entry.count, width=name_width,
+            ))
+        else:
+            lines.append('{:<{width}} {:>9} {:>11} {:>11}'.format(name, entry.count, '', '', width=name_width))
+    return '\n'.join(lines)
+
+
+def startup_seconds() -> float:
+    """Import to ready time of the plugin."""
+    return sum(seconds for name, seconds in _startup.items() if name in STARTUP_READY_PHASES)
+
+
+def format_startup() -> str:
+    if not _startup:
+        return 'No startup recorded.'
+
+    name_width = max(len('Phase'), max(len(name) for name in _startup))
+    lines = ['{:<{width}} {:>11}'.format('Phase', 'ms', width=name_width)]
+    for name, seconds in _startup.items():
+        lines.append('{:<{width}} {:>11.3f}{}'.format(
+            name, seconds * 1e3, '' if name in STARTUP_READY_PHASES else '  (deferred)', width=name_width,
+        ))
+    ready_seconds = startup_seconds()
+    lines.append('Import to ready: {:.3f} ms of a {:.0f} ms budget{}'.format(
+        ready_seconds * 1e3,
+        STARTUP_BUDGET_SECONDS * 1e3,
+        ', OVER BUDGET' if ready_seconds > STARTUP_BUDGET_SECONDS else '',
+    ))
+    return '\n'.join(lines)
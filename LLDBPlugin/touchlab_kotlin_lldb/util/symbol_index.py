@@ -0,0 +1,176 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import lldb
+
+from .log import log
+from ..cache.persistent import load_symbols, save_symbols
+
+KOTLIN_SYMBOL_PREFIXES = ('kvar:', 'kfun:', 'kclass:')
+
+
+class SymbolIndex:
+    """Names and file addresses of all symbols of a module, so lookups don't have to walk `SBModule.symbols`.
+
+    Addresses are file addresses, which stay valid across launches, use `load_address_slide` to get load addresses."""
+
+    def __init__(self, key: str, symbols: Iterable[Tuple[str, int]]):
+        self.key = key
+        # Insertion ordered, same order as in the module.
+        self._addresses_by_name: Dict[str, List[int]] = {}
+        by_address: List[Tuple[int, str]] = []
+        for name, address in symbols:
+            addresses = self._addresses_by_name.setdefault(name, [])
+            if address not in addresses:
+                addresses.append(address)
+            by_address.append((address, name))
+
+        by_address.sort()
+        self._sorted_addresses = [address for address, _ in by_address]
+        self._names_by_address = [name for _, name in by_address]
+        self._sorted_names = sorted(self._addresses_by_name)
+
+        # Kotlin symbols by their name without the prefix, e.g. `kotlin_symbols['kclass:']['kotlin.String']`.
+        self.kotlin_symbols: Dict[str, Dict[str, int]] = {prefix: {} for prefix in KOTLIN_SYMBOL_PREFIXES}
+        for name, addresses in self._addresses_by_name.items():
+            for prefix in KOTLIN_SYMBOL_PREFIXES:
+                if name.startswith(prefix):
+                    self.kotlin_symbols[prefix][name[len(prefix):]] = addresses[0]
+                    break
+
+    def __len__(self) -> int:
+        return len(self._sorted_addresses)
+
+    def names(self) -> Iterable[str]:
+        return self._addresses_by_name.keys()
+
+    def addresses(self, name: str) -> List[int]:
+        return self._addresses_by_name.get(name, [])
+
+    def address(self, name: str) -> Optional[int]:
+        addresses = self._addresses_by_name.get(name)
+        return addresses[0] if addresses else None
+
+    def names_with_prefix(self, prefix: str) -> List[str]:
+        result = []
+        for i in range(bisect.bisect_left(self._sorted_names, prefix), len(self._sorted_names)):
+            name = self._sorted_names[i]
+            if not name.startswith(prefix):
+                break
+            result.append(name)
+        return result
+
+    def ranges_with_prefix(self, prefix: str) -> List[Tuple[int, int]]:
+        """Address ranges of the symbols whose names start with `prefix`, each one ending where the next symbol starts."""
+        result = []
+        for name in self.names_with_prefix(prefix):
+            for address in self._addresses_by_name[name]:
+                end = bisect.bisect_right(self._sorted_addresses, address)
+                if end < len(self._sorted_addresses):
+                    result.append((address, self._sorted_addresses[end]))
+        return result
+
+    def names_at(self, address: int) -> List[str]:
+        start = bisect.bisect_left(self._sorted_addresses, address)
+        end = bisect.bisect_right(self._sorted_addresses, address, start)
+        return list(dict.fromkeys(self._names_by_address[start:end]))
+
+    def kotlin_symbol_at(self, prefix: str, address: int) -> Optional[str]:
+        """Reverse lookup of `kotlin_symbols`, e.g. the class name of the TypeInfo at the `kclass:` symbol's address."""
+        for name in self.names_at(address):
+            if name.startswith(prefix):
+                return name[len(prefix):]
+        return None
+
+
+_indices: Dict[str, SymbolIndex] = {}
+_pending: Dict[str, threading.Thread] = {}
+_lock = threading.Lock()
+
+
+def module_key(module: lldb.SBModule) -> str:
+    return module.GetUUIDString() or str(module.GetFileSpec())
+
+
+def index_module_in_background(module: lldb.SBModule):
+    """Starts indexing the symbols of a freshly loaded module, unless it has been indexed already."""
+    key = module_key(module)
+    with _lock:
+        if key in _indices or key in _pending:
+            return
+        thread = threading.Thread(
+            target=_build_index,
+            args=(module, key),
+            name='konan_lldb symbol index {}'.format(key),
+            daemon=True,
+        )
+        _pending[key] = thread
+        thread.start()
+
+
+def get_symbol_index(module: lldb.SBModule) -> SymbolIndex:
+    """Returns the symbol index of the module, waiting for a background build or building it right away."""
+    key = module_key(module)
+    with _lock:
+        index = _indices.get(key)
+        thread = _pending.get(key)
+    if index is not None:
+        return index
+
+    if thread is not None:
+        thread.join()
+        with _lock:
+            index = _indices.get(key)
+    return index if index is not None else _build_index(module, key)
+
+
+def peek_symbol_index(module: lldb.SBModule) -> Optional[SymbolIndex]:
+    """Returns the symbol index of the module if it's ready, starting a background build otherwise."""
+    with _lock:
+        index = _indices.get(module_key(module))
+    if index is None:
+        index_module_in_background(module)
+    return index
+
+
+def reset_symbol_indices():
+    """Forgets all indices, waiting for the ones being built, so modules get indexed again as in a new session."""
+    with _lock:
+        threads = list(_pending.values())
+    for thread in threads:
+        thread.join()
+    with _lock:
+        _indices.clear()
+
+
+def load_address_slide(target: lldb.SBTarget, module: lldb.SBModule) -> int:
+    """Difference between the load and file addresses of the module in the target."""
+    header = module.GetObjectFileHeaderAddress()
+    load_address = header.GetLoadAddress(target)
+    if load_address == lldb.LLDB_INVALID_ADDRESS:
+        return 0
+    return load_address - header.GetFileAddress()
+
+
+def _build_index(module: lldb.SBModule, key: str) -> SymbolIndex:
+    try:
+        # Only the UUID tells builds apart, other modules are always indexed from scratch.
+        persistent = bool(module.GetUUIDString())
+        symbols = load_symbols(key) if persistent else None
+        if symbols is None:
+            symbols = [
+                (symbol.GetName(), symbol.GetStartAddress().GetFileAddress())
+                for symbol in module.symbols
+                if symbol.GetName() is not None
+            ]
+            if persistent:
+                save_symbols(key, symbols)
+        index = SymbolIndex(key, symbols)
+        log(lambda: "symbol index of {}: {} symbols".format(key, len(index)))
+        with _lock:
+            _indices[key] = index
+        return index
+    finally:
+        with _lock:
+            _pending.pop(key, None)